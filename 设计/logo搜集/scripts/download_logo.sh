@@ -16,47 +16,73 @@ mkdir -p "$OUTPUT_DIR"
 
 # 标准化公司名称 (用于 URL)
 COMPANY_ENCODED=$(echo "$COMPANY_NAME" | sed 's/ /+/g; s/,//g; s/\.//g' | tr '[:upper:]' '[:lower:]')
-COMPANY_CLEAN=$(echo "$COMPANY_NAME" | sed 's/, Inc\.//g; s/ Inc\.//g; s/ Corporation//g; s/ Corp\.//g; s/ Company//g; s/ Co\.//g' | tr '[:upper:]' '[:lower:]' | tr ' ' '-')
+# 与 Python 工具共用 环境/names.py 的规则（各国公司后缀、&、重音字母、中日文名）
+COMPANY_CLEAN=$(python3 "$(dirname "$0")/../环境/names.py" "$COMPANY_NAME" 2>/dev/null)
+if [ -z "$COMPANY_CLEAN" ]; then
+    COMPANY_CLEAN=$(echo "$COMPANY_NAME" | sed 's/, Inc\.//g; s/ Inc\.//g; s/ Corporation//g; s/ Corp\.//g; s/ Company//g; s/ Co\.//g' | tr '[:upper:]' '[:lower:]' | tr ' ' '-')
+fi
 
 echo "正在获取: $COMPANY_NAME"
 
-# 1. 尝试 worldvectorlogo.com
-LOGO_URL="https://worldvectorlogo.com/download/${COMPANY_CLEAN}.svg"
-echo "  尝试: $LOGO_URL"
-
 # 检查是否已存在
 if [ -f "$OUTPUT_DIR/${COMPANY_CLEAN}.svg" ]; then
     echo "  ✓ 已存在"
     exit 0
 fi
 
-# 使用 curl 下载 (静默模式)
-curl -sL -o "$OUTPUT_DIR/${COMPANY_CLEAN}.svg" "$LOGO_URL" --max-time 10
+# 优先交给 环境/sources.py：各源按历史成功率和耗时排序并对冲请求，统计与 Python 下载器共用。
+# 退出码 3 表示各源都没有；其他失败（比如没有 Python 依赖）退回下面的 curl 流程
+python3 "$(dirname "$0")/../环境/sources.py" "$COMPANY_NAME" "$OUTPUT_DIR" "$COMPANY_CLEAN" 2>/dev/null
+case $? in
+    0) exit 0 ;;
+    3) echo "  ✗ 未找到 Logo"; exit 0 ;;
+esac
 
-# 检查是否下载成功 (文件大小 > 1KB 且包含 SVG 标签)
-if [ -s "$OUTPUT_DIR/${COMPANY_CLEAN}.svg" ]; then
-    if grep -q "<svg" "$OUTPUT_DIR/${COMPANY_CLEAN}.svg" 2>/dev/null; then
-        echo "  ✓ 成功从 worldvectorlogo.com 下载"
-        exit 0
-    else
-        # 下载的内容不是有效的 SVG，删除
-        rm "$OUTPUT_DIR/${COMPANY_CLEAN}.svg"
-    fi
+# 1. 尝试 worldvectorlogo.com
+LOGO_URL="https://worldvectorlogo.com/download/${COMPANY_CLEAN}.svg"
+echo "  尝试: $LOGO_URL"
+
+# 先下到临时文件，校验通过再改名，404 HTML 页面不会留在输出目录
+TMP_FILE="$OUTPUT_DIR/.${COMPANY_CLEAN}.svg.tmp"
+
+# 使用 curl 下载 (静默模式)，-w 取回状态码和 Content-Type
+# --retry 对 429/5xx 会遵守 Retry-After，没有时指数退避（不设 --retry-delay，设了就变成固定间隔）
+RESULT=$(curl -sL -o "$TMP_FILE" -w '%{http_code} %{content_type}' "$LOGO_URL" --max-time 10 --retry 3)
+HTTP_CODE=${RESULT%% *}
+CONTENT_TYPE=$(echo "${RESULT#* }" | tr '[:upper:]' '[:lower:]')
+
+# 检查是否下载成功：200、类型不是 HTML、开头是 XML/SVG 而不是 HTML
+if [ "$HTTP_CODE" = "200" ] && [ -s "$TMP_FILE" ]; then
+    case "$CONTENT_TYPE" in
+        *html*) ;;
+        *)
+            if head -c 1024 "$TMP_FILE" | grep -qi "<svg" && ! head -c 1024 "$TMP_FILE" | grep -qi "<html\|<!doctype html"; then
+                mv "$TMP_FILE" "$OUTPUT_DIR/${COMPANY_CLEAN}.svg"
+                echo "  ✓ 成功从 worldvectorlogo.com 下载"
+                exit 0
+            fi
+            ;;
+    esac
 fi
+# 下载的内容不是有效的 SVG，删除
+rm -f "$TMP_FILE"
 
 # 2. 尝试 Clearbit Logo API
 echo "  尝试 Clearbit Logo API"
-curl -sL -o "$OUTPUT_DIR/${COMPANY_CLEAN}_clearbit.png" "https://logo.clearbit.com/${COMPANY_CLEAN}.com" --max-time 10 2>/dev/null
+TMP_FILE="$OUTPUT_DIR/.${COMPANY_CLEAN}_clearbit.png.tmp"
+CONTENT_TYPE=$(curl -sL -o "$TMP_FILE" -w '%{content_type}' "https://logo.clearbit.com/${COMPANY_CLEAN}.com" --max-time 10 --retry 3 2>/dev/null)
 
-if [ -s "$OUTPUT_DIR/${COMPANY_CLEAN}_clearbit.png" ]; then
+# 只接受图片类型，并检查 PNG 魔数；同样校验通过再改名
+if [ -s "$TMP_FILE" ] && [[ "$CONTENT_TYPE" == image/* ]] && \
+        [ "$(head -c 4 "$TMP_FILE" | tail -c 3)" = "PNG" ]; then
     # 检查是否是有效的图片 (文件大小 > 100 字节)
-    FILE_SIZE=$(stat -f%z "$OUTPUT_DIR/${COMPANY_CLEAN}_clearbit.png" 2>/dev/null || stat -c%s "$OUTPUT_DIR/${COMPANY_CLEAN}_clearbit.png" 2>/dev/null || echo 0)
+    FILE_SIZE=$(stat -f%z "$TMP_FILE" 2>/dev/null || stat -c%s "$TMP_FILE" 2>/dev/null || echo 0)
     if [ "$FILE_SIZE" -gt 100 ]; then
+        mv "$TMP_FILE" "$OUTPUT_DIR/${COMPANY_CLEAN}_clearbit.png"
         echo "  ✓ 成功从 Clearbit 下载 PNG"
         exit 0
-    else
-        rm "$OUTPUT_DIR/${COMPANY_CLEAN}_clearbit.png"
     fi
 fi
+rm -f "$TMP_FILE"
 
 echo "  ✗ 未找到 Logo"
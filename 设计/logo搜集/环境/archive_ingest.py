@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+simple-icons 归档导入
+直接读本地的仓库 tar.gz / zip 或 npm 包（.tgz），流式遍历成员，只取出需要的图标（按本地 slug 索引解析）
+和标题/别名数据，校验后原子写进 simple-icons/icons/，最后登记到 logo 清单；不解压整包，也不发网络请求
+"""
+
+import re
+import sys
+import tarfile
+import time
+import zipfile
+from pathlib import Path
+
+from icon_index import DATA_FILES, ICONS_LIST, SIMPLE_ICONS_DIR, IconIndex
+from manifest import Manifest
+from storage import atomic_write
+from validation import InvalidContent, StreamValidator
+
+HERE = Path(__file__).resolve().parent
+NAMES_FILE = HERE / "logo_names.txt"
+
+# GitHub 归档是 simple-icons-<分支>/icons/x.svg，npm 包是 package/icons/x.svg，也兼容没有顶层目录的
+_ICON_MEMBER = re.compile(r"^(?:[^/]+/)?icons/(?P<slug>[^/]+)\.svg$")
+_DATA_MEMBER = re.compile(r"^(?:[^/]+/)?(?P<rel>" + "|".join(re.escape(d) for d in DATA_FILES) + ")$")
+
+
+def _members(archive):
+    """按归档里的顺序产出 (成员名, 读取函数)；tar 用流模式，只能顺序读，不回头"""
+    path = str(archive)
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                if not info.is_dir():
+                    yield info.filename, lambda info=info: zf.read(info)
+        return
+    with tarfile.open(path, "r|*") as tf:
+        for member in tf:
+            if member.isfile():
+                yield member.name, lambda member=member: tf.extractfile(member).read()
+
+
+def _write_if_changed(path, data):
+    """内容没变就不写，免得清单、缩略图缓存以为文件改过"""
+    path = Path(path)
+    if path.exists() and path.stat().st_size == len(data) and path.read_bytes() == data:
+        return False
+    atomic_write(path, data)
+    return True
+
+
+def ingest(archive, names=None, repo_dir=SIMPLE_ICONS_DIR, icons_list=ICONS_LIST, register=True):
+    """从归档里取出 names 需要的图标（names 为 None 则全部），返回统计 dict
+
+    顺带把归档里的完整 slug 清单写回 all_icons.txt，标题/别名数据写到 repo_dir 下
+    （名称解析用的是导入前的索引，新别名下次导入时生效）。
+    """
+    repo_dir = Path(repo_dir)
+    icons_dir = repo_dir / "icons"
+    wanted = None
+    stats = {"written": 0, "unchanged": 0, "invalid": 0, "skipped": 0, "unresolved": []}
+    if names is not None:
+        index = IconIndex.load(icons_list, repo_dir)
+        resolved = index.resolve_many(names)
+        wanted = {slug for slug, _ in resolved.values() if slug}
+        stats["unresolved"] = [name for name, (slug, _) in resolved.items() if slug is None]
+
+    slugs = []
+    for name, read in _members(archive):
+        m = _DATA_MEMBER.match(name)
+        if m:
+            _write_if_changed(repo_dir / m.group("rel"), read())
+            continue
+        m = _ICON_MEMBER.match(name)
+        if m is None:
+            continue
+        slug = m.group("slug")
+        slugs.append(slug)
+        if wanted is not None and slug not in wanted:
+            stats["skipped"] += 1
+            continue
+        data = read()
+        try:
+            validator = StreamValidator(kind="svg")
+            validator.feed(data)
+            validator.close()
+        except InvalidContent:
+            stats["invalid"] += 1
+            continue
+        stats["written" if _write_if_changed(icons_dir / f"{slug}.svg", data) else "unchanged"] += 1
+
+    if slugs:
+        # 完整清单按归档顺序写回，本地索引和只解出一部分的 icons/ 取并集
+        _write_if_changed(icons_list, ("\n".join(slugs) + "\n").encode("utf-8"))
+    stats["archive_icons"] = len(slugs)
+    if register and icons_dir.is_dir():
+        with Manifest() as manifest:
+            stats["manifest"] = manifest.scan([icons_dir])
+    return stats
+
+
+if __name__ == "__main__":
+    # python archive_ingest.py 归档 [名称文件 ... | --all]；默认按 logo_names.txt 取
+    archive = Path(sys.argv[1])
+    args = sys.argv[2:]
+    names = None
+    if "--all" not in args:
+        names = []
+        for path in args or [NAMES_FILE]:
+            with open(path, "r", encoding="utf-8") as f:
+                names += [line.strip() for line in f if line.strip()]
+    start = time.time()
+    stats = ingest(archive, names)
+    unresolved = stats.pop("unresolved")
+    print(f"{stats} ({time.time() - start:.2f}s)")
+    if unresolved:
+        print(f"索引里没有: {', '.join(unresolved)}")
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+按内容寻址的 logo 存储
+每份内容只存一次（logos/.blobs/ab/<sha256>.<扩展名>），by_country / by_letter / thumbs 里的文件
+都是指向 blob 的硬链接（跨盘时退回符号链接），清单记在 manifest.db；
+整理目录只是改链接，不再成批复制文件
+"""
+
+import hashlib
+import os
+import shutil
+import stat
+import sys
+import time
+from pathlib import Path
+
+from storage import connect
+
+HERE = Path(__file__).resolve().parent
+LOGOS_DIR = HERE.parent / "logos"
+BLOB_DIR = LOGOS_DIR / ".blobs"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    ext    TEXT NOT NULL,
+    size   INTEGER NOT NULL,
+    added  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS views (
+    path   TEXT PRIMARY KEY,       -- 视图文件路径
+    sha256 TEXT NOT NULL REFERENCES blobs (sha256),
+    kind   TEXT NOT NULL           -- hardlink / symlink / copy
+);
+CREATE INDEX IF NOT EXISTS views_sha ON views (sha256);
+"""
+
+LOGO_SUFFIXES = (".svg", ".png")
+
+
+def view_path(path):
+    """视图记录用的路径：目录部分取绝对路径（不跟随文件本身的符号链接），换个工作目录也对得上"""
+    path = Path(path)
+    return str(path.parent.resolve() / path.name)
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class BlobStore:
+    """内容寻址存储 + 视图清单"""
+
+    def __init__(self, root=BLOB_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.conn = connect(self.root / "manifest.db")
+        self.conn.executescript(SCHEMA)
+
+    def blob_path(self, sha, ext):
+        return self.root / sha[:2] / f"{sha}{ext}"
+
+    def put(self, path, sha=None):
+        """把文件存进库，返回 sha256；内容已存在就不再写（已算过哈希可以传 sha）"""
+        path = Path(path)
+        sha = sha or file_hash(path)
+        ext = path.suffix.lower()
+        blob = self.blob_path(sha, ext)
+        if not blob.exists():
+            blob.parent.mkdir(exist_ok=True)
+            tmp = blob.with_name(f".{blob.name}.{os.getpid()}.tmp")
+            # 复制内容而不是硬链接源文件：源文件之后被原地改写不会改掉 blob。
+            # blob 保持普通权限（硬链接视图和它共用 inode，只读会让所有视图都只读），
+            # 本仓库的写入都走 atomic_write 换新 inode，不会改到共享的 blob
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, blob)
+        else:
+            mode = blob.stat().st_mode
+            if not mode & stat.S_IWUSR:
+                os.chmod(blob, stat.S_IMODE(mode) | stat.S_IWUSR)  # 旧版本存成了只读，恢复可写
+        self.conn.execute("INSERT OR IGNORE INTO blobs VALUES (?, ?, ?, ?)",
+                          (sha, ext, blob.stat().st_size, time.time()))
+        return sha
+
+    def _ext(self, sha):
+        row = self.conn.execute("SELECT ext FROM blobs WHERE sha256 = ?", (sha,)).fetchone()
+        if row is None:
+            raise KeyError(f"未知 blob: {sha}")
+        return row["ext"]
+
+    def link(self, sha, dest, mode="hardlink"):
+        """在 dest 生成指向 blob 的视图（原子替换），返回实际用的方式
+
+        硬链接失败（跨盘、文件系统不支持）退回符号链接，再不行才复制。
+        """
+        blob = self.blob_path(sha, self._ext(sha))
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists() and not dest.is_symlink() and os.path.samefile(dest, blob):
+            kind = "hardlink"
+        else:
+            tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+            if os.path.lexists(tmp):
+                os.unlink(tmp)
+            kind = None
+            for candidate in (["hardlink", "symlink", "copy"] if mode == "hardlink" else [mode, "copy"]):
+                try:
+                    if candidate == "hardlink":
+                        os.link(blob, tmp)
+                    elif candidate == "symlink":
+                        os.symlink(os.path.relpath(blob, dest.parent), tmp)
+                    else:
+                        shutil.copyfile(blob, tmp)
+                except OSError:
+                    continue
+                kind = candidate
+                break
+            if kind is None:
+                raise OSError(f"无法在 {dest} 生成视图")
+            os.replace(tmp, dest)
+        self.conn.execute("INSERT OR REPLACE INTO views VALUES (?, ?, ?)", (view_path(dest), sha, kind))
+        return kind
+
+    def ingest(self, directories):
+        """把目录里已有的 logo 收进库，并把原文件换成指向 blob 的链接
+
+        返回 (文件数, 去重后省下的字节数)。
+        """
+        files, saved = 0, 0
+        with self.conn:
+            self.conn.execute("BEGIN")
+            for directory in directories:
+                for dirpath, dirnames, filenames in os.walk(directory):
+                    dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+                    for name in filenames:
+                        path = Path(dirpath) / name
+                        if name.startswith(".") or path.suffix.lower() not in LOGO_SUFFIXES or path.is_symlink():
+                            continue
+                        st = path.stat()
+                        sha = file_hash(path)
+                        if self.blob_path(sha, path.suffix.lower()).exists():
+                            saved += st.st_size
+                        self.put(path, sha)
+                        self.link(sha, path)
+                        files += 1
+        return files, saved
+
+    def gc(self):
+        """删除已不存在的视图记录和没有视图引用的 blob，返回删除的 blob 数"""
+        removed = 0
+        with self.conn:
+            self.conn.execute("BEGIN")
+            # 旧记录可能是相对路径，按当前目录解析会误判；只按绝对路径判断视图是否还在
+            stale = [r["path"] for r in self.conn.execute("SELECT path FROM views")
+                     if os.path.isabs(r["path"]) and not os.path.lexists(view_path(r["path"]))]
+            self.conn.executemany("DELETE FROM views WHERE path = ?", [(p,) for p in stale])
+            orphans = self.conn.execute(
+                "SELECT sha256, ext FROM blobs WHERE sha256 NOT IN (SELECT sha256 FROM views)").fetchall()
+            for row in orphans:
+                blob = self.blob_path(row["sha256"], row["ext"])
+                if blob.exists():
+                    blob.unlink()
+                removed += 1
+            self.conn.executemany("DELETE FROM blobs WHERE sha256 = ?", [(r["sha256"],) for r in orphans])
+        return removed
+
+    def stats(self):
+        row = self.conn.execute("SELECT COUNT(*) AS n, COALESCE(SUM(size), 0) AS bytes FROM blobs").fetchone()
+        views = self.conn.execute("SELECT kind, COUNT(*) AS n FROM views GROUP BY kind").fetchall()
+        return {"blobs": row["n"], "bytes": row["bytes"], **{f"views_{r['kind']}": r["n"] for r in views}}
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    # python blob_store.py [ingest [目录 ...] | gc | stats]
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    with BlobStore() as store:
+        if command == "ingest":
+            dirs = sys.argv[2:] or [LOGOS_DIR / "by_country", LOGOS_DIR / "by_letter"]
+            start = time.time()
+            files, saved = store.ingest(dirs)
+            print(f"收录 {files} 个文件，去重节省 {saved / 1024 / 1024:.1f} MB ({time.time() - start:.1f}s)")
+        elif command == "gc":
+            print(f"清理 {store.gc()} 个无引用 blob")
+        print(store.stats())
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+公司库
+把 countries/*/*/公司列表.md 里的表格一次性导入 SQLite（按国家、股票代码、规范化名称、状态建索引），
+状态改动先记在库里，回写 Markdown 时只替换改动的那几行，每个文件一次原子写
+"""
+
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+from names import match_key
+from storage import atomic_write, connect
+
+HERE = Path(__file__).resolve().parent
+COUNTRIES_DIR = HERE.parent / "countries"
+COMPANY_DB = HERE / "logo" / "companies.db"
+
+STATUS_PENDING = "⏳ 待获取"
+STATUS_DONE = "✅ 已获取"
+STATUS_MISSING = "❌ 未找到"
+
+# 表头 -> 字段；只导入含"公司名称"列的表，数据来源表之类的跳过
+COLUMNS = {
+    "排名": "rank", "公司名称": "name", "股票代码": "ticker", "估值": "valuation",
+    "行业": "industry", "Logo状态": "status", "本地路径": "local_path",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS companies (
+    id         INTEGER PRIMARY KEY,
+    region     TEXT NOT NULL,      -- G7 / BRICS
+    country    TEXT NOT NULL,
+    file       TEXT NOT NULL,      -- 相对 countries/ 的路径
+    line       INTEGER NOT NULL,   -- 文件里的行号（从 1 开始）
+    section    TEXT,               -- 所在的 ## 小节
+    layout     TEXT NOT NULL,      -- 表头字段，| 分隔，回写时按原列序
+    raw        TEXT NOT NULL,      -- 文件里当前这一行，回写前用来核对
+    rank       TEXT,
+    name       TEXT NOT NULL,
+    ticker     TEXT,
+    valuation  TEXT,
+    industry   TEXT,
+    status     TEXT,
+    local_path TEXT,
+    norm_name  TEXT NOT NULL,
+    dirty      INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS companies_country ON companies (country);
+CREATE INDEX IF NOT EXISTS companies_ticker ON companies (ticker);
+CREATE INDEX IF NOT EXISTS companies_norm ON companies (norm_name);
+CREATE INDEX IF NOT EXISTS companies_status ON companies (status);
+CREATE INDEX IF NOT EXISTS companies_dirty ON companies (file) WHERE dirty = 1;
+CREATE TABLE IF NOT EXISTS files (
+    file  TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size  INTEGER NOT NULL
+);
+"""
+
+_SEPARATOR = re.compile(r"^\|[\s:|-]+\|$")
+
+
+def norm_name(name):
+    """规范化名称；没有英文写法的中日文名就用原名"""
+    return match_key(name) or name.strip()
+
+
+def split_row(line):
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def format_row(cells):
+    return "| " + " | ".join(cells) + " |"
+
+
+def parse_tables(path):
+    """逐行扫描一个公司列表文件，产出 (行号, 小节, 表头字段, 行内容, {字段: 值})"""
+    section, layout = None, None
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.rstrip("\n")
+            if line.startswith("#"):
+                section = line.lstrip("#").strip()
+                layout = None
+                continue
+            if not line.startswith("|"):
+                layout = None
+                continue
+            if _SEPARATOR.match(line):
+                continue
+            cells = split_row(line)
+            if layout is None:
+                # 表格第一行是表头
+                layout = [COLUMNS.get(c) for c in cells] if "公司名称" in cells else []
+                continue
+            if not layout or len(cells) != len(layout):
+                continue
+            row = {field: value for field, value in zip(layout, cells) if field}
+            if row.get("name"):
+                yield lineno, section, layout, line, row
+
+
+class CompanyStore:
+    """公司库；set_status() 只改库，render() 才回写 Markdown"""
+
+    def __init__(self, path=COMPANY_DB, root=COUNTRIES_DIR):
+        self.root = Path(root)
+        self.conn = connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def ingest(self, force=False):
+        """导入所有国家的表格；大小和修改时间都没变的文件跳过，返回重新导入的文件数"""
+        # 有未回写的改动先写回去，免得重新解析时丢掉
+        self.render()
+        seen = self.conn.execute("SELECT file, mtime, size FROM files").fetchall()
+        seen = {r["file"]: (r["mtime"], r["size"]) for r in seen}
+        changed = 0
+        for path in sorted(self.root.glob("*/*/公司列表.md")):
+            rel = path.relative_to(self.root).as_posix()
+            st = path.stat()
+            if not force and seen.get(rel) == (st.st_mtime, st.st_size):
+                continue
+            region, country = path.parent.parent.name, path.parent.name
+            rows = [
+                (region, country, rel, lineno, section, "|".join(f or "" for f in layout), line,
+                 row.get("rank"), row["name"], row.get("ticker"), row.get("valuation"),
+                 row.get("industry"), row.get("status"), row.get("local_path"), norm_name(row["name"]))
+                for lineno, section, layout, line, row in parse_tables(path)
+            ]
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.conn.execute("DELETE FROM companies WHERE file = ?", (rel,))
+                self.conn.executemany(
+                    """INSERT INTO companies (region, country, file, line, section, layout, raw, rank, name,
+                                              ticker, valuation, industry, status, local_path, norm_name)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""", rows)
+                self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?)",
+                                  (rel, st.st_mtime, st.st_size))
+            changed += 1
+        return changed
+
+    def find(self, country=None, status=None, ticker=None, name=None):
+        """按国家 / 状态 / 股票代码 / 名称（任意写法，按规范化名称比）查询"""
+        where, args = [], []
+        for column, value in (("country", country), ("status", status), ("ticker", ticker)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                args.append(value)
+        if name is not None:
+            where.append("norm_name = ?")
+            args.append(norm_name(name))
+        sql = "SELECT * FROM companies"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return self.conn.execute(sql + " ORDER BY file, line", args).fetchall()
+
+    def set_status(self, company_id, status, local_path=None):
+        """改一行的状态（和本地路径），标记待回写"""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE companies SET status = ?, local_path = COALESCE(?, local_path), dirty = 1 WHERE id = ?",
+                (status, local_path, company_id))
+
+    def set_status_many(self, updates):
+        """批量改状态：updates 是 [(id, status, local_path)]，一个事务"""
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                "UPDATE companies SET status = ?, local_path = COALESCE(?, local_path), dirty = 1 WHERE id = ?",
+                [(status, local_path, company_id) for company_id, status, local_path in updates])
+
+    def render(self):
+        """把有改动的行回写到各自的 Markdown；每个文件只读一次、原子写一次，返回改写的行数"""
+        rows = self.conn.execute("SELECT * FROM companies WHERE dirty = 1 ORDER BY file, line").fetchall()
+        by_file = {}
+        for row in rows:
+            by_file.setdefault(row["file"], []).append(row)
+
+        known = {r["file"]: (r["mtime"], r["size"]) for r in self.conn.execute("SELECT file, mtime, size FROM files")}
+        written = 0
+        for rel, dirty in by_file.items():
+            path = self.root / rel
+            before = os.stat(path)
+            with open(path, "r", encoding="utf-8") as f:
+                lines = f.read().split("\n")
+            updates = []
+            for row in dirty:
+                i = row["line"] - 1
+                if i >= len(lines) or lines[i] != row["raw"]:
+                    # 文件被手工改过、行号错位了：按原内容找
+                    try:
+                        i = lines.index(row["raw"])
+                    except ValueError:
+                        print(f"跳过 {rel}:{row['line']} {row['name']}：文件里找不到原行", file=sys.stderr)
+                        continue
+                fields = dict(row)
+                cells = split_row(row["raw"])
+                for j, field in enumerate(row["layout"].split("|")):
+                    if field in ("status", "local_path"):
+                        cells[j] = fields[field] or "-"
+                lines[i] = format_row(cells)
+                updates.append((lines[i], i + 1, row["id"]))
+            if not updates:
+                continue
+            atomic_write(path, "\n".join(lines))
+            st = os.stat(path)
+            with self.conn:
+                self.conn.execute("BEGIN")
+                self.conn.executemany("UPDATE companies SET raw = ?, line = ?, dirty = 0 WHERE id = ?", updates)
+                # 上次导入后文件被手工改过就不记新的大小和时间，下次 ingest() 会重新解析、收进手工改动
+                if known.get(rel) == (before.st_mtime, before.st_size):
+                    self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?)",
+                                      (rel, st.st_mtime, st.st_size))
+            written += len(updates)
+        return written
+
+    def stats(self):
+        """{国家: {状态: 数量}}"""
+        result = {}
+        for row in self.conn.execute(
+                "SELECT country, status, COUNT(*) AS n FROM companies GROUP BY country, status"):
+            result.setdefault(row["country"], {})[row["status"]] = row["n"]
+        return result
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    # python company_store.py [ingest|render|stats]
+    command = sys.argv[1] if len(sys.argv) > 1 else "ingest"
+    with CompanyStore() as store:
+        start = time.time()
+        if command == "ingest":
+            changed = store.ingest(force="--force" in sys.argv)
+            total = store.conn.execute("SELECT COUNT(*) FROM companies").fetchone()[0]
+            print(f"导入 {changed} 个文件，共 {total} 家公司 ({time.time() - start:.2f}s)")
+        elif command == "render":
+            print(f"回写 {store.render()} 行 ({time.time() - start:.2f}s)")
+        for country, counts in store.stats().items():
+            print(f"{country}: " + ", ".join(f"{s}={n}" for s, n in counts.items()))
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+条件请求缓存
+每个下载过的 logo 记下 ETag / Last-Modified 和内容的 git blob SHA；刷新时带 If-None-Match /
+If-Modified-Since，没变的只回 304。simple-icons 这种放在 GitHub 上的源，先拿一次目录树
+（按 blob SHA 比对）就知道哪些图标改过，不再逐个文件探测
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+from icon_index import ICONS_LIST
+from sources import SIMPLE_ICONS_RAW
+from storage import atomic_write, connect
+from validation import InvalidContent, save_response
+
+HERE = Path(__file__).resolve().parent
+CACHE_DB = HERE / "logo" / "download_state.db"
+
+GITHUB_API = os.environ.get("GITHUB_API", "https://api.github.com")
+SIMPLE_ICONS_REPO = "simple-icons/simple-icons"
+SIMPLE_ICONS_REF = "develop"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS http_cache (
+    url           TEXT PRIMARY KEY,
+    path          TEXT NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    git_sha       TEXT,          -- 下载时内容的 git blob SHA，本地文件之后被优化过也能和远端比
+    checked       REAL NOT NULL,
+    changed       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS http_cache_path ON http_cache (path);
+CREATE TABLE IF NOT EXISTS api_cache (
+    url  TEXT PRIMARY KEY,
+    etag TEXT,
+    body TEXT NOT NULL
+);
+"""
+
+
+def git_blob_sha(data):
+    """和 git hash-object 一样的 blob SHA"""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def slug_pattern(template):
+    """URL 模板 -> 取 slug 的正则"""
+    before, after = template.split("{slug}")
+    return re.compile(re.escape(before) + r"(?P<slug>[^/]+)" + re.escape(after) + "$")
+
+
+class EtagCache:
+    """每个 URL 的验证器（ETag / Last-Modified / git SHA）
+
+    下载线程里调用 store()，每次临时开连接；批量刷新在主线程里一个事务提交。
+    """
+
+    def __init__(self, path=CACHE_DB):
+        self.path = path
+        conn = self._connect()
+        conn.close()
+
+    def _connect(self):
+        conn = connect(self.path)
+        conn.executescript(SCHEMA)
+        return conn
+
+    @staticmethod
+    def _row(url, path, headers, git_sha, changed):
+        return (url, str(path), headers.get("ETag"), headers.get("Last-Modified"), git_sha, time.time(), changed)
+
+    def store(self, url, path, headers):
+        """新下载的文件：记下响应头里的验证器和内容的 git SHA"""
+        with open(path, "rb") as f:
+            sha = git_blob_sha(f.read())
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO http_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             self._row(url, path, headers, sha, time.time()))
+        finally:
+            conn.close()
+
+    def rows(self):
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT * FROM http_cache").fetchall()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def conditional_headers(row):
+        headers = {}
+        if row["etag"]:
+            headers["If-None-Match"] = row["etag"]
+        if row["last_modified"]:
+            headers["If-Modified-Since"] = row["last_modified"]
+        return headers
+
+    def _check(self, fetcher, row, force=False):
+        """子线程里跑：条件请求一个 URL，返回 (row, 结果, 响应头, git SHA)
+
+        结果是 "unchanged" / "updated" / 错误信息；本地文件没了就不带条件头整份重下。
+        """
+        path = Path(row["path"])
+        headers = {} if force or not path.exists() else self.conditional_headers(row)
+        try:
+            response = fetcher.get(row["url"], headers=headers, stream=True)
+        except requests.RequestException as e:
+            return row, f"{type(e).__name__}: {e}", None, None
+        if response.status_code == 304:
+            response.close()
+            return row, "unchanged", response.headers, row["git_sha"]
+        if response.status_code != 200:
+            response.close()
+            return row, f"HTTP {response.status_code}", None, None
+        try:
+            save_response(response, path, kind=path.suffix.lower().lstrip("."))
+        except (InvalidContent, requests.RequestException) as e:
+            return row, f"{type(e).__name__}: {e}", None, None
+        with open(path, "rb") as f:
+            sha = git_blob_sha(f.read())
+        return row, "updated" if sha != row["git_sha"] else "unchanged", response.headers, sha
+
+    def refresh(self, fetcher, rows=None, workers=8, force=False):
+        """对缓存里的 URL 做条件请求，只有变了的才真正传内容；返回 {结果: 数量}"""
+        rows = self.rows() if rows is None else rows
+        counts, updates = {}, []
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="refresh") as pool:
+            for row, result, headers, sha in pool.map(lambda r: self._check(fetcher, r, force), rows):
+                key = result if result in ("unchanged", "updated") else "error"
+                counts[key] = counts.get(key, 0) + 1
+                if headers is None:
+                    continue
+                # 304 也可能带新的 ETag；没带就沿用旧的
+                merged = {"ETag": headers.get("ETag") or row["etag"],
+                          "Last-Modified": headers.get("Last-Modified") or row["last_modified"]}
+                changed = time.time() if result == "updated" else row["changed"]
+                updates.append(self._row(row["url"], row["path"], merged, sha, changed))
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany("INSERT OR REPLACE INTO http_cache VALUES (?, ?, ?, ?, ?, ?, ?)", updates)
+        finally:
+            conn.close()
+        return counts
+
+    def api_json(self, fetcher, url, immutable=False):
+        """带 ETag 缓存的 GitHub API 请求；immutable（按 SHA 取的树）有缓存就不再请求
+
+        GitHub 的 304 不计入限额。
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT etag, body FROM api_cache WHERE url = ?", (url,)).fetchone()
+            if row is not None and immutable:
+                return json.loads(row["body"])
+            headers = {"Accept": "application/vnd.github+json"}
+            if os.environ.get("GITHUB_TOKEN"):
+                headers["Authorization"] = f"Bearer {os.environ['GITHUB_TOKEN']}"
+            if row is not None and row["etag"]:
+                headers["If-None-Match"] = row["etag"]
+            response = fetcher.get(url, headers=headers)
+            if response.status_code == 304 and row is not None:
+                return json.loads(row["body"])
+            response.raise_for_status()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO api_cache VALUES (?, ?, ?)",
+                             (url, response.headers.get("ETag"), response.text))
+            return response.json()
+        finally:
+            conn.close()
+
+    def github_listing(self, fetcher, repo=SIMPLE_ICONS_REPO, ref=SIMPLE_ICONS_REF, directory="icons",
+                       suffix=".svg"):
+        """仓库某个目录下的 {文件名去后缀: blob SHA}，按仓库里的顺序
+
+        先取分支根目录树（通常 304），再按 SHA 取子目录树（内容不变，有缓存就不请求）。
+        """
+        trees = f"{GITHUB_API}/repos/{repo}/git/trees"
+        root = self.api_json(fetcher, f"{trees}/{ref}")
+        sub = next(e["sha"] for e in root["tree"] if e["path"] == directory and e["type"] == "tree")
+        listing = self.api_json(fetcher, f"{trees}/{sub}", immutable=True)
+        return {e["path"][:-len(suffix)]: e["sha"] for e in listing["tree"]
+                if e["type"] == "blob" and e["path"].endswith(suffix)}
+
+    def sync_simple_icons(self, fetcher, workers=8, icons_list=ICONS_LIST):
+        """一次目录树比对找出 simple-icons 里改过的图标，只下载这些；返回 {结果: 数量}
+
+        顺带按目录树更新 all_icons.txt，本地索引能认出新加的图标。
+        """
+        remote = self.github_listing(fetcher)
+        pattern = slug_pattern(SIMPLE_ICONS_RAW)
+        stale, counts = [], {"unchanged": 0, "removed": 0}
+        for row in self.rows():
+            m = pattern.match(row["url"])
+            if m is None:
+                continue
+            sha = remote.get(m.group("slug"))
+            if sha is None:
+                counts["removed"] += 1
+            elif sha != row["git_sha"] or not Path(row["path"]).exists():
+                stale.append(row)
+            else:
+                counts["unchanged"] += 1
+        # 树上显示变了的直接整份下载，不再带条件头
+        for key, n in self.refresh(fetcher, stale, workers, force=True).items():
+            counts[key] = counts.get(key, 0) + n
+
+        text = "\n".join(remote) + "\n"
+        if not Path(icons_list).exists() or Path(icons_list).read_text(encoding="utf-8") != text:
+            atomic_write(icons_list, text)
+            counts["icons_list"] = len(remote)
+        return counts
+
+    def close(self):
+        pass  # 不持有长连接，和其他存储类保持同样的用法
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    # python etag_cache.py [refresh | github]
+    # refresh：对所有下载过的 URL 做条件请求；github：按 simple-icons 目录树比对后只下改过的
+    from logo_fetcher import LogoFetcher
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "refresh"
+    start = time.time()
+    with EtagCache() as cache, LogoFetcher() as fetcher:
+        counts = cache.sync_simple_icons(fetcher) if command == "github" else cache.refresh(fetcher)
+    print(f"{counts} ({time.time() - start:.1f}s)")
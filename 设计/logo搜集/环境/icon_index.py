@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+simple-icons 本地索引
+slug、标题、别名都规范化后建精确表 + 三元组倒排表，公司名到 slug 的解析全在内存里做，
+不再靠拼字符串一个个发 HTTP 去试；网络只用来下载确认命中的图标
+"""
+
+import json
+import os
+import re
+import sys
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+
+from names import compact, core_tokens, match_key, variants
+
+HERE = Path(__file__).resolve().parent
+ICONS_LIST = HERE / "all_icons.txt"
+# 克隆下来的 simple-icons 仓库；有的话优先用它的图标目录和标题/别名数据
+SIMPLE_ICONS_DIR = HERE / "simple-icons"
+DATA_FILES = ("_data/simple-icons.json", "data/simple-icons.json")
+
+# simple-icons 的 titleToSlug 规则
+_SLUG_CHARS = {"+": "plus", ".": "dot", "&": "and", "đ": "d", "ħ": "h", "ı": "i",
+               "ĸ": "k", "ŀ": "l", "ł": "l", "ß": "ss", "ŧ": "t"}
+
+
+def title_to_slug(title):
+    title = "".join(_SLUG_CHARS.get(ch, ch) for ch in title.lower())
+    title = unicodedata.normalize("NFD", title)
+    return re.sub(r"[^a-z0-9]", "", title)
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# logo_names.txt 里索引推不出来的例外：公司名 -> slug，None 表示 simple-icons 确实没有；
+# 键按 match_key 规范化，'eli-lilly-and'、'Eli Lilly and Company' 都能命中
+LOGO_OVERRIDES = {match_key(k): v for k, v in {
+    "Alphabet": "google",  # Alphabet 是 Google 母公司
+    "Bristol-Myers Squibb": "bristolsquibb",
+    "Eli Lilly and Company": "lilly",
+    "PepsiCo": "pepsi",
+    "Berkshire Hathaway": None,
+}.items()}
+
+
+class IconIndex:
+    """slug 索引
+
+    entries 是 [(key, slug)]：key 为规范化后的 slug / 标题 / 别名；
+    overrides 是 {match_key(公司名): slug 或 None}，优先于索引。
+    """
+
+    def __init__(self, entries, min_score=0.6, overrides=None):
+        self.min_score = min_score
+        self.overrides = overrides or {}
+        self.slugs = set()
+        self.exact = {}
+        self.keys = []
+        self.grams = defaultdict(set)
+        for key, slug in entries:
+            self.slugs.add(slug)
+            if not key or key in self.exact:
+                continue
+            self.exact[key] = slug
+            i = len(self.keys)
+            self.keys.append((key, trigrams(key), slug))
+            for g in self.keys[i][1]:
+                self.grams[g].add(i)
+
+    @classmethod
+    def load(cls, icons_list=ICONS_LIST, repo_dir=SIMPLE_ICONS_DIR, **kwargs):
+        """从 all_icons.txt 和本地 simple-icons 目录（若有）建索引
+
+        本地 icons/ 可能只解出了需要的那部分（见 archive_ingest.py），所以和完整清单取并集。
+        """
+        entries = []
+        slugs = []
+        if Path(icons_list).is_file():
+            with open(icons_list, "r", encoding="utf-8") as f:
+                slugs = [line.strip() for line in f if line.strip()]
+        icons_dir = Path(repo_dir) / "icons"
+        if icons_dir.is_dir():
+            slugs += sorted(f[:-4] for f in os.listdir(icons_dir) if f.endswith(".svg"))
+        entries += [(s, s) for s in dict.fromkeys(slugs)]
+
+        for rel in DATA_FILES:
+            data_file = Path(repo_dir) / rel
+            if data_file.is_file():
+                entries += cls._data_entries(data_file)
+                break
+        return cls(entries, **kwargs)
+
+    @staticmethod
+    def _data_entries(path):
+        """标题和别名（aka / dup / loc）也当作 key"""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        icons = data["icons"] if isinstance(data, dict) else data
+        for icon in icons:
+            slug = icon.get("slug") or title_to_slug(icon["title"])
+            names = [icon["title"]]
+            aliases = icon.get("aliases") or {}
+            names += aliases.get("aka", [])
+            names += [d["title"] for d in aliases.get("dup", [])]
+            names += list(aliases.get("loc", {}).values())
+            for name in names:
+                yield compact(name), slug
+                yield match_key(name), slug
+
+    def _fuzzy(self, key):
+        """三元组 Jaccard 相似度，只和至少共享一个三元组的候选比"""
+        grams = trigrams(key)
+        hits = defaultdict(int)
+        for g in grams:
+            for i in self.grams.get(g, ()):
+                hits[i] += 1
+        best, best_score = None, 0.0
+        for i, shared in hits.items():
+            other, other_grams, slug = self.keys[i]
+            score = shared / (len(grams) + len(other_grams) - shared)
+            if score > best_score:
+                best, best_score = slug, score
+        return best, best_score
+
+    def resolve(self, name):
+        """公司名 -> (slug, 置信度)；找不到返回 (None, 0.0)"""
+        key = match_key(name)
+        if key in self.overrides:
+            slug = self.overrides[key]
+            return (slug, 1.0) if slug else (None, 0.0)
+        return self._resolve(name)
+
+    @lru_cache(maxsize=65536)
+    def _resolve(self, name):
+        # 中英文名、括号里的别名都试一遍，取置信度最高的
+        best = (None, 0.0)
+        for variant in variants(name):
+            hit = self._resolve_one(variant)
+            if hit[1] > best[1]:
+                best = hit
+            if best[1] >= 1.0:
+                break
+        return best
+
+    def _resolve_one(self, name):
+        full, core = compact(name), core_tokens(name)
+        # 1. 原样或去掉后缀后精确命中
+        for key in (full, "".join(core)):
+            if key in self.exact:
+                return self.exact[key], 1.0
+        # 2. 逐步去掉尾部的词：American Airlines Group -> americanairlines
+        for n in range(len(core) - 1, 0, -1):
+            key = "".join(core[:n])
+            if len(key) >= 4 and key in self.exact:
+                return self.exact[key], 0.8 + 0.1 * n / len(core)
+        # 3. 多词公司名的首字母缩写：Advanced Micro Devices -> amd
+        words = [w for w in core if w != "and"]
+        if len(words) >= 3:
+            key = "".join(w[0] for w in words)
+            if key in self.exact:
+                return self.exact[key], 0.7
+        # 4. 三元组模糊匹配
+        if core:
+            slug, score = self._fuzzy("".join(core))
+            if score >= self.min_score:
+                return slug, score
+        return None, 0.0
+
+    def resolve_many(self, names):
+        return {name: self.resolve(name) for name in names}
+
+    def __contains__(self, slug):
+        return slug in self.slugs
+
+
+@lru_cache(maxsize=1)
+def default_index():
+    """进程内共用的默认索引"""
+    return IconIndex.load()
+
+
+if __name__ == "__main__":
+    # python icon_index.py 名称文件 ... ：逐行解析，打印 名称 -> slug (置信度)
+    index = default_index()
+    names = []
+    for path in sys.argv[1:] or [HERE / "logo_names.txt"]:
+        with open(path, "r", encoding="utf-8") as f:
+            names += [line.strip() for line in f if line.strip()]
+    hits = 0
+    for name, (slug, score) in index.resolve_many(names).items():
+        hits += slug is not None
+        print(f"{name} -> {slug or '-'} ({score:.2f})")
+    print(f"\n命中: {hits}/{len(names)}")
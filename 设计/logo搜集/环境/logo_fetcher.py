@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+并发 Logo 抓取器
+共用一个带连接池的 requests.Session，按 host 限制并发和速率，
+同一公司的多个 URL 变体同时探测，第一个成功就取消其余的
+"""
+
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limit import RateLimiter
+
+
+def _close_response(future):
+    """没抢到第一的探测完成后关掉它的响应"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    response = future.result()
+    if response is not None:
+        response.close()
+
+
+class LogoFetcher:
+    """线程安全的抓取器，可以被多个下载线程共用"""
+
+    def __init__(self, max_workers=16, per_host=4, timeout=10, session=None, limiter=None, retries=2):
+        self.timeout = timeout
+        self.per_host = per_host
+        self.retries = retries
+        self.limiter = limiter or RateLimiter()
+        self.session = session or requests.Session()
+        # 连接池大小与并发数一致，避免 "Connection pool is full" 反复建连
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._probes = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="probe")
+        self._hosts = defaultdict(lambda: threading.BoundedSemaphore(self.per_host))
+        self._hosts_lock = threading.Lock()
+
+    def _host_slot(self, url):
+        with self._hosts_lock:
+            return self._hosts[urlsplit(url).netloc]
+
+    def get(self, url, cancelled=None, **kwargs):
+        """GET 一个 URL，受 per-host 并发和限速约束；cancelled 已置位则不再发请求，返回 None
+
+        429/503 按 Retry-After 等待后重试，最多 retries 次。
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire(url)
+            with self._host_slot(url):
+                if cancelled is not None and cancelled.is_set():
+                    return None
+                try:
+                    response = self.session.get(url, **kwargs)
+                except requests.RequestException as e:
+                    self.limiter.report(url, error=e)
+                    raise
+            self.limiter.report(url, response)
+            if response.status_code not in (429, 503) or attempt == self.retries:
+                return response
+            response.close()
+
+    def _probe(self, url, cancelled):
+        # stream=True：没抢到第一的探测不读响应体
+        response = self.get(url, cancelled=cancelled, stream=True)
+        if response is None:
+            return None
+        if response.status_code != 200:
+            response.close()
+            return None
+        return response
+
+    def first_success(self, urls):
+        """并发探测多个 URL，返回 (url, response)；全部失败返回 (None, None)
+
+        第一个成功就返回，不等还在路上的探测；它们的响应在完成时关掉。
+        返回的 response 是 stream 模式，调用方读完 content 即可。
+        """
+        urls = list(dict.fromkeys(urls))  # 去重但保持顺序
+        if not urls:
+            return None, None
+
+        cancelled = threading.Event()
+        futures = {self._probes.submit(self._probe, url, cancelled): url for url in urls}
+        errors = []
+        for future in as_completed(futures):
+            try:
+                response = future.result()
+            except requests.RequestException as e:
+                errors.append(e)
+                continue
+            if response is None:
+                continue
+            # 还没开始的探测直接取消，已在路上的完成后关掉响应，不读响应体
+            cancelled.set()
+            for other in futures:
+                if other is not future and not other.cancel():
+                    other.add_done_callback(_close_response)
+            return futures[future], response
+
+        if errors and len(errors) == len(urls):
+            raise errors[0]
+        return None, None
+
+    def close(self):
+        self._probes.shutdown(wait=True, cancel_futures=True)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
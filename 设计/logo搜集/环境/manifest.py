@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Logo 目录清单
+所有 logo 文件的路径、哈希、大小、修改时间、格式、是否合法、尺寸、国家、公司键记在 SQLite；
+按目录修改时间增量扫描（os.scandir），没变的目录不再列出，"jp 有多少合法 logo"之类的问题直接查库
+"""
+
+import hashlib
+import os
+import sys
+import time
+from pathlib import Path
+
+from names import match_key
+from storage import connect
+from validation import InvalidContent, StreamValidator
+
+HERE = Path(__file__).resolve().parent
+LOGOS_DIR = HERE.parent / "logos"
+MANIFEST_DB = LOGOS_DIR / ".manifest.db"
+# 默认扫描的目录；不存在的跳过
+ROOTS = [LOGOS_DIR / "by_country", LOGOS_DIR / "by_letter", HERE / "logo", HERE / "us",
+         HERE / "simple-icons" / "icons"]
+LOGO_SUFFIXES = (".svg", ".png")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path        TEXT PRIMARY KEY,
+    dir         TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    sha256      TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    mtime       REAL NOT NULL,
+    format      TEXT,
+    valid       INTEGER NOT NULL,
+    error       TEXT,
+    width       INTEGER,
+    height      INTEGER,
+    country     TEXT,
+    company_key TEXT
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+CREATE INDEX IF NOT EXISTS files_country ON files (country, valid);
+CREATE INDEX IF NOT EXISTS files_company ON files (company_key);
+CREATE INDEX IF NOT EXISTS files_sha ON files (sha256);
+CREATE TABLE IF NOT EXISTS dirs (
+    path   TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime  REAL NOT NULL
+);
+"""
+
+
+def country_of(path):
+    """logos/by_country/<cc>/... 里的国家代码"""
+    parts = Path(path).parts
+    if "by_country" in parts:
+        i = parts.index("by_country")
+        if i + 1 < len(parts) - 1:
+            return parts[i + 1]
+    return None
+
+
+def inspect(path):
+    """一次读文件同时算哈希和校验，返回 (sha256, 格式, 是否合法, 错误, 尺寸)"""
+    h = hashlib.sha256()
+    validator = StreamValidator()
+    error = None
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+            if error is None:
+                try:
+                    validator.feed(chunk)
+                except InvalidContent as e:
+                    error = str(e)
+    if error is None:
+        try:
+            validator.close()
+        except InvalidContent as e:
+            error = str(e)
+    fmt = validator.kind or Path(path).suffix.lower().lstrip(".")
+    return h.hexdigest(), fmt, error is None, error, validator.dimensions
+
+
+class Manifest:
+    """增量维护的 logo 清单"""
+
+    def __init__(self, path=MANIFEST_DB):
+        self.conn = connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def scan(self, roots=None):
+        """增量扫描，返回 {"dirs": 重新列出的目录数, "updated": 更新的文件数, "removed": 删除的记录数}"""
+        roots = [Path(r).resolve() for r in (roots or ROOTS) if Path(r).is_dir()]
+        dirs = {r["path"]: r["mtime"] for r in self.conn.execute("SELECT path, mtime FROM dirs")}
+        stats = {"dirs": 0, "updated": 0, "removed": 0}
+        with self.conn:
+            self.conn.execute("BEGIN")
+            stack = [(str(r), None) for r in roots]
+            while stack:
+                directory, parent = stack.pop()
+                try:
+                    mtime = os.stat(directory).st_mtime
+                except FileNotFoundError:
+                    continue
+                if dirs.get(directory) == mtime:
+                    # 目录项没增删改名：文件记录照旧，只需继续看子目录
+                    stack += [(r["path"], directory) for r in
+                              self.conn.execute("SELECT path FROM dirs WHERE parent = ?", (directory,))]
+                    continue
+                self._scan_dir(directory, parent, mtime, stack, stats)
+            # 已经不存在的目录连同文件记录一起删掉
+            for path in list(dirs):
+                if not os.path.isdir(path):
+                    self.conn.execute("DELETE FROM dirs WHERE path = ?", (path,))
+                    stats["removed"] += self.conn.execute("DELETE FROM files WHERE dir = ?", (path,)).rowcount
+        return stats
+
+    def _scan_dir(self, directory, parent, mtime, stack, stats):
+        stats["dirs"] += 1
+        known = {r["name"]: r for r in
+                 self.conn.execute("SELECT name, size, mtime FROM files WHERE dir = ?", (directory,))}
+        seen, subdirs = set(), []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name != "thumbs":
+                        subdirs.append(entry.path)
+                    continue
+                if not entry.name.lower().endswith(LOGO_SUFFIXES):
+                    continue
+                seen.add(entry.name)
+                st = entry.stat()
+                row = known.get(entry.name)
+                if row is not None and row["size"] == st.st_size and row["mtime"] == st.st_mtime:
+                    continue
+                sha, fmt, valid, error, dims = inspect(entry.path)
+                width, height = dims or (None, None)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (entry.path, directory, entry.name, sha, st.st_size, st.st_mtime, fmt, int(valid), error,
+                     width, height, country_of(entry.path), match_key(Path(entry.name).stem) or None))
+                stats["updated"] += 1
+        gone = [(directory, name) for name in known if name not in seen]
+        self.conn.executemany("DELETE FROM files WHERE dir = ? AND name = ?", gone)
+        stats["removed"] += len(gone)
+        self.conn.execute("DELETE FROM dirs WHERE parent = ? AND path NOT IN (%s)" % ",".join("?" * len(subdirs)),
+                          (directory, *subdirs))
+        self.conn.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)", (directory, parent, mtime))
+        stack += [(d, directory) for d in subdirs]
+
+    # ---- 查询 ----
+
+    def count(self, country=None, valid=True):
+        sql, args = "SELECT COUNT(*) FROM files WHERE valid = ?", [int(valid)]
+        if country is not None:
+            sql += " AND country = ?"
+            args.append(country)
+        return self.conn.execute(sql, args).fetchone()[0]
+
+    def by_country(self, valid=True):
+        """{国家代码: 文件数}"""
+        return {r[0]: r[1] for r in self.conn.execute(
+            "SELECT country, COUNT(*) FROM files WHERE valid = ? AND country IS NOT NULL GROUP BY country",
+            (int(valid),))}
+
+    def names(self, directory, valid=True):
+        """某个目录里的 {文件名去扩展名: 文件名}，代替 os.listdir"""
+        return {Path(r["name"]).stem: r["name"] for r in self.conn.execute(
+            "SELECT name FROM files WHERE dir = ? AND valid = ?", (str(Path(directory).resolve()), int(valid)))}
+
+    def has_company(self, name):
+        return self.conn.execute("SELECT 1 FROM files WHERE company_key = ? AND valid = 1 LIMIT 1",
+                                 (match_key(name),)).fetchone() is not None
+
+    def missing_companies(self, company_db, country=None):
+        """公司库里还没有任何合法 logo 的公司 [(国家, 公司名)]"""
+        if not Path(company_db).exists():
+            raise FileNotFoundError(f"公司库不存在: {company_db}（先运行 company_store.py ingest）")
+        self.conn.execute("ATTACH DATABASE ? AS c", (str(company_db),))
+        try:
+            sql = """SELECT country, name FROM c.companies
+                     WHERE norm_name NOT IN (SELECT company_key FROM files WHERE valid = 1 AND company_key IS NOT NULL)"""
+            args = []
+            if country is not None:
+                sql += " AND country = ?"
+                args.append(country)
+            return [tuple(r) for r in self.conn.execute(sql + " ORDER BY country, name", args)]
+        finally:
+            self.conn.execute("DETACH DATABASE c")
+
+    def duplicates(self):
+        """内容完全相同的文件组 [[路径, ...]]"""
+        rows = self.conn.execute(
+            """SELECT sha256, GROUP_CONCAT(path, char(10)) AS paths FROM files
+               GROUP BY sha256 HAVING COUNT(*) > 1""").fetchall()
+        return [r["paths"].split("\n") for r in rows]
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    # python manifest.py [目录 ...]：增量扫描后打印各国合法 logo 数
+    with Manifest() as manifest:
+        start = time.time()
+        stats = manifest.scan([Path(a) for a in sys.argv[1:]] or None)
+        print(f"扫描 {stats} ({time.time() - start:.2f}s)")
+        print(f"合法 {manifest.count()}，不合法 {manifest.count(valid=False)}")
+        for country, n in sorted(manifest.by_country().items()):
+            print(f"  {country}: {n}")
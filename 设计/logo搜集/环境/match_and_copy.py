@@ -1,5 +1,8 @@
 import os
-import shutil
+
+from blob_store import BlobStore
+from icon_index import LOGO_OVERRIDES, IconIndex
+from manifest import Manifest
 
 # 读取需要的 logo 列表
 with open('logo_names.txt', 'r') as f:
@@ -7,87 +10,24 @@ with open('logo_names.txt', 'r') as f:
 
 # 可用的 simple-icons
 icons_dir = 'simple-icons/icons'
-available = {f.replace('.svg', ''): f for f in os.listdir(icons_dir) if f.endswith('.svg')}
+with Manifest() as manifest:
+    manifest.scan([icons_dir])
+    available = manifest.names(icons_dir)
 
-# 匹配映射
-mappings = {
-    '3m': '3m',
-    'abbott-laboratories': 'abbott',
-    'abbvie': 'abbvie',
-    'accenture-plc': 'accenture',
-    'adobe': 'adobe',
-    'advanced-micro-devices': 'amd',
-    'alphabet': None,  # 需要特殊处理
-    'amazon.com': 'amazon',
-    'american-airlines-group': 'americanairlines',
-    'american-express': 'americanexpress',
-    'apple': 'apple',
-    'bank-of-america': 'bankofamerica',
-    'berkshire-hathaway': None,
-    'boeing': 'boeing',
-    'bristol-myers-squibb': 'bristolsquibb',
-    'caterpillar': 'caterpillar',
-    'chevron': 'chevron',
-    'cisco-systems': 'cisco',
-    'citigroup': 'citrix',  # 或者 citi
-    'coca-cola': 'cocacola',
-    'costco-wholesale': None,
-    'danaher': None,
-    'dell-technologies': 'dell',
-    'disney': 'disney',
-    'ebay': 'ebay',
-    'eli-lilly-and': 'lilly',
-    'exxon-mobil': None,
-    'facebook': 'facebook',
-    'fedex': 'fedex',
-    'ford-motor': None,
-    'general-electric': None,
-    'general-motors': None,
-    'goldman-sachs-group': 'goldmansachs',
-    'home-depot': 'homedepot',
-    'honeywell-international': 'honeywell',
-    'hp': 'hp',
-    'ibm': 'ibm',
-    'intel': 'intel',
-    'intuit': 'intuit',
-    'johnson-&-johnson': 'johnsonandjohnson',
-    'jpmorgan-chase-&': 'jpmorganchase',
-    'mastercard': 'mastercard',
-    "mcdonald's": 'mcdonalds',
-    'merck-&': 'merck',
-    'microsoft': 'microsoft',
-    'netflix': 'netflix',
-    'nike': 'nike',
-    'nvidia': 'nvidia',
-    'oracle': 'oracle',
-    'paypal-holdings': 'paypal',
-    'pepsico': 'pepsi',
-    'pfizer': 'pfizer',
-    'procter-&-gamble': 'procterandgamble',
-    'qualcomm': 'qualcomm',
-    'salesforce': 'salesforce',
-    'starbucks': 'starbucks',
-    'tesla': 'tesla',
-    'texas-instruments': 'texasinstruments',
-    'uber-technologies': 'uber',
-    'union-pacific': 'unionpacific',
-    'unitedhealth-group': 'unitedhealthgroup',
-    'ups': 'ups',
-    'verizon-communications': 'verizon',
-    'visa': 'visa',
-    'walmart': 'walmart',
-    'wells-fargo-&': 'wellsfargo',
-}
+# 名称 -> slug 由本地索引模糊匹配；索引推不出来的例外见 icon_index.LOGO_OVERRIDES
+index = IconIndex.load(repo_dir='simple-icons', overrides=LOGO_OVERRIDES)
 
 matched = 0
 not_found = []
+store = BlobStore()
 
 for name in needed:
-    simple_name = mappings.get(name)
+    simple_name, _ = index.resolve(name)
     if simple_name and simple_name in available:
         src = os.path.join(icons_dir, available[simple_name])
         dst = os.path.join('us', f'{name}.svg')
-        shutil.copy(src, dst)
+        # 存一份 blob，us/ 里只放硬链接，不再复制文件
+        store.link(store.put(src), dst)
         print(f"✓ {name} -> {available[simple_name]}")
         matched += 1
     else:
@@ -95,3 +35,4 @@ for name in needed:
 
 print(f"\n匹配成功: {matched}/{len(needed)}")
 print(f"未找到: {', '.join(not_found)}")
+store.close()
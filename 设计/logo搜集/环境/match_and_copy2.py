@@ -1,53 +1,35 @@
 import os
-import shutil
+
+from blob_store import BlobStore
+from icon_index import LOGO_OVERRIDES, IconIndex
+from manifest import Manifest
+
+# 补充匹配：只处理 us/ 里还缺的名称，已有的文件不覆盖
+with open('logo_names.txt', 'r') as f:
+    needed = [line.strip() for line in f if line.strip()]
 
 icons_dir = 'simple-icons/icons'
-available = {f.replace('.svg', ''): f for f in os.listdir(icons_dir) if f.endswith('.svg')}
+with Manifest() as manifest:
+    manifest.scan([icons_dir])
+    available = manifest.names(icons_dir)
 
-# 补充映射
-more_mappings = {
-    'adobe': 'adobe',
-    'amazon.com': 'amazon',
-    'alphabet': 'google',  # Alphabet 是 Google 母公司
-    'bristol-myers-squibb': 'bristolsquibb',
-    'chevron': 'chevron',
-    'disney': 'disney',
-    'eli-lilly-and': 'lilly',
-    'ford-motor': 'ford',
-    'general-electric': 'generalelectric',
-    'general-motors': 'generalmotors',
-    'home-depot': 'homedepot',
-    'honeywell-international': 'honeywell',
-    'ibm': 'ibm',
-    'johnson-&-johnson': 'jnj',  # 或 johnsonandjohnson
-    'jpmorgan-chase-&': 'jpmorganchase',
-    'microsoft': 'microsoft',
-    'oracle': 'oracle',
-    'pepsico': 'pepsi',
-    'pfizer': 'pfizer',
-    'procter-&-gamble': 'procterandgamble',
-    'salesforce': 'salesforce',
-    'texas-instruments': 'texasinstruments',
-    'union-pacific': 'unionpacific',
-    'unitedhealth-group': 'unitedhealthgroup',
-    'walmart': 'walmart',
-    # 检查这些是否可用
-    'berkshire-hathaway': None,
-    'costco-wholesale': None,
-    'danaher': None,
-    'exxon-mobil': None,
-}
+# 名称规范化和例外映射与 match_and_copy.py 共用，不再维护一份手写的 slug 表
+index = IconIndex.load(repo_dir='simple-icons', overrides=LOGO_OVERRIDES)
 
 matched = 0
-for name, simple_name in more_mappings.items():
+store = BlobStore()
+for name in needed:
+    dst = os.path.join('us', f'{name}.svg')
+    if os.path.exists(dst):
+        continue
+    simple_name, score = index.resolve(name)
     if simple_name and simple_name in available:
         src = os.path.join(icons_dir, available[simple_name])
-        dst = os.path.join('us', f'{name}.svg')
-        if not os.path.exists(dst):
-            shutil.copy(src, dst)
-            print(f"✓ {name} -> {available[simple_name]}")
-            matched += 1
+        store.link(store.put(src), dst)
+        print(f"✓ {name} -> {available[simple_name]} ({score:.2f})")
+        matched += 1
     else:
         print(f"✗ {name} -> {simple_name} (not found)")
 
 print(f"\n新增匹配: {matched}")
+store.close()
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+运行指标
+下载过程中的计数器（尝试 / 成功 / 按原因分的失败 / 字节数）、各源耗时直方图、在途请求和预计剩余时间；
+后台线程定时原子重写一份 JSON 状态文件，也可以在本机端口上按 Prometheus 文本格式提供 /metrics，
+不用再翻 download.log 就能看吞吐、发现卡住的源
+"""
+
+import json
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from storage import atomic_write
+
+HERE = Path(__file__).resolve().parent
+STATUS_FILE = HERE / "logo" / "status.json"
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STATUS_INTERVAL = 5.0   # 状态文件多久重写一次
+RATE_WINDOW = 300.0     # 吞吐按最近这么多秒算，ETA 跟着最近的速度走
+STALL_SECONDS = 30.0    # 有在途请求、却这么久没有一个完成，就算卡住
+
+# 名称 -> (类型, 说明)；输出 /metrics 时带上 HELP / TYPE
+METRICS = {
+    "logo_companies_attempted_total": ("counter", "开始处理的公司数"),
+    "logo_companies_succeeded_total": ("counter", "拿到 logo 的公司数"),
+    "logo_companies_failed_total": ("counter", "没拿到的公司数，按原因分"),
+    "logo_source_requests_total": ("counter", "各源的尝试次数，按结果分（hit / miss / error / cancelled）"),
+    "logo_source_bytes_total": ("counter", "各源下载的字节数"),
+    "logo_source_latency_seconds": ("histogram", "各源单次尝试的耗时（不含被取消的）"),
+    "logo_source_inflight": ("gauge", "各源在途的尝试数"),
+    "logo_source_last_completion_timestamp_seconds": ("gauge", "各源最近一次尝试结束的时间"),
+    "logo_queue_remaining": ("gauge", "截止时间前还能做的公司数"),
+    "logo_throughput_per_hour": ("gauge", "最近的处理速度（家/小时）"),
+    "logo_eta_seconds": ("gauge", "按最近速度做完剩余公司的预计秒数（不超过截止时间）"),
+    "logo_deadline_remaining_seconds": ("gauge", "离截止时间的秒数"),
+    "logo_uptime_seconds": ("gauge", "已运行秒数"),
+}
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """计数器 / 仪表 / 直方图的注册表；各下载线程直接调用，线程安全
+
+    status_file 不为 None 时后台线程每 interval 秒重写一次；serve(port) 在本机起 HTTP 端点。
+    """
+
+    def __init__(self, status_file=STATUS_FILE, interval=STATUS_INTERVAL, deadline=None):
+        self.status_file = status_file
+        self.interval = interval
+        self.deadline = deadline
+        self.started = time.time()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}   # (名称, 标签) -> [各桶计数..., 总和, 次数]
+        self._completions = deque()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server = None
+        self._writer = None
+        if status_file is not None:
+            self._writer = threading.Thread(target=self._write_loop, name="metrics-status", daemon=True)
+            self._writer.start()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, _labels(labels))] = value
+
+    def add(self, name, value, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [0] * len(LATENCY_BUCKETS) + [0.0, 0]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    hist[i] += 1
+            hist[-2] += value
+            hist[-1] += 1
+
+    # 下载流程里的几个埋点
+
+    def company_started(self):
+        self.inc("logo_companies_attempted_total")
+
+    def company_finished(self, success, reason=None):
+        if success:
+            self.inc("logo_companies_succeeded_total")
+        else:
+            self.inc("logo_companies_failed_total", reason=reason or "unknown")
+        with self._lock:
+            self._completions.append(time.time())
+
+    def source_started(self, source):
+        self.add("logo_source_inflight", 1, source=source)
+
+    def source_finished(self, source, outcome, latency=None, nbytes=0):
+        self.add("logo_source_inflight", -1, source=source)
+        self.set("logo_source_last_completion_timestamp_seconds", time.time(), source=source)
+        self.inc("logo_source_requests_total", source=source, outcome=outcome)
+        if nbytes:
+            self.inc("logo_source_bytes_total", nbytes, source=source)
+        if latency is not None:
+            self.observe("logo_source_latency_seconds", latency, source=source)
+
+    def _derived(self):
+        """按当前计数算吞吐、ETA、运行时长这些派生仪表"""
+        now = time.time()
+        with self._lock:
+            while self._completions and self._completions[0] < now - RATE_WINDOW:
+                self._completions.popleft()
+            recent = len(self._completions)
+            remaining = self._gauges.get(("logo_queue_remaining", ()))
+        window = min(RATE_WINDOW, max(now - self.started, 1.0))
+        rate = recent / window
+        derived = {"logo_uptime_seconds": now - self.started, "logo_throughput_per_hour": rate * 3600}
+        deadline_left = None
+        if self.deadline is not None:
+            deadline_left = max(self.deadline - now, 0.0)
+            derived["logo_deadline_remaining_seconds"] = deadline_left
+        if remaining is not None and rate > 0:
+            eta = remaining / rate
+            derived["logo_eta_seconds"] = eta if deadline_left is None else min(eta, deadline_left)
+        return derived
+
+    def prometheus(self):
+        """Prometheus 文本格式（0.0.4）"""
+        derived = self._derived()
+        with self._lock:
+            counters, gauges = dict(self._counters), dict(self._gauges)
+            histograms = {k: list(v) for k, v in self._histograms.items()}
+        gauges.update({(name, ()): value for name, value in derived.items()})
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            if kind == "histogram":
+                series = sorted((k, v) for k, v in histograms.items() if k[0] == name)
+            else:
+                source = counters if kind == "counter" else gauges
+                series = sorted((k, v) for k, v in source.items() if k[0] == name)
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (_, labels), value in series:
+                if kind != "histogram":
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+                for bound, count in zip(LATENCY_BUCKETS, value):
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {value[-1]}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value[-2])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {value[-1]}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _quantile(hist, q):
+        """从直方图估分位数（取所在桶的上界）；落在最后一个桶之外返回 None"""
+        target = q * hist[-1]
+        for bound, count in zip(LATENCY_BUCKETS, hist):
+            if count >= target:
+                return bound
+        return None
+
+    def status(self):
+        """给人看的 JSON 状态：总体进度、失败原因、各源情况（含是否卡住）"""
+        derived = self._derived()
+        now = time.time()
+        with self._lock:
+            counters, gauges = dict(self._counters), dict(self._gauges)
+            histograms = {k: list(v) for k, v in self._histograms.items()}
+        sources = {}
+
+        def entry(labels):
+            return sources.setdefault(dict(labels)["source"], {
+                "requests": {}, "bytes": 0, "inflight": 0, "latency_p50": None, "latency_p95": None,
+                "latency_avg": None, "last_completion_age": None, "stalled": False})
+
+        failed = {}
+        for (name, labels), value in counters.items():
+            if name == "logo_companies_failed_total":
+                failed[dict(labels)["reason"]] = value
+            elif name == "logo_source_requests_total":
+                entry(labels)["requests"][dict(labels)["outcome"]] = value
+            elif name == "logo_source_bytes_total":
+                entry(labels)["bytes"] = value
+        for (name, labels), value in gauges.items():
+            if name == "logo_source_inflight":
+                entry(labels)["inflight"] = value
+            elif name == "logo_source_last_completion_timestamp_seconds":
+                entry(labels)["last_completion_age"] = round(now - value, 1)
+        for (name, labels), hist in histograms.items():
+            if hist[-1]:
+                e = entry(labels)
+                e["latency_p50"], e["latency_p95"] = self._quantile(hist, 0.5), self._quantile(hist, 0.95)
+                e["latency_avg"] = round(hist[-2] / hist[-1], 3)
+        for e in sources.values():
+            # 有在途请求，但开跑以来或最近一次完成以来已经很久：这个源多半卡住了
+            age = e["last_completion_age"] if e["last_completion_age"] is not None else now - self.started
+            e["stalled"] = e["inflight"] > 0 and age >= STALL_SECONDS
+
+        eta = derived.get("logo_eta_seconds")
+        return {
+            "updated": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "uptime_seconds": round(derived["logo_uptime_seconds"], 1),
+            "attempted": counters.get(("logo_companies_attempted_total", ()), 0),
+            "succeeded": counters.get(("logo_companies_succeeded_total", ()), 0),
+            "failed": failed,
+            "bytes": sum(e["bytes"] for e in sources.values()),
+            "throughput_per_hour": round(derived["logo_throughput_per_hour"], 1),
+            "queue_remaining": gauges.get(("logo_queue_remaining", ())),
+            "eta_seconds": round(eta) if eta is not None else None,
+            "deadline_remaining_seconds": round(derived["logo_deadline_remaining_seconds"])
+            if "logo_deadline_remaining_seconds" in derived else None,
+            "stalled_sources": sorted(name for name, e in sources.items() if e["stalled"]),
+            "sources": sources,
+        }
+
+    def write_status(self):
+        atomic_write(self.status_file, json.dumps(self.status(), ensure_ascii=False, indent=2))
+
+    def _write_loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write_status()
+            except OSError:
+                pass  # 磁盘一时写不了不影响下载，下一轮再写
+
+    def serve(self, port, host="127.0.0.1"):
+        """在本机起 HTTP 端点：/metrics 是 Prometheus 文本，/status 是 JSON；返回实际端口（port=0 时随机）"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] == "/metrics":
+                    body, ctype = metrics.prometheus(), "text/plain; version=0.0.4; charset=utf-8"
+                elif self.path.split("?")[0] in ("/", "/status"):
+                    body, ctype = json.dumps(metrics.status(), ensure_ascii=False), "application/json; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass  # 不往控制台刷访问日志
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        return self._server.server_address[1]
+
+    def close(self):
+        """停掉后台线程和 HTTP 端点，最后写一次状态文件"""
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join()
+            self.write_status()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    # python metrics.py [状态文件]：打印下载器最近写出的状态
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else STATUS_FILE
+    status = json.loads(path.read_text(encoding="utf-8"))
+    print(f"{status['updated']}  已运行 {status['uptime_seconds'] / 60:.1f} 分钟  "
+          f"成功 {status['succeeded']}/{status['attempted']}  {status['throughput_per_hour']}/h  "
+          f"剩余 {status['queue_remaining']}  ETA {status['eta_seconds']}s")
+    if status["failed"]:
+        print(f"  失败: {status['failed']}")
+    for name, s in status["sources"].items():
+        flag = "  ⚠ 卡住" if s["stalled"] else ""
+        print(f"  {name}: {s['requests']} {s['bytes']} 字节 在途 {s['inflight']} "
+              f"p50 {s['latency_p50']}s p95 {s['latency_p95']}s{flag}")
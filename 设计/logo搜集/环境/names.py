@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+公司名规范化
+下载器、simple-icons 索引、match_and_copy、download_logo.sh 共用同一套规则：
+各国公司后缀、&/and、标点、重音字母转写，中日公司名取括号里的英文别名或查小词典；
+结果用 lru_cache 缓存，上万个名字反复查也只算一次
+"""
+
+import re
+import sys
+import unicodedata
+from functools import lru_cache
+
+# 各语言的公司法律形式/常见后缀（规范化之后的形式，点号已去掉）
+LEGAL_SUFFIXES = [
+    # 英语
+    "inc", "incorporated", "corp", "corporation", "co", "company", "companies", "ltd", "limited",
+    "llc", "llp", "lp", "plc", "pte", "pty", "group", "holdings", "holding",
+    # 德语 / 奥地利 / 瑞士
+    "ag", "gmbh", "kgaa", "kg", "se", "konzern",
+    # 法语 / 西语 / 葡语 / 意大利语
+    "sa", "sas", "sarl", "sca", "spa", "srl", "sl", "ltda", "groupe", "gruppo", "grupo",
+    # 荷兰 / 北欧
+    "nv", "bv", "ab", "publ", "asa", "as", "a s", "oyj", "oy",
+    # 日本 / 韩国
+    "kk", "kabushiki kaisha",
+]
+# 不是法律形式、但放在结尾时不区分品牌的词；只在匹配用的 core_tokens 里去掉
+GENERIC_SUFFIXES = ["international", "technologies", "technology", "systems", "com", "and"]
+
+# 中日文公司名后缀
+CJK_SUFFIXES = ["股份有限公司", "有限责任公司", "有限公司", "株式会社", "控股集团", "集团", "控股", "股份", "公司"]
+
+# 常见中日文公司名 -> 英文品牌名（括号里没有英文别名时用）
+CJK_NAMES = {
+    "腾讯": "Tencent", "阿里巴巴": "Alibaba", "百度": "Baidu", "京东": "JD", "网易": "NetEase",
+    "美团": "Meituan", "小米": "Xiaomi", "拼多多": "Pinduoduo", "快手": "Kuaishou", "华为": "Huawei",
+    "字节跳动": "ByteDance", "比亚迪": "BYD", "联想": "Lenovo", "中兴通讯": "ZTE", "海尔": "Haier",
+    "蔚来": "NIO", "小鹏汽车": "XPeng", "理想汽车": "Li Auto", "哔哩哔哩": "Bilibili", "李宁": "Li Ning",
+    "安踏": "Anta", "大疆": "DJI", "滴滴出行": "DiDi", "携程": "Trip.com", "蚂蚁": "Ant Group",
+    "中国移动": "China Mobile", "中国联通": "China Unicom", "中国电信": "China Telecom",
+    "中国银行": "Bank of China", "中国工商银行": "ICBC", "中国建设银行": "China Construction Bank",
+    "中国平安": "Ping An", "中国石油": "PetroChina", "中国石化": "Sinopec", "贵州茅台": "Moutai",
+    "丰田汽车": "Toyota", "丰田": "Toyota", "本田汽车": "Honda", "本田": "Honda", "日产汽车": "Nissan",
+    "索尼": "Sony", "松下": "Panasonic", "东芝": "Toshiba", "日立": "Hitachi", "任天堂": "Nintendo",
+    "佳能": "Canon", "尼康": "Nikon", "富士通": "Fujitsu", "夏普": "Sharp", "软银": "SoftBank",
+    "优衣库": "Uniqlo", "迅销": "Fast Retailing", "雅马哈": "Yamaha", "铃木": "Suzuki", "马自达": "Mazda",
+    "斯巴鲁": "Subaru", "三菱": "Mitsubishi", "资生堂": "Shiseido", "万代南梦宫": "Bandai Namco",
+    "大众": "Volkswagen", "宝马": "BMW", "奔驰": "Mercedes-Benz", "西门子": "Siemens", "阿迪达斯": "Adidas",
+    "彪马": "Puma", "壳牌": "Shell", "汇丰": "HSBC", "联合利华": "Unilever", "家乐福": "Carrefour",
+    "米其林": "Michelin", "雷诺": "Renault", "空客": "Airbus", "香奈儿": "Chanel", "爱马仕": "Hermes",
+    "欧莱雅": "L'Oreal", "法拉利": "Ferrari", "古驰": "Gucci", "普拉达": "Prada", "杜嘉班纳": "Dolce & Gabbana",
+}
+
+# 转写：NFKD 拆不掉的字母
+_TRANSLIT = str.maketrans({"ß": "ss", "æ": "ae", "œ": "oe", "ø": "o", "đ": "d", "ł": "l", "ı": "i", "þ": "th"})
+
+_DOTTED = re.compile(r"(?<=\b[a-z])\.(?=[a-z]\b)")   # s.p.a. / n.v. / k.k. -> spa / nv / kk
+_APOSTROPHE = re.compile(r"[’'`]")
+_AMPERSAND = re.compile(r"\s*&\s*")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_PAREN = re.compile(r"\s*[（(]([^()（）]*)[)）]\s*")
+_HAS_CJK = re.compile(r"[぀-ヿ㐀-鿿]")
+
+
+def _suffix_pattern(words):
+    alts = "|".join(sorted((re.escape(w) for w in words), key=len, reverse=True))
+    return re.compile(rf"(?:\s+(?:{alts}))+$")
+
+
+_LEGAL_TAIL = _suffix_pattern(LEGAL_SUFFIXES)
+_CORE_TAIL = _suffix_pattern(LEGAL_SUFFIXES + GENERIC_SUFFIXES)
+_LEADING_THE = re.compile(r"^the\s+")
+_CJK_TAIL = re.compile(f"(?:{'|'.join(CJK_SUFFIXES)})+$")
+
+
+def is_cjk(name):
+    return bool(_HAS_CJK.search(name))
+
+
+@lru_cache(maxsize=65536)
+def variants(name):
+    """同一公司的候选写法（原样优先），供匹配时逐个尝试
+
+    "Alphabet Inc. (Google)" -> ("Alphabet Inc.", "Google")
+    "中国石油 (CNPC)"        -> ("PetroChina", "CNPC")
+    """
+    outside = _PAREN.sub(" ", name).strip()
+    inside = [m.strip() for m in _PAREN.findall(name) if m.strip()]
+    result = []
+    for part in [outside] + inside:
+        if not part:
+            continue
+        if is_cjk(part):
+            part = CJK_NAMES.get(part) or CJK_NAMES.get(_CJK_TAIL.sub("", part))
+        if part and part not in result:
+            result.append(part)
+    return tuple(result)
+
+
+@lru_cache(maxsize=65536)
+def normalize(name):
+    """ASCII 小写、& 变 and、标点变空格、去掉结尾的法律形式
+
+    "Procter & Gamble Co." -> "procter and gamble"；中日文名用 variants() 里的首选写法。
+    """
+    candidates = variants(name)
+    name = candidates[0] if candidates else ""
+    name = unicodedata.normalize("NFKD", name.lower().translate(_TRANSLIT))
+    name = "".join(ch for ch in name if not unicodedata.combining(ch))
+    name = _APOSTROPHE.sub("", name)
+    name = _DOTTED.sub("", name)
+    name = _AMPERSAND.sub(" and ", name)
+    name = _NON_WORD.sub(" ", name).strip()
+    name = _LEADING_THE.sub("", name)
+    return _LEGAL_TAIL.sub("", name) or name
+
+
+@lru_cache(maxsize=65536)
+def core_tokens(name):
+    """匹配用的核心词：再去掉结尾的通用词（international、technologies、截断留下的 and 等）"""
+    norm = normalize(name)
+    return tuple((_CORE_TAIL.sub("", norm) or norm).split())
+
+
+def compact(name):
+    """去掉所有空格的紧凑写法：Home Depot, Inc. -> homedepot"""
+    return "".join(normalize(name).split())
+
+
+def match_key(name):
+    """跨工具统一的匹配键：Eli Lilly and Company、eli-lilly-and 都是 elililly"""
+    return "".join(core_tokens(name))
+
+
+def slugify(name, sep="-"):
+    """文件名用的 slug：Home Depot, Inc. -> home-depot"""
+    return sep.join(normalize(name).split())
+
+
+if __name__ == "__main__":
+    # 给 shell 脚本用：python names.py "公司名" -> 输出 slug
+    for arg in sys.argv[1:]:
+        print(slugify(arg))
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+未命中缓存
+记下 (数据源, URL) -> 404 / 内容不合法，按源设定有效期；有效期内再遇到直接跳过不发请求，
+某个源更新了（比如 simple-icons 发了新版本）可以只清掉这个源的记录
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+from storage import connect
+
+HERE = Path(__file__).resolve().parent
+CACHE_DB = HERE / "logo" / "download_state.db"
+
+DEFAULT_TTL = 7 * 24 * 3600
+# 各源的有效期（秒）：simple-icons 大约每周发版；worldvectorlogo 很少加新图；Clearbit 偶发 404，早点重试
+SOURCE_TTL = {
+    "simple-icons": 7 * 24 * 3600,
+    "worldvectorlogo": 30 * 24 * 3600,
+    "clearbit": 3 * 24 * 3600,
+}
+# 只缓存确定的"没有"；5xx、超时之类的临时错误不记
+NEGATIVE_STATUS = {404, 410}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS negative_cache (
+    source  TEXT NOT NULL,
+    key     TEXT NOT NULL,        -- 请求的 URL
+    status  TEXT NOT NULL,        -- 404 / 410 / invalid
+    checked REAL NOT NULL,
+    expires REAL NOT NULL,
+    PRIMARY KEY (source, key)
+);
+CREATE INDEX IF NOT EXISTS negative_cache_expires ON negative_cache (expires);
+"""
+
+
+class NegativeCache:
+    """持久化的未命中缓存；查询走内存，新记录攒一批再写库。线程安全
+
+    和 SourceStats 一样由多个下载线程调用，写库时临时开连接。
+    """
+
+    def __init__(self, path=CACHE_DB, ttl=None, flush_interval=10.0):
+        self.path = path
+        self.ttl = {**SOURCE_TTL, **(ttl or {})}
+        self.flush_interval = flush_interval
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last_flush = time.monotonic()
+        conn = connect(path)
+        try:
+            conn.executescript(SCHEMA)
+            self._entries = {(r["source"], r["key"]): r["expires"] for r in conn.execute(
+                "SELECT source, key, expires FROM negative_cache WHERE expires > ?", (time.time(),))}
+        finally:
+            conn.close()
+
+    def ttl_for(self, source):
+        return self.ttl.get(source, DEFAULT_TTL)
+
+    def is_dead(self, source, key, count=True):
+        """有效期内确认过没有；count 为假时只是查询（比如调度器估算），不计入跳过次数"""
+        expires = self._entries.get((source, key))
+        if expires is None or expires <= time.time():
+            return False
+        if not count:
+            return True
+        with self._lock:
+            self.skipped += 1
+        return True
+
+    def add(self, source, key, status):
+        now = time.time()
+        expires = now + self.ttl_for(source)
+        with self._lock:
+            self._entries[(source, key)] = expires
+            self._pending[(source, key)] = (source, key, str(status), now, expires)
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _write(self, sql, args=(), many=False):
+        """临时开连接写一次，返回影响的行数"""
+        conn = connect(self.path)
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                return (conn.executemany if many else conn.execute)(sql, args).rowcount
+        finally:
+            conn.close()
+
+    def forget(self, source, key):
+        with self._lock:
+            self._entries.pop((source, key), None)
+            self._pending.pop((source, key), None)
+        self._write("DELETE FROM negative_cache WHERE source = ? AND key = ?", (source, key))
+
+    def invalidate(self, source):
+        """清掉某个源的全部记录，返回删除的条数"""
+        with self._lock:
+            for k in [k for k in self._entries if k[0] == source]:
+                del self._entries[k]
+            for k in [k for k in self._pending if k[0] == source]:
+                del self._pending[k]
+        return self._write("DELETE FROM negative_cache WHERE source = ?", (source,))
+
+    def purge(self):
+        """删除过期记录，返回删除的条数"""
+        now = time.time()
+        with self._lock:
+            for k in [k for k, expires in self._entries.items() if expires <= now]:
+                del self._entries[k]
+        return self._write("DELETE FROM negative_cache WHERE expires <= ?", (now,))
+
+    def stats(self):
+        """{源: 有效记录数}"""
+        now = time.time()
+        counts = {}
+        for (source, _), expires in list(self._entries.items()):
+            if expires > now:
+                counts[source] = counts.get(source, 0) + 1
+        return counts
+
+    def flush(self):
+        with self._lock:
+            rows = list(self._pending.values())
+            self._pending.clear()
+            self._last_flush = time.monotonic()
+        if rows:
+            self._write("INSERT OR REPLACE INTO negative_cache VALUES (?, ?, ?, ?, ?)", rows, many=True)
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    # python negative_cache.py [stats | purge | invalidate <源>]
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    with NegativeCache() as cache:
+        if command == "purge":
+            print(f"删除 {cache.purge()} 条过期记录")
+        elif command == "invalidate":
+            print(f"清掉 {sys.argv[2]} 的 {cache.invalidate(sys.argv[2])} 条记录")
+        print(cache.stats())
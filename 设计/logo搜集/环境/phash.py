@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+感知哈希查重
+每个 logo 缩成小灰度图算 dHash / pHash（结果按文件大小和修改时间缓存），
+用 BK 树按汉明距离找近似重复，同一品牌只保留一份最好的（SVG 优先，其次分辨率高的）
+"""
+
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+from names import match_key
+from storage import atomic_write, connect
+from thumbnailer import _rasterize_svg, logo_dirs, svg_backend, thumb_path
+
+HERE = Path(__file__).resolve().parent
+LOGOS_DIR = HERE.parent / "logos"
+CACHE_DB = LOGOS_DIR / ".phash.db"
+REPORT_FILE = LOGOS_DIR / "duplicates.json"
+
+HASH_SIZE = 8      # dHash 8x8 = 64 位；pHash 去掉直流分量后 63 位
+DCT_SIZE = 32      # pHash 先缩到 32x32 再取低频 8x8
+MAX_DISTANCE = 8   # pHash 汉明距离不超过这个算近似重复
+MAX_DHASH_DISTANCE = 12  # 再用 dHash 复核一遍，减少形状相近的不同 logo 被误并
+MIN_STDDEV = 4.0   # 几乎纯色的图哈希没有意义，不参与查重
+SOURCES = (".svg", ".png")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    path   TEXT PRIMARY KEY,
+    size   INTEGER NOT NULL,
+    mtime  REAL NOT NULL,
+    dhash  TEXT,      -- 16 位十六进制；纯色图或无法栅格化时为 NULL
+    phash  TEXT,
+    width  INTEGER,
+    height INTEGER,
+    error  TEXT
+);
+"""
+
+# DCT-II 的余弦表，只算低频的 HASH_SIZE 行
+_COS = [[math.cos(math.pi * (2 * x + 1) * u / (2 * DCT_SIZE)) for x in range(DCT_SIZE)]
+        for u in range(HASH_SIZE)]
+
+
+def brand_of(path):
+    """文件名对应的品牌键：google.svg 和 google_clearbit.png 是同一个品牌"""
+    return match_key(Path(path).stem.removesuffix("_clearbit")) or Path(path).stem
+
+
+def load_image(path):
+    """栅格化成 PIL 图：PNG 直接读；SVG 优先用现成缩略图，没有再现场栅格化"""
+    path = Path(path)
+    if path.suffix.lower() == ".png":
+        return Image.open(path)
+    thumb = thumb_path(path, 200)
+    if thumb.exists() and thumb.stat().st_mtime >= path.stat().st_mtime:
+        return Image.open(thumb)
+    if svg_backend() is None:
+        raise RuntimeError("没有缩略图，也没有 cairosvg / rsvg-convert")
+    return _rasterize_svg(path, 64)
+
+
+def _gray(img, size):
+    """透明背景铺白再转灰度，透明底的 logo 和白底 PNG 才能对上"""
+    img = img.convert("RGBA")
+    canvas = Image.new("RGBA", img.size, (255, 255, 255, 255))
+    canvas.alpha_composite(img)
+    return list(canvas.convert("L").resize(size, Image.LANCZOS).getdata())
+
+
+def dhash(img):
+    """横向梯度哈希：9x8 灰度图，每个像素和右边邻居比亮暗"""
+    pixels = _gray(img, (HASH_SIZE + 1, HASH_SIZE))
+    bits = 0
+    for row in range(HASH_SIZE):
+        for col in range(HASH_SIZE):
+            i = row * (HASH_SIZE + 1) + col
+            bits = bits << 1 | (pixels[i] > pixels[i + 1])
+    return bits
+
+
+def phash(img):
+    """DCT 哈希：32x32 灰度图做二维 DCT，取左上 8x8 低频系数（去掉直流分量）和中位数比
+
+    返回 (哈希, 灰度标准差)；可分离 DCT 只算需要的低频行列，纯 Python 也够快。
+    """
+    pixels = _gray(img, (DCT_SIZE, DCT_SIZE))
+    mean = sum(pixels) / len(pixels)
+    stddev = math.sqrt(sum((p - mean) ** 2 for p in pixels) / len(pixels))
+    rows = [pixels[r * DCT_SIZE:(r + 1) * DCT_SIZE] for r in range(DCT_SIZE)]
+    # 先对每行做 DCT（只要低频 HASH_SIZE 个），再对列做
+    row_dct = [[sum(c * p for c, p in zip(_COS[u], row)) for u in range(HASH_SIZE)] for row in rows]
+    coeffs = [sum(_COS[v][y] * row_dct[y][u] for y in range(DCT_SIZE))
+              for v in range(HASH_SIZE) for u in range(HASH_SIZE)]
+    ac = coeffs[1:]
+    median = sorted(ac)[len(ac) // 2]
+    bits = 0
+    for c in ac:
+        bits = bits << 1 | (c > median)
+    return bits, stddev
+
+
+def hash_file(path):
+    """子进程里跑：返回 (path, dhash, phash, 宽, 高, 错误)"""
+    try:
+        with load_image(path) as img:
+            d = dhash(img)
+            p, stddev = phash(img)
+            width, height = img.size
+        if stddev < MIN_STDDEV:
+            return str(path), None, None, width, height, "纯色图"
+        return str(path), f"{d:016x}", f"{p:016x}", width, height, None
+    except Exception as e:
+        return str(path), None, None, None, None, f"{type(e).__name__}: {e}"
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """按汉明距离建的 BK 树；radius 小的时候查询只走很少几个分支"""
+
+    def __init__(self):
+        self.root = None  # [值, 附带数据, {距离: 子节点}]
+
+    def add(self, value, item):
+        if self.root is None:
+            self.root = [value, item, {}]
+            return
+        node = self.root
+        while True:
+            d = hamming(value, node[0])
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [value, item, {}]
+                return
+            node = child
+
+    def search(self, value, radius):
+        """返回 [(距离, 附带数据)]"""
+        found, stack = [], [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            d = hamming(value, node[0])
+            if d <= radius:
+                found.append((d, node[1]))
+            stack += [child for k, child in node[2].items() if d - radius <= k <= d + radius]
+        return found
+
+
+def quality(row):
+    """同组里谁更好：SVG > PNG，然后像素多的、文件大的"""
+    is_svg = row["path"].lower().endswith(".svg")
+    return is_svg, (row["width"] or 0) * (row["height"] or 0), row["size"]
+
+
+class DuplicateFinder:
+    """哈希缓存 + 近似重复分组"""
+
+    def __init__(self, cache_db=CACHE_DB, workers=None):
+        self.workers = workers or os.cpu_count()
+        self.conn = connect(cache_db)
+        self.conn.executescript(SCHEMA)
+
+    def update(self, directories):
+        """给新文件和改过的文件算哈希，删掉已不存在的记录，返回 (计算数, 失败数)"""
+        cached = {r["path"]: (r["size"], r["mtime"]) for r in self.conn.execute("SELECT path, size, mtime FROM hashes")}
+        seen, todo = set(), {}
+        for directory in directories:
+            for entry in os.scandir(directory):
+                if not entry.is_file() or not entry.name.lower().endswith(SOURCES):
+                    continue
+                st = entry.stat()
+                seen.add(entry.path)
+                if cached.get(entry.path) != (st.st_size, st.st_mtime):
+                    todo[entry.path] = st
+        failed = 0
+        with self.conn:
+            self.conn.execute("BEGIN")
+            if todo:
+                with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                    for path, d, p, width, height, error in pool.map(hash_file, todo, chunksize=32):
+                        st = todo[path]
+                        failed += d is None
+                        self.conn.execute("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                          (path, st.st_size, st.st_mtime, d, p, width, height, error))
+            scanned = {str(Path(d)) for d in directories}
+            stale = [(path,) for path in cached if path not in seen and str(Path(path).parent) in scanned]
+            self.conn.executemany("DELETE FROM hashes WHERE path = ?", stale)
+        return len(todo), failed
+
+    def clusters(self, max_distance=MAX_DISTANCE, max_dhash=MAX_DHASH_DISTANCE):
+        """近似重复分组 [[row, ...]]，每组按 quality 从好到差排；只返回两个以上的组"""
+        rows = self.conn.execute("SELECT * FROM hashes WHERE phash IS NOT NULL").fetchall()
+        tree = BKTree()
+        parent = list(range(len(rows)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, row in enumerate(rows):
+            p, d = int(row["phash"], 16), int(row["dhash"], 16)
+            for _, j in tree.search(p, max_distance):
+                if hamming(d, int(rows[j]["dhash"], 16)) <= max_dhash:
+                    parent[find(i)] = find(j)
+            tree.add(p, i)
+
+        groups = {}
+        for i in range(len(rows)):
+            groups.setdefault(find(i), []).append(rows[i])
+        return [sorted(g, key=quality, reverse=True) for g in groups.values() if len(g) > 1]
+
+    def report(self, path=REPORT_FILE, **kwargs):
+        """写 duplicates.json：组内每个目录里的每个品牌保留最好的一份，同目录同品牌的其余文件列为可删除；
+        返回组列表
+
+        by_country / by_letter 各目录里的同一个 logo 是有意放的副本，不算重复；
+        不同品牌长得像（比如 Google 文档 / 表格）只一起列出，不互相删。
+        """
+        groups = []
+        for group in self.clusters(**kwargs):
+            keep, duplicates = {}, []
+            for row in group:
+                key = (str(Path(row["path"]).parent), brand_of(row["path"]))
+                if key in keep:
+                    duplicates.append(row["path"])
+                else:
+                    keep[key] = row["path"]
+            brands = sorted({brand for _, brand in keep})
+            if not duplicates and len(brands) < 2:
+                continue  # 只是同一个 logo 在不同目录里的副本
+            groups.append({"brands": brands, "keep": list(keep.values()), "duplicates": duplicates})
+        atomic_write(path, json.dumps(groups, ensure_ascii=False, indent=2))
+        return groups
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    # python phash.py [目录 ...]；默认扫描 logos/ 下所有分类目录，结果写 logos/duplicates.json
+    dirs = [Path(a) for a in sys.argv[1:]] or logo_dirs()
+    start = time.time()
+    with DuplicateFinder() as finder:
+        computed, failed = finder.update(dirs)
+        groups = finder.report()
+    print(f"计算 {computed} 个哈希（{failed} 个跳过），{len(groups)} 组近似重复 ({time.time() - start:.1f}s)")
+    for group in groups[:20]:
+        print(f"  保留 {', '.join(group['keep'])}")
+        for dup in group["duplicates"]:
+            print(f"    - {dup}")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+按 host 的令牌桶限速，带自适应退避
+429/503 遵守 Retry-After，连续出错指数退避，响应健康时逐步提速
+"""
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+# host -> (初始速率 次/秒, 最高速率)；各源限额不同，没列出的用 DEFAULT
+SOURCE_LIMITS = {
+    "raw.githubusercontent.com": (10.0, 40.0),
+    "api.github.com": (0.5, 1.0),  # 未认证 60 次/小时
+    "worldvectorlogo.com": (2.0, 5.0),
+    "logo.clearbit.com": (5.0, 20.0),
+}
+DEFAULT_LIMIT = (2.0, 10.0)
+
+MIN_RATE = 0.1
+MAX_BACKOFF = 300.0
+
+
+def parse_retry_after(value):
+    """Retry-After 可能是秒数或 HTTP 日期，返回秒数；解析不了返回 None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveBucket:
+    """单个 host 的令牌桶
+
+    加性提速、乘性降速（AIMD）：成功一次速率 +step，被限流/出错速率减半。
+    """
+
+    def __init__(self, rate, max_rate, burst=None, step=None):
+        self.rate = rate
+        self.max_rate = max_rate
+        self.burst = burst or max(1.0, rate)
+        self.step = step or max_rate / 50
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """阻塞直到拿到一个令牌"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def success(self):
+        with self.lock:
+            self.errors = 0
+            self.rate = min(self.max_rate, self.rate + self.step)
+            self.burst = max(1.0, self.rate)
+
+    def throttled(self, retry_after=None):
+        """被限流（429/503）"""
+        with self.lock:
+            self.errors += 1
+            self.rate = max(MIN_RATE, self.rate / 2)
+            delay = retry_after if retry_after is not None else min(MAX_BACKOFF, 2 ** self.errors)
+            self._block(delay)
+
+    def failed(self):
+        """连接错误或 5xx：指数退避"""
+        with self.lock:
+            self.errors += 1
+            self.rate = max(MIN_RATE, self.rate / 2)
+            self._block(min(MAX_BACKOFF, 0.5 * 2 ** self.errors))
+
+    def _block(self, delay):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+        self.tokens = 0
+
+
+class RateLimiter:
+    """每个 host 一个 AdaptiveBucket"""
+
+    def __init__(self, limits=None, default=DEFAULT_LIMIT):
+        self.limits = dict(SOURCE_LIMITS if limits is None else limits)
+        self.default = default
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url):
+        host = urlsplit(url).hostname or ""
+        with self.lock:
+            if host not in self.buckets:
+                rate, max_rate = self.limits.get(host, self.default)
+                self.buckets[host] = AdaptiveBucket(rate, max_rate)
+            return self.buckets[host]
+
+    def acquire(self, url):
+        self.bucket(url).acquire()
+
+    def report(self, url, response=None, error=None):
+        """请求结束后回报结果；404 说明服务正常，也算健康"""
+        bucket = self.bucket(url)
+        if error is not None or response is None:
+            bucket.failed()
+        elif response.status_code in (429, 503):
+            bucket.throttled(parse_retry_after(response.headers.get("Retry-After")))
+        elif response.status_code >= 500:
+            bucket.failed()
+        else:
+            bucket.success()
+
+    def snapshot(self):
+        """当前各 host 速率，便于日志观察"""
+        with self.lock:
+            return {host: round(b.rate, 2) for host, b in self.buckets.items()}
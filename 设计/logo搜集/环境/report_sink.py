@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+缓冲式记录输出
+日志行和 logo_records.md 表格行先攒在内存，按条数/时间间隔或退出时一次追加写入，
+不再每条消息开关一次文件；汇报_*.md 从状态库和公司库按需重新生成
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from storage import atomic_write, connect
+
+HERE = Path(__file__).resolve().parent
+REPORTS_DIR = HERE.parent / "reports"
+LOGOS_DIR = HERE.parent / "logos"
+
+
+class ReportSink:
+    """download.log + logo_records.md 的缓冲写入；线程安全
+
+    后台线程每 flush_interval 秒落一次盘，没有新消息时攒着的几行也不会一直留在内存里。
+    """
+
+    def __init__(self, log_path, record_path, flush_interval=2.0, max_buffer=200, echo=True):
+        self.log_path = Path(log_path)
+        self.record_path = Path(record_path)
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.echo = echo
+        self._buffers = {self.log_path: [], self.record_path: []}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._closed = threading.Event()
+        self._timer = threading.Thread(target=self._flush_periodically, name="report-sink", daemon=True)
+        self._timer.start()
+
+    def init_records(self, header):
+        """记录文件不存在时写表头（header 为多行字符串）"""
+        if not self.record_path.exists():
+            self.record_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.record_path, "w", encoding="utf-8") as f:
+                f.write(header)
+
+    def log(self, message):
+        """打印并记日志；控制台立即输出，文件批量写"""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        line = f"[{timestamp}] {message}"
+        if self.echo:
+            print(line)
+        self._append(self.log_path, line)
+
+    def record(self, index, company, filename, source, status):
+        """logo_records.md 追加一行"""
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        self._append(self.record_path, f"| {index} | {company} | {filename} | {source} | {timestamp} | {status} |")
+
+    def _append(self, path, line):
+        with self._lock:
+            self._buffers[path].append(line)
+            due = sum(len(b) for b in self._buffers.values()) >= self.max_buffer or \
+                time.monotonic() - self._last_flush >= self.flush_interval
+            if due:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+    def _flush_locked(self):
+        for path, lines in self._buffers.items():
+            if not lines:
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            lines.clear()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self._closed.set()
+        self._timer.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _count_files(directory, suffixes=(".svg", ".png")):
+    """统计目录下（不含 thumbs/）的 logo 文件数"""
+    total = 0
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if d != "thumbs"]
+        total += sum(1 for f in files if f.endswith(suffixes))
+    return total
+
+
+def _query(db_path, sql):
+    if not Path(db_path).exists():
+        return []
+    conn = connect(db_path)
+    try:
+        return conn.execute(sql).fetchall()
+    except sqlite3.Error:  # 旧库还没有这张表
+        return []
+    finally:
+        conn.close()
+
+
+def write_summary(state_db=HERE / "logo" / "download_state.db", company_db=HERE / "logo" / "companies.db",
+                  logos_dir=LOGOS_DIR, reports_dir=REPORTS_DIR, title="自动汇总"):
+    """从状态库、公司库和 logos/ 目录生成一份 汇报_<时间>_<标题>.md，返回文件路径"""
+    now = datetime.now()
+    lines = [
+        f"# 阶段汇报：{title}",
+        "",
+        f"> 汇报时间: {now.strftime('%Y-%m-%d %H:%M:%S')}  ",
+        "> 生成方式: report_sink.write_summary（由状态库自动生成）",
+        "",
+        "---",
+        "",
+        "## 📊 下载状态",
+        "",
+        "| 指标 | 数量 |",
+        "|-----|------|",
+    ]
+    for row in _query(state_db, "SELECT status, COUNT(*) FROM outcomes GROUP BY status"):
+        lines.append(f"| {row[0]} | {row[1]:,} |")
+    for row in _query(state_db, "SELECT status, COUNT(*) FROM work_items GROUP BY status"):
+        lines.append(f"| 队列 {row[0]} | {row[1]:,} |")
+
+    by_country = {}
+    for country, status, n in _query(company_db,
+                                     "SELECT country, status, COUNT(*) FROM companies GROUP BY country, status"):
+        by_country.setdefault(country, {})[status] = n
+    if by_country:
+        statuses = sorted({s for counts in by_country.values() for s in counts})
+        lines += ["", "## 🌍 各国公司 Logo 状态", "",
+                  "| 国家 | " + " | ".join(statuses) + " | 合计 |",
+                  "|-----|" + "------|" * (len(statuses) + 1)]
+        for country, counts in sorted(by_country.items()):
+            cells = [f"{counts.get(s, 0):,}" for s in statuses]
+            lines.append(f"| {country} | " + " | ".join(cells) + f" | {sum(counts.values()):,} |")
+
+    logos_dir = Path(logos_dir)
+    if logos_dir.is_dir():
+        lines += ["", "## 📁 Logo 文件", "", "| 目录 | 数量 |", "|-----|------|"]
+        for sub in sorted(p for p in logos_dir.iterdir() if p.is_dir()):
+            lines.append(f"| {sub.name}/ | {_count_files(sub):,} |")
+
+    path = Path(reports_dir) / f"汇报_{now.strftime('%Y%m%d_%H%M%S')}_{title}.md"
+    atomic_write(path, "\n".join(lines) + "\n")
+    return path
+
+
+if __name__ == "__main__":
+    # python report_sink.py [标题]：按当前状态重新生成一份汇报
+    print(write_summary(title=sys.argv[1] if len(sys.argv) > 1 else "自动汇总"))
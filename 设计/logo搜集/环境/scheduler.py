@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+限时调度
+按期望收益给队列里的公司排优先级：拿到 logo 的概率（各源历史命中率、本地索引、未命中缓存、
+这家公司已经失败过几次）× 价值（重点名单、大国、排名靠前）÷ 预计耗时。
+剩余时间不够做完一家就不再领新活，定时写检查点，到点干净收尾；重启后从队列里接着做
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+
+from sources import default_sources
+from storage import connect
+
+HERE = Path(__file__).resolve().parent
+STATE_DB = HERE / "logo" / "download_state.db"
+
+LIST_VALUE = 2.0          # 重点名单（yolo 的 COMPANY_LIST）里的公司
+BASE_VALUE = 1.0          # 公司库里的公司，再按国家大小、排名加权
+RANK_HALF = 20            # 排名第 RANK_HALF 的公司，排名加成减半
+VERIFIED_HIT_RATE = 0.95  # 本地索引确认存在的（simple-icons），基本一定拿得到
+RETRY_DECAY = 0.5         # 每失败过一次，期望命中率打这个折扣
+MIN_COST = 0.05
+REPRIORITIZE_EVERY = 300.0  # 源的命中率和耗时一直在学，隔一阵按新数据重排
+CHECKPOINT_EVERY = 60.0
+
+RUNS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scheduler_runs (
+    run_id     INTEGER PRIMARY KEY,
+    started    REAL NOT NULL,
+    deadline   REAL NOT NULL,
+    checkpoint REAL NOT NULL,      -- 最近一次检查点
+    claimed    INTEGER NOT NULL DEFAULT 0,
+    succeeded  INTEGER NOT NULL DEFAULT 0,
+    failed     INTEGER NOT NULL DEFAULT 0,
+    stopped    TEXT                -- deadline / drained / interrupted；NULL 是还在跑或进程挂了
+);
+"""
+
+_DIGITS = re.compile(r"\d+")
+
+
+def _rank(text):
+    m = _DIGITS.search(text or "")
+    return int(m.group()) if m else None
+
+
+def company_values(priority_list, store=None, status=None):
+    """{公司: 价值}：重点名单里的是 LIST_VALUE；公司库里（可按状态筛）的按所在国家的公司数和排名加权"""
+    values = {company: LIST_VALUE for company in priority_list}
+    if store is None:
+        return values
+    sizes = {country: sum(counts.values()) for country, counts in store.stats().items()}
+    largest = max(sizes.values(), default=1)
+    for row in store.find(status=status):
+        value = BASE_VALUE * (0.5 + 0.5 * sizes.get(row["country"], 0) / largest)
+        rank = _rank(row["rank"])
+        if rank:
+            value *= 1 + RANK_HALF / (RANK_HALF + rank)
+        values.setdefault(row["name"], value)
+    return values
+
+
+class Scheduler:
+    """给 WorkQueue 排优先级、管时间预算和检查点；只在主线程里用
+
+    每次运行在 scheduler_runs 里记一行（track 为假时不记），历次的每小时产出可以拿来比较。
+    """
+
+    def __init__(self, queue, stats, budget, sources=None, negative=None, path=STATE_DB, track=True):
+        self.queue = queue
+        self.stats = stats
+        self.sources = sources or default_sources()
+        self.negative = negative
+        self.values = {}
+        self.typical_cost = 0.0
+        self.counts = {"claimed": 0, "succeeded": 0, "failed": 0}
+        self.stopped = None
+        self.started = time.time()
+        self.deadline = self.started + budget
+        self._last_prioritize = self._last_checkpoint = time.monotonic()
+        self.conn = connect(path)
+        self.conn.executescript(RUNS_SCHEMA)
+        self.run_id = None
+        if track:
+            with self.conn:
+                self.run_id = self.conn.execute(
+                    "INSERT INTO scheduler_runs (started, deadline, checkpoint) VALUES (?, ?, ?)",
+                    (self.started, self.deadline, self.started)).lastrowid
+
+    def hit_rate(self, source, company):
+        """这家公司在这个源上拿到的概率；没有候选 URL 或都在未命中缓存里就是 0"""
+        urls = source.urls(company)
+        if self.negative is not None:
+            urls = [url for url in urls if not self.negative.is_dead(source.name, url, count=False)]
+        if not urls:
+            return 0.0
+        return VERIFIED_HIT_RATE if source.verified else self.stats.success_rate(source.name)
+
+    def expected(self, company, attempts=0):
+        """(命中概率, 预计耗时秒)：按编排器的顺序依次试各源估算，休眠的源不算"""
+        miss, cost = 1.0, 0.0
+        for source in sorted(self.sources, key=lambda s: self.stats.score(s.name), reverse=True):
+            if self.stats.dormant(source.name):
+                continue
+            p = self.hit_rate(source, company)
+            if p == 0:
+                continue
+            cost += miss * self.stats.latency(source.name)
+            miss *= 1 - p
+        return (1 - miss) * RETRY_DECAY ** attempts, cost
+
+    def priority(self, company, attempts=0):
+        """单位时间的期望价值"""
+        p, cost = self.expected(company, attempts)
+        return self.values.get(company, BASE_VALUE) * p / max(cost, MIN_COST), cost
+
+    def prioritize(self, values=None):
+        """按当前的命中率和耗时重算队列里未完成任务的优先级，返回 {公司: 优先级}"""
+        if values is not None:
+            self.values.update(values)
+        priorities, costs = {}, []
+        for company, attempts in self.queue.pending():
+            priorities[company], cost = self.priority(company, attempts)
+            if cost:
+                costs.append(cost)
+        self.queue.set_priorities(priorities)
+        costs.sort()
+        self.typical_cost = costs[len(costs) // 2] if costs else 0.0
+        self._last_prioritize = time.monotonic()
+        return priorities
+
+    def remaining(self):
+        return self.deadline - time.time()
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def claim(self, limit):
+        """按优先级领活；剩余时间不够做完一家（按预计耗时的中位数）就不再领"""
+        if self.remaining() <= self.typical_cost:
+            return []
+        companies = self.queue.claim(limit)
+        self.counts["claimed"] += len(companies)
+        return companies
+
+    def record(self, success):
+        self.counts["succeeded" if success else "failed"] += 1
+
+    def tick(self, *flushables):
+        """主循环每轮调一次：到时间就重排优先级、写检查点"""
+        now = time.monotonic()
+        if now - self._last_prioritize >= REPRIORITIZE_EVERY:
+            self.prioritize()
+        if now - self._last_checkpoint >= CHECKPOINT_EVERY:
+            self.checkpoint(*flushables)
+
+    def checkpoint(self, *flushables):
+        """先让各处攒着的状态落盘（有 flush() 的对象），再记一笔本轮进度"""
+        for obj in flushables:
+            obj.flush()
+        if self.run_id is None:
+            self._last_checkpoint = time.monotonic()
+            return
+        with self.conn:
+            self.conn.execute(
+                """UPDATE scheduler_runs SET checkpoint = ?, claimed = ?, succeeded = ?, failed = ?, stopped = ?
+                   WHERE run_id = ?""",
+                (time.time(), self.counts["claimed"], self.counts["succeeded"], self.counts["failed"],
+                 self.stopped, self.run_id))
+        self._last_checkpoint = time.monotonic()
+
+    def stop(self, reason, *flushables):
+        """收尾：记下停止原因并写最后一个检查点"""
+        self.stopped = reason
+        self.checkpoint(*flushables)
+
+    def per_hour(self):
+        hours = max(time.time() - self.started, 1.0) / 3600
+        return self.counts["succeeded"] / hours
+
+    def history(self, limit=10):
+        """最近几次运行 [(开始时间, 时长小时, 成功, 失败, 每小时成功数, 停止原因)]"""
+        rows = self.conn.execute(
+            "SELECT * FROM scheduler_runs WHERE run_id != ? ORDER BY run_id DESC LIMIT ?",
+            (self.run_id or 0, limit)).fetchall()
+        result = []
+        for r in rows:
+            hours = max(r["checkpoint"] - r["started"], 1.0) / 3600
+            result.append((r["started"], hours, r["succeeded"], r["failed"], r["succeeded"] / hours, r["stopped"]))
+        return result
+
+    def close(self):
+        if self.stopped is None:
+            self.stop("interrupted")
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    # python scheduler.py [条数]：按当前的历史命中率重排队列，列出优先级最高的公司和历次运行的产出
+    from negative_cache import NegativeCache
+    from sources import SourceStats
+    from work_queue import WorkQueue
+
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    with WorkQueue(STATE_DB) as queue, SourceStats(STATE_DB) as stats, NegativeCache(STATE_DB) as negative, \
+            Scheduler(queue, stats, budget=0, negative=negative, track=False) as scheduler:
+        priorities = scheduler.prioritize()
+        for company in sorted(priorities, key=priorities.get, reverse=True)[:limit]:
+            p, cost = scheduler.expected(company)
+            print(f"  {priorities[company]:8.3f}  {company}  (命中 {p:.0%}，约 {cost:.1f}s)")
+        print(f"{len(priorities)} 家待做，预计耗时中位数 {scheduler.typical_cost:.1f}s")
+        for started, hours, succeeded, failed, rate, stopped in scheduler.history():
+            print(f"  {time.strftime('%Y-%m-%d %H:%M', time.localtime(started))}  {hours:.1f}h  "
+                  f"成功 {succeeded} 失败 {failed}  {rate:.1f}/h  {stopped or '未正常结束'}")
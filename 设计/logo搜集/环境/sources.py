@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+多数据源编排
+每个数据源是一个插件（给出候选 URL、文件类型），成功率和耗时按源记在状态库；
+按"单位时间期望成功数"排序，先发最好的源，等太久就对冲下一个，第一个合格的结果胜出，
+长期没有结果的源降为偶尔试探，不再每家公司都白跑一趟
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import requests
+
+from icon_index import default_index
+from names import slugify
+from negative_cache import NEGATIVE_STATUS
+from storage import connect
+from validation import InvalidContent, save_response
+
+HERE = Path(__file__).resolve().parent
+STATS_DB = HERE / "logo" / "download_state.db"
+
+# 各源的 URL 模板；都可以用环境变量指向本地桩服务器做测试
+SIMPLE_ICONS_RAW = os.environ.get(
+    "SIMPLE_ICONS_RAW",
+    "https://raw.githubusercontent.com/simple-icons/simple-icons/develop/icons/{slug}.svg",
+)
+WORLDVECTORLOGO_URL = os.environ.get("WORLDVECTORLOGO_URL", "https://worldvectorlogo.com/download/{slug}.svg")
+CLEARBIT_URL = os.environ.get("CLEARBIT_URL", "https://logo.clearbit.com/{slug}.com")
+
+HEDGE_FACTOR = 1.5       # 领先的源超过平均耗时这么多倍还没结果，就对冲下一个源
+MIN_HEDGE_DELAY = 0.2
+DEFAULT_LATENCY = 1.0    # 没有历史的源按这个耗时估计
+LATENCY_ALPHA = 0.2      # 耗时滑动平均的权重
+DORMANT_AFTER = 30       # 试过这么多次、成功率仍低于 DORMANT_RATE 的源降为试探
+DORMANT_RATE = 0.05
+EXPLORE_EVERY = 20       # 休眠的源每隔这么多家公司试一次，源恢复了能重新学到
+
+EXIT_NOT_FOUND = 3  # 命令行：各源都没有
+
+
+class Source:
+    """数据源插件；子类给出 name / kind / suffix，并实现 urls()"""
+
+    name = None
+    kind = "svg"        # 交给 validation 校验的类型
+    suffix = ".svg"     # 保存的文件名后缀
+    verified = False    # urls() 给出的是确认存在的文件（调度器估算命中率用）
+
+    def urls(self, company):
+        """该公司在这个源的候选 URL；明知没有就返回空列表，不发请求也不计入统计"""
+        raise NotImplementedError
+
+    def filename(self, stem):
+        return f"{stem}{self.suffix}"
+
+
+class SimpleIconsSource(Source):
+    """simple-icons：slug 由本地索引解析，只请求确认存在的图标"""
+
+    name = "simple-icons"
+    verified = True
+
+    def urls(self, company):
+        slug, _ = default_index().resolve(company)
+        return [SIMPLE_ICONS_RAW.format(slug=slug)] if slug else []
+
+
+class WorldVectorLogoSource(Source):
+    """worldvectorlogo：按名称 slug 直接下载，不走搜索页"""
+
+    name = "worldvectorlogo"
+
+    def urls(self, company):
+        slug = slugify(company)
+        return [WORLDVECTORLOGO_URL.format(slug=slug)] if slug else []
+
+
+class ClearbitSource(Source):
+    """Clearbit：按 <名称>.com 域名取 PNG，和 download_logo.sh 一样存成 _clearbit.png"""
+
+    name = "clearbit"
+    kind = "png"
+    suffix = "_clearbit.png"
+
+    def urls(self, company):
+        slug = slugify(company, sep="")
+        return [CLEARBIT_URL.format(slug=slug)] if slug else []
+
+
+def default_sources():
+    return [SimpleIconsSource(), WorldVectorLogoSource(), ClearbitSource()]
+
+
+STATS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS source_stats (
+    source    TEXT PRIMARY KEY,
+    attempts  INTEGER NOT NULL,
+    successes INTEGER NOT NULL,
+    errors    INTEGER NOT NULL,   -- 网络错误 / 限流到底
+    latency   REAL NOT NULL,      -- 有结果的请求耗时的滑动平均（秒）
+    updated   REAL NOT NULL
+);
+"""
+
+
+class SourceStats:
+    """各源的成功率和耗时；内存里累计，按间隔或关闭时写库。线程安全
+
+    记录来自各个下载线程，写库时临时开连接（SQLite 连接不能跨线程共用）。
+    """
+
+    def __init__(self, path=STATS_DB, flush_interval=10.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        conn = connect(path)
+        try:
+            conn.executescript(STATS_SCHEMA)
+            self._stats = {r["source"]: dict(r) for r in conn.execute("SELECT * FROM source_stats")}
+        finally:
+            conn.close()
+        self._dirty = set()
+        self._calls = 0
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def _entry(self, source):
+        return self._stats.setdefault(source, {"source": source, "attempts": 0, "successes": 0, "errors": 0,
+                                               "latency": DEFAULT_LATENCY, "updated": 0.0})
+
+    def record(self, source, outcome, latency):
+        """outcome: "hit" 拿到合格文件 / "miss" 源上没有 / "error" 网络错误"""
+        with self._lock:
+            entry = self._entry(source)
+            entry["attempts"] += 1
+            entry["successes"] += outcome == "hit"
+            entry["errors"] += outcome == "error"
+            if outcome != "error":
+                entry["latency"] += LATENCY_ALPHA * (latency - entry["latency"])
+            entry["updated"] = time.time()
+            self._dirty.add(source)
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def success_rate(self, source):
+        """加一平滑的成功率，新源从 0.5 起步"""
+        entry = self._stats.get(source)
+        if entry is None:
+            return 0.5
+        return (entry["successes"] + 1) / (entry["attempts"] + 2)
+
+    def latency(self, source):
+        entry = self._stats.get(source)
+        return entry["latency"] if entry else DEFAULT_LATENCY
+
+    def score(self, source):
+        """单位时间的期望成功数"""
+        return self.success_rate(source) / max(self.latency(source), 0.05)
+
+    def dormant(self, source):
+        entry = self._stats.get(source)
+        return entry is not None and entry["attempts"] >= DORMANT_AFTER and \
+            self.success_rate(source) < DORMANT_RATE
+
+    def rank(self, sources):
+        """按得分排序；休眠的源大多数时候直接跳过，每 EXPLORE_EVERY 次放在最后试一下"""
+        with self._lock:
+            self._calls += 1
+            explore = self._calls % EXPLORE_EVERY == 0
+            active = [s for s in sources if not self.dormant(s.name)]
+            ranked = sorted(active, key=lambda s: self.score(s.name), reverse=True)
+            if explore:
+                ranked += [s for s in sources if self.dormant(s.name)]
+            return ranked
+
+    def summary(self):
+        """{源: "成功/尝试 平均耗时"}"""
+        return {name: f"{e['successes']}/{e['attempts']} {e['latency']:.2f}s" for name, e in self._stats.items()}
+
+    def flush(self):
+        with self._lock:
+            rows = [tuple(self._stats[name][k] for k in ("source", "attempts", "successes", "errors", "latency",
+                                                         "updated")) for name in self._dirty]
+            self._dirty.clear()
+            self._last_flush = time.monotonic()
+        if rows:
+            conn = connect(self.path)
+            try:
+                with conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.executemany("INSERT OR REPLACE INTO source_stats VALUES (?, ?, ?, ?, ?, ?)", rows)
+            finally:
+                conn.close()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _discard(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+class SourceOrchestrator:
+    """按学到的优先级对冲抓取；可以被多个下载线程共用
+
+    给了 negative（NegativeCache）就跳过有效期内确认过没有的 URL，并记下新的 404 / 不合法内容；
+    给了 etags（EtagCache）就记下胜出文件的 ETag / Last-Modified，供以后条件刷新；
+    给了 metrics（Metrics）就记每次尝试的结果、耗时、字节数和在途数。
+    """
+
+    def __init__(self, fetcher, stats, sources=None, max_parallel=2, workers=16, negative=None, etags=None,
+                 metrics=None):
+        self.fetcher = fetcher
+        self.stats = stats
+        self.negative = negative
+        self.etags = etags
+        self.metrics = metrics
+        self.sources = sources or default_sources()
+        self.max_parallel = max_parallel
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="source")
+
+    def _attempt(self, source, urls, part, cancelled):
+        """子线程里跑：依次试该源的 URL，合格的内容写到 part 文件；拿到返回 (url, 响应头)，否则 None
+
+        被取消的尝试不计入统计，免得输掉对冲的源被算成失败。
+        """
+        if self.metrics is not None:
+            self.metrics.source_started(source.name)
+        start = time.monotonic()
+        outcome, nbytes = "cancelled", 0
+        try:
+            error = None
+            for url in urls:
+                try:
+                    response = self.fetcher.get(url, cancelled=cancelled, stream=True)
+                except requests.RequestException as e:
+                    error = e
+                    continue
+                if response is None:
+                    return None
+                if response.status_code != 200:
+                    response.close()
+                    if response.status_code in NEGATIVE_STATUS:
+                        self._remember_miss(source, url, response.status_code)
+                    continue
+                if cancelled.is_set():
+                    response.close()
+                    return None
+                try:
+                    save_response(response, part, kind=source.kind)
+                except InvalidContent:
+                    self._remember_miss(source, url, "invalid")
+                    continue
+                except requests.RequestException as e:
+                    error = e
+                    continue
+                outcome, nbytes = "hit", part.stat().st_size
+                self.stats.record(source.name, outcome, time.monotonic() - start)
+                return url, response.headers
+            if cancelled.is_set():
+                return None
+            outcome = "error" if error else "miss"
+            self.stats.record(source.name, outcome, time.monotonic() - start)
+            if error:
+                raise error
+            return None
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            if self.metrics is not None:
+                latency = None if outcome == "cancelled" else time.monotonic() - start
+                self.metrics.source_finished(source.name, outcome, latency, nbytes)
+
+    def _remember_miss(self, source, url, status):
+        if self.negative is not None:
+            self.negative.add(source.name, url, status)
+
+    def _urls(self, source, company):
+        urls = source.urls(company)
+        if self.negative is not None:
+            urls = [url for url in urls if not self.negative.is_dead(source.name, url)]
+        return urls
+
+    def fetch(self, company, out_dir, stem=None):
+        """给一家公司找 logo，存到 out_dir/<stem><后缀>；返回 (源名, 文件名)，都没有返回 (None, None)
+
+        所有尝试过的源都是网络错误时抛出第一个错误，由调用方安排重试。
+        """
+        stem = stem or company
+        out_dir = Path(out_dir)
+        waiting = deque((s, urls) for s in self.stats.rank(self.sources) if (urls := self._urls(s, company)))
+        cancelled = threading.Event()
+        running = {}  # future -> (source, part 文件)
+        winner, errors, misses = None, [], 0
+
+        def launch():
+            source, urls = waiting.popleft()
+            part = out_dir / f".{source.filename(stem)}.{source.name}.part"
+            running[self._pool.submit(self._attempt, source, urls, part, cancelled)] = (source, part)
+            return source
+
+        leader = launch() if waiting else None
+        while running:
+            # 领先的源超时还没结果就对冲下一个；已有 max_parallel 个在跑则只等
+            hedge = winner is None and waiting and len(running) < self.max_parallel
+            timeout = max(MIN_HEDGE_DELAY, self.stats.latency(leader.name) * HEDGE_FACTOR) if hedge else None
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                leader = launch()
+                continue
+            for future in done:
+                source, part = running.pop(future)
+                try:
+                    hit = future.result()
+                except requests.RequestException as e:
+                    errors.append(e)
+                    hit = None
+                else:
+                    misses += hit is None
+                if hit is not None and winner is None:
+                    winner = source
+                    target = out_dir / source.filename(stem)
+                    os.replace(part, target)
+                    cancelled.set()
+                    if self.etags is not None:
+                        self.etags.store(hit[0], target, hit[1])
+                elif hit is not None:
+                    os.unlink(part)
+            if winner is not None:
+                # 不等输掉的尝试：它们的请求可能已经发出，看不到 cancelled；结束时自己删掉 part 文件
+                for future, (_, part) in running.items():
+                    future.add_done_callback(lambda _, part=part: _discard(part))
+                break
+            # 失败的位置马上由下一个源补上
+            while waiting and not running:
+                leader = launch()
+        if winner is not None:
+            return winner.name, winner.filename(stem)
+        if errors and not misses:
+            raise errors[0]
+        return None, None
+
+    def close(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    # 给 download_logo.sh 用：python sources.py "公司名" 输出目录 [文件名]
+    # 退出码 0 成功，3 各源都没有，其他表示出错（脚本退回原来的 curl 流程）
+    from logo_fetcher import LogoFetcher
+    from negative_cache import NegativeCache
+
+    company, out_dir = sys.argv[1], sys.argv[2]
+    stem = sys.argv[3] if len(sys.argv) > 3 else slugify(company)
+    with LogoFetcher() as fetcher, SourceStats() as stats, NegativeCache() as negative, \
+            SourceOrchestrator(fetcher, stats, negative=negative) as orchestrator:
+        name, filename = orchestrator.fetch(company, out_dir, stem)
+    if name is None:
+        sys.exit(EXIT_NOT_FOUND)
+    print(f"  ✓ 成功从 {name} 下载 {filename}")
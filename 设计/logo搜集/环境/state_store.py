@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+下载状态存储
+SQLite 里按公司记一行状态，内存里是集合，O(1) 判断是否已下载；
+变更先攒在内存，按条数/时间成批提交，不再每个公司重写整份 JSON
+"""
+
+import json
+import os
+import time
+
+from storage import atomic_write, connect
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outcomes (
+    company    TEXT PRIMARY KEY,
+    status     TEXT NOT NULL,          -- downloaded / failed
+    filename   TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class DownloadState:
+    """下载状态；用法和旧的 state dict 对应：
+
+    state.downloaded / state.failed 是集合，state.cursor 对应 last_company_index。
+    """
+
+    def __init__(self, path, legacy_json=None, batch_size=50, flush_interval=5.0):
+        self.path = path
+        self.legacy_json = legacy_json
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.conn = connect(path)
+        self.conn.executescript(SCHEMA)
+        self._pending = {}
+        self._last_flush = time.monotonic()
+
+        self._migrate_legacy()
+        self._compact()
+
+        self.downloaded, self.failed = set(), set()
+        for row in self.conn.execute("SELECT company, status FROM outcomes"):
+            (self.downloaded if row["status"] == "downloaded" else self.failed).add(row["company"])
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'cursor'").fetchone()
+        self.cursor = int(row["value"]) if row else 0
+        self._saved_cursor = self.cursor
+
+    def _migrate_legacy(self):
+        """首次启动时导入旧的 download_state.json"""
+        if not self.legacy_json or not os.path.exists(self.legacy_json):
+            return
+        if self.conn.execute("SELECT 1 FROM outcomes LIMIT 1").fetchone():
+            return
+        with open(self.legacy_json, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        now = time.time()
+        rows = [(c, "failed", None, now) for c in state.get("failed", [])]
+        # 后写 downloaded，同一公司先失败后成功时以成功为准
+        rows += [(c, "downloaded", f"{c}.svg", now) for c in state.get("downloaded", [])]
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany("INSERT OR REPLACE INTO outcomes VALUES (?, ?, ?, ?)", rows)
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('cursor', ?)",
+                              (str(state.get("last_company_index", 0)),))
+
+    def _compact(self):
+        """启动时把 WAL 合回主库，库文件不会随运行次数无限增长"""
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def is_downloaded(self, company):
+        return company in self.downloaded
+
+    def mark_downloaded(self, company, filename):
+        self.failed.discard(company)
+        self.downloaded.add(company)
+        self._queue(company, "downloaded", filename)
+
+    def mark_failed(self, company):
+        if company in self.downloaded:
+            return
+        self.failed.add(company)
+        self._queue(company, "failed", None)
+
+    def _queue(self, company, status, filename):
+        self._pending[company] = (company, status, filename, time.time())
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        if len(self._pending) >= self.batch_size or \
+                time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """一个事务提交所有待写变更"""
+        if not self._pending and self.cursor == self._saved_cursor:
+            return
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany("INSERT OR REPLACE INTO outcomes VALUES (?, ?, ?, ?)",
+                                  list(self._pending.values()))
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('cursor', ?)", (str(self.cursor),))
+        self._pending.clear()
+        self._saved_cursor = self.cursor
+        self._last_flush = time.monotonic()
+
+    def export_json(self, path):
+        """导出旧格式快照（原子替换），给人看和旧脚本用"""
+        snapshot = {
+            "downloaded": sorted(self.downloaded),
+            "failed": sorted(self.failed),
+            "last_company_index": self.cursor,
+        }
+        atomic_write(path, json.dumps(snapshot, indent=2, ensure_ascii=False))
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+本地存储小工具
+SQLite 连接统一配置（WAL、忙等待），以及"写临时文件再改名"的原子写
+"""
+
+import os
+import sqlite3
+import stat
+import tempfile
+from pathlib import Path
+
+
+def connect(path, timeout=30.0):
+    """打开 SQLite；WAL 模式下多个进程可以同时读、排队写"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=timeout, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={int(timeout * 1000)}")
+    return conn
+
+
+# 进程的 umask 只能"设一下再改回来"读到，导入时读一次
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+
+def file_mode(path):
+    """写回 path 时该用的权限：已有文件沿用原权限，新文件按 umask（mkstemp 建的临时文件是 0600）"""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def atomic_write(path, data):
+    """原子写文件：同目录临时文件 + fsync + os.replace，崩溃时要么旧内容要么新内容"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    mode = "wb" if isinstance(data, bytes) else "w"
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **({} if mode == "wb" else {"encoding": "utf-8"})) as f:
+            f.write(data)
+            f.flush()
+            os.fchmod(f.fileno(), file_mode(path))
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return path
@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+"""
+SVG 瘦身
+类似 SVGO 的纯 Python 实现：去掉编辑器元数据和无用属性、坐标取整、路径数据改写成最短形式、
+合并相邻的同样式路径、去空白；进程池并行处理整个目录，每个文件省了多少记在库里
+"""
+
+import os
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from blob_store import BLOB_DIR, BlobStore, view_path
+from storage import atomic_write, connect
+from thumbnailer import logo_dirs
+from validation import InvalidContent, StreamValidator
+
+HERE = Path(__file__).resolve().parent
+LOGOS_DIR = HERE.parent / "logos"
+CACHE_DB = LOGOS_DIR / ".svg_optimize.db"
+
+PRECISION = 3            # 坐标保留的小数位
+TRANSFORM_PRECISION = 5  # transform 里有缩放系数，多留几位
+
+SVG = "http://www.w3.org/2000/svg"
+XLINK = "http://www.w3.org/1999/xlink"
+ET.register_namespace("", SVG)
+ET.register_namespace("xlink", XLINK)
+
+# Inkscape / Sodipodi / Sketch / Illustrator / RDF 元数据的命名空间，元素和属性整个删掉
+EDITOR_NS = {
+    "http://www.inkscape.org/namespaces/inkscape",
+    "http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd",
+    "http://www.bohemiancoding.com/sketch/ns",
+    "http://ns.adobe.com/AdobeIllustrator/10.0/",
+    "http://ns.adobe.com/AdobeSVGViewerExtensions/3.0/",
+    "http://ns.adobe.com/Extensibility/1.0/",
+    "http://ns.adobe.com/Flows/1.0/",
+    "http://ns.adobe.com/GenericCustomNamespace/1.0/",
+    "http://ns.adobe.com/Graphs/1.0/",
+    "http://ns.adobe.com/ImageReplacement/1.0/",
+    "http://ns.adobe.com/SaveForWeb/1.0/",
+    "http://ns.adobe.com/Variables/1.0/",
+    "http://ns.adobe.com/XPath/1.0/",
+    "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+    "http://creativecommons.org/ns#",
+    "http://web.resource.org/cc/",
+    "http://purl.org/dc/elements/1.1/",
+    "http://www.serif.com/",
+}
+DROP_ELEMENTS = {"metadata"}
+DROP_ATTRS = {"version", "baseProfile", "enable-background", "data-name"}
+# 这些元素里的文字有意义，不能去空白（子元素也一样，比如 <text><a><tspan>）
+TEXT_ELEMENTS = {"text", "tspan", "textPath", "title", "desc", "style", "script"}
+# 这些元素的子元素各有语义（<switch> 只画第一个能画的），里面的 <g> 不能拆开提上来
+KEEP_GROUPS_IN = {"switch", "clipPath", "mask", "pattern", "marker", "a", "text"}
+# 描边会超出路径外框、半透明叠加后合成结果不同，带这些的路径不合并
+STROKE_OPACITY = {"stroke", "opacity", "fill-opacity", "stroke-opacity"}
+COORD_ATTRS = {"x", "y", "x1", "y1", "x2", "y2", "cx", "cy", "r", "rx", "ry", "width", "height",
+               "points", "viewBox", "stroke-width", "font-size", "offset"}
+
+_NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_URL_REF = re.compile(r"#([\w.:-]+)")
+_HEX6 = re.compile(r"#([0-9a-fA-F])\1([0-9a-fA-F])\2([0-9a-fA-F])\3\b")
+_ARGS = {"M": 2, "L": 2, "T": 2, "H": 1, "V": 1, "C": 6, "S": 4, "Q": 4, "A": 7, "Z": 0}
+_SEPARATORS = " \t\r\n,"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS optimized (
+    path    TEXT PRIMARY KEY,
+    size    INTEGER NOT NULL,   -- 优化后的大小和修改时间，没变就不再处理
+    mtime   REAL NOT NULL,
+    before  INTEGER NOT NULL,
+    after   INTEGER NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+
+def local(tag):
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else tag
+
+
+def namespace(name):
+    return name[1:].split("}", 1)[0] if name.startswith("{") else None
+
+
+# ---- 路径数据 ----
+
+def parse_path(d):
+    """d 属性解析成 [(大写命令, [绝对坐标参数])]；命令类型保持不变，S/T 的反射语义不受影响"""
+    segments = []
+    i, n = 0, len(d)
+    x = y = sx = sy = 0.0
+    cmd = None
+    while True:
+        while i < n and d[i] in _SEPARATORS:
+            i += 1
+        if i >= n:
+            break
+        if d[i].isalpha():
+            cmd = d[i]
+            if cmd.upper() not in _ARGS:
+                raise ValueError(f"未知路径命令: {cmd}")
+            i += 1
+            if cmd in "Zz":
+                segments.append(("Z", []))
+                x, y = sx, sy
+                continue
+        elif cmd is None or cmd in "Zz":
+            raise ValueError(f"路径数据不合法: {d[:40]}")
+        upper = cmd.upper()
+        rel = cmd != upper
+        args = []
+        for k in range(_ARGS[upper]):
+            while i < n and d[i] in _SEPARATORS:
+                i += 1
+            if upper == "A" and k in (3, 4):
+                # 弧线的两个标志位可以不带分隔符连写
+                if i < n and d[i] in "01":
+                    args.append(float(d[i]))
+                    i += 1
+                    continue
+                raise ValueError(f"弧线标志不合法: {d[:40]}")
+            m = _NUMBER.match(d, i)
+            if not m:
+                raise ValueError(f"路径数据不合法: {d[:40]}")
+            args.append(float(m.group()))
+            i = m.end()
+        if upper == "H":
+            x = args[0] = args[0] + x if rel else args[0]
+        elif upper == "V":
+            y = args[0] = args[0] + y if rel else args[0]
+        elif upper == "A":
+            if rel:
+                args[5] += x
+                args[6] += y
+            x, y = args[5], args[6]
+        else:
+            if rel:
+                args = [v + (x if j % 2 == 0 else y) for j, v in enumerate(args)]
+            x, y = args[-2], args[-1]
+        segments.append((upper, args))
+        if upper == "M":
+            sx, sy = x, y
+            cmd = "l" if rel else "L"  # moveto 后面的坐标对是 lineto
+    return segments
+
+
+def format_number(value, precision=PRECISION):
+    """最短写法：去掉尾随 0 和前导 0，-0 写成 0"""
+    s = f"{value:.{precision}f}".rstrip("0").rstrip(".")
+    if s in ("", "-0"):
+        return "0"
+    if s.startswith("0."):
+        return s[1:]
+    if s.startswith("-0."):
+        return "-" + s[2:]
+    return s
+
+
+def join_tokens(tokens):
+    """命令字母和数字拼起来，只在两个数字会粘连时才加空格"""
+    out, prev = [], None
+    for token in tokens:
+        if prev is not None and not token[0].isalpha() and not prev[-1].isalpha():
+            if not (token[0] == "-" or (token[0] == "." and "." in prev and "e" not in prev)):
+                out.append(" ")
+        out.append(token)
+        prev = token
+    return "".join(out)
+
+
+def serialize_path(segments, precision=PRECISION):
+    """每段在绝对 / 相对写法里挑短的；相对坐标按已输出的（取整后的）位置算，误差不会累积"""
+    tokens = []
+    x = y = sx = sy = 0.0
+    prev = None
+    for upper, args in segments:
+        if upper == "Z":
+            if prev != "z":
+                tokens.append("z")
+            prev = "z"
+            x, y = sx, sy
+            continue
+        if upper == "H":
+            rel = [args[0] - x]
+        elif upper == "V":
+            rel = [args[0] - y]
+        elif upper == "A":
+            rel = args[:5] + [args[5] - x, args[6] - y]
+        else:
+            rel = [v - (x if j % 2 == 0 else y) for j, v in enumerate(args)]
+        absolute = [format_number(v, precision) for v in args]
+        relative = [format_number(v, precision) for v in rel]
+        if len(join_tokens(relative)) < len(join_tokens(absolute)) and prev is not None:
+            letter, numbers = upper.lower(), relative
+            if upper == "H":
+                x += float(numbers[0])
+            elif upper == "V":
+                y += float(numbers[0])
+            else:
+                x, y = x + float(numbers[-2]), y + float(numbers[-1])
+        else:
+            letter, numbers = upper, absolute
+            if upper == "H":
+                x = float(numbers[0])
+            elif upper == "V":
+                y = float(numbers[0])
+            else:
+                x, y = float(numbers[-2]), float(numbers[-1])
+        # 同一命令连续出现、或 moveto 后紧跟同写法的 lineto，命令字母可以省
+        if not (letter == prev and upper != "M") and (prev, letter) not in (("M", "L"), ("m", "l")):
+            tokens.append(letter)
+        tokens += numbers
+        prev = letter
+        if upper == "M":
+            sx, sy = x, y
+    return join_tokens(tokens)
+
+
+def path_bbox(segments):
+    """路径各点（含控制点）的外框；贝塞尔曲线在控制点凸包内，所以是保守估计。有弧线返回 None"""
+    xs, ys = [], []
+    x = y = 0.0
+    for upper, args in segments:
+        if upper == "A":
+            return None
+        if upper == "H":
+            x = args[0]
+        elif upper == "V":
+            y = args[0]
+        elif args:
+            xs += args[0::2]
+            ys += args[1::2]
+            x, y = args[-2], args[-1]
+        xs.append(x)
+        ys.append(y)
+    if not xs:
+        return None
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _overlaps(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+# ---- 文档 ----
+
+def _numbers(value, precision):
+    return _NUMBER.sub(lambda m: format_number(float(m.group()), precision), value)
+
+
+def _clean(elem):
+    """递归删编辑器元素/属性和无用属性"""
+    for child in list(elem):
+        if not isinstance(child.tag, str) or namespace(child.tag) in EDITOR_NS or local(child.tag) in DROP_ELEMENTS:
+            elem.remove(child)
+            continue
+        _clean(child)
+    for name in list(elem.attrib):
+        if namespace(name) in EDITOR_NS or name in DROP_ATTRS or not elem.attrib[name].strip():
+            del elem.attrib[name]
+
+
+def _drop_unused_ids(root):
+    """没有被 url(#id) / href="#id" / <style> 引用的 id 删掉；有脚本的文件不动"""
+    if any(local(e.tag) == "script" for e in root.iter()):
+        return
+    texts = []
+    for e in root.iter():
+        texts += e.attrib.values()
+        if local(e.tag) == "style" and e.text:
+            texts.append(e.text)
+    referenced = {m for t in texts for m in _URL_REF.findall(t)}
+    for e in root.iter():
+        if "id" in e.attrib and e.attrib["id"] not in referenced:
+            del e.attrib["id"]
+
+
+def _collapse_groups(elem):
+    """没有属性的 <g> 把子元素提到上一层；空的 <g> / <defs> 删掉
+
+    KEEP_GROUPS_IN 里的元素只处理更深层，自己的子元素原样保留。
+    """
+    if local(elem.tag) in KEEP_GROUPS_IN:
+        for child in elem:
+            _collapse_groups(child)
+        return
+    children = []
+    for child in list(elem):
+        _collapse_groups(child)
+        name = local(child.tag)
+        if name in ("g", "defs") and len(child) == 0:
+            continue
+        if name == "g" and not child.attrib:
+            children += list(child)
+        else:
+            children.append(child)
+    elem[:] = children
+
+
+def _paint(elem):
+    """元素上的展示属性，style 里的也算：{属性名: 值}"""
+    props = {local(k): v.strip() for k, v in elem.attrib.items()}
+    for part in elem.get("style", "").split(";"):
+        if ":" in part:
+            k, v = part.split(":", 1)
+            props[k.strip()] = v.strip()
+    return props
+
+
+def _stroked_or_translucent(elem):
+    """有描边或不透明度不是 1"""
+    for key, value in _paint(elem).items():
+        if key not in STROKE_OPACITY or value in ("", "inherit"):
+            continue
+        if key == "stroke":
+            if value != "none":
+                return True
+            continue
+        try:
+            if float(value.rstrip("%")) / (100 if value.endswith("%") else 1) < 1:
+                return True
+        except ValueError:
+            return True
+    return False
+
+
+def _can_merge(elem, inherited=False):
+    attrib = elem.attrib
+    return (local(elem.tag) == "path" and "d" in attrib and len(elem) == 0 and "id" not in attrib
+            and not inherited and not _stroked_or_translucent(elem)
+            and not any(k.startswith("marker") or "url(" in v for k, v in attrib.items()))
+
+
+def _optimize_paths(elem, precision, inherited=False):
+    """改写所有 d；相邻、属性完全相同、外框互不重叠的路径合并成一条
+
+    inherited：祖先元素带描边或半透明，子路径都不合并。
+    """
+    inherited = inherited or _stroked_or_translucent(elem)
+    last, last_segments, last_bbox = None, None, None
+    for child in list(elem):
+        if local(child.tag) != "path":
+            _optimize_paths(child, precision, inherited)
+            last = None
+            continue
+        try:
+            segments = parse_path(child.get("d", ""))
+        except ValueError:
+            last = None
+            continue
+        bbox = path_bbox(segments)
+        if (last is not None and bbox is not None and _can_merge(child, inherited)
+                and {k: v for k, v in child.attrib.items() if k != "d"} ==
+                {k: v for k, v in last.attrib.items() if k != "d"}
+                and not _overlaps(last_bbox, bbox)):
+            last_segments += segments
+            last_bbox = (min(last_bbox[0], bbox[0]), min(last_bbox[1], bbox[1]),
+                         max(last_bbox[2], bbox[2]), max(last_bbox[3], bbox[3]))
+            last.set("d", serialize_path(last_segments, precision))
+            elem.remove(child)
+            continue
+        child.set("d", serialize_path(segments, precision))
+        if _can_merge(child, inherited) and bbox is not None:
+            last, last_segments, last_bbox = child, segments, bbox
+        else:
+            last = None
+
+
+def _minify(elem, precision, parent_text=False):
+    keep_text = parent_text or local(elem.tag) in TEXT_ELEMENTS
+    for name, value in list(elem.attrib.items()):
+        key = local(name)
+        if key in COORD_ATTRS:
+            value = _numbers(value, precision)
+        elif key in ("transform", "gradientTransform", "patternTransform"):
+            value = _numbers(value, TRANSFORM_PRECISION)
+        elif key == "style":
+            value = ";".join(part.strip().replace(": ", ":") for part in value.split(";") if part.strip())
+        if key in ("fill", "stroke", "stop-color", "style"):
+            value = _HEX6.sub(lambda m: "#" + "".join(m.groups()).lower(), value)
+        elem.attrib[name] = value
+    if not keep_text and elem.text is not None and not elem.text.strip():
+        elem.text = None
+    for child in elem:
+        _minify(child, precision, keep_text)
+        if not keep_text and child.tail is not None and not child.tail.strip():
+            child.tail = None
+
+
+def optimize(data, precision=PRECISION):
+    """优化一份 SVG（bytes），返回优化后的 bytes"""
+    root = ET.fromstring(data)
+    if local(root.tag) != "svg":
+        raise InvalidContent(f"根元素不是 <svg>: {local(root.tag)}")
+    _clean(root)
+    for name in ("x", "y"):
+        if root.get(name) in ("0", "0px"):
+            del root.attrib[name]
+    _drop_unused_ids(root)
+    _collapse_groups(root)
+    _optimize_paths(root, precision)
+    _minify(root, precision)
+    # ElementTree 会转义文字和属性里的 ">"，所以 " />" 只可能是自闭合标签
+    return ET.tostring(root, encoding="unicode").replace(" />", "/>").encode("utf-8")
+
+
+def optimize_file(path, precision=PRECISION):
+    """子进程里跑：优化并原子替换（变小了才写），返回 (path, 原大小, 新大小, 错误或 None)"""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        result = optimize(data, precision)
+        if len(result) >= len(data):
+            return str(path), len(data), len(data), None
+        validator = StreamValidator(kind="svg")
+        validator.feed(result)
+        validator.close()
+        atomic_write(path, result)
+        return str(path), len(data), len(result), None
+    except Exception as e:
+        return str(path), 0, 0, f"{type(e).__name__}: {e}"
+
+
+class SvgOptimizer:
+    """增量批量优化；处理过且之后没改动的文件跳过"""
+
+    def __init__(self, cache_db=CACHE_DB, precision=PRECISION, workers=None):
+        self.precision = precision
+        self.workers = workers or os.cpu_count()
+        self.conn = connect(cache_db)
+        self.conn.executescript(SCHEMA)
+
+    def plan(self, directories):
+        cached = {r["path"]: (r["size"], r["mtime"]) for r in self.conn.execute("SELECT path, size, mtime FROM optimized")}
+        todo = []
+        for directory in directories:
+            for entry in os.scandir(directory):
+                if not entry.is_file() or not entry.name.lower().endswith(".svg"):
+                    continue
+                st = entry.stat()
+                if cached.get(entry.path) != (st.st_size, st.st_mtime):
+                    todo.append(entry.path)
+        return todo
+
+    def run(self, directories):
+        """返回 ([(path, 原大小, 新大小)], [(path, 错误)])"""
+        results, errors = [], []
+        todo = self.plan(directories)
+        with self.conn:
+            self.conn.execute("BEGIN")
+            if todo:
+                with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                    futures = [pool.submit(optimize_file, path, self.precision) for path in todo]
+                    for future in as_completed(futures):
+                        path, before, after, error = future.result()
+                        if error:
+                            errors.append((path, error))
+                            continue
+                        st = os.stat(path)
+                        self.conn.execute("INSERT OR REPLACE INTO optimized VALUES (?, ?, ?, ?, ?, ?)",
+                                          (path, st.st_size, st.st_mtime, before, after, time.time()))
+                        results.append((path, before, after))
+        self._relink([path for path, before, after in results if after < before])
+        return results, errors
+
+    def _relink(self, paths):
+        """原来是 blob 视图的文件换了内容：新内容收进 blob 库，视图记录跟着更新（旧 blob 留给 gc）"""
+        if not paths or not (BLOB_DIR / "manifest.db").exists():
+            return
+        with BlobStore() as store:
+            viewed = {r["path"] for r in store.conn.execute("SELECT path FROM views")}
+            with store.conn:
+                store.conn.execute("BEGIN")
+                for path in paths:
+                    if view_path(path) in viewed:
+                        store.link(store.put(path), path)
+
+    def totals(self):
+        row = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(before), 0), COALESCE(SUM(after), 0) FROM optimized")
+        return tuple(row.fetchone())
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    # python svg_optimize.py [目录 ...]；默认处理 logos/ 下所有分类目录
+    dirs = [Path(a) for a in sys.argv[1:]] or logo_dirs()
+    start = time.time()
+    with SvgOptimizer() as optimizer:
+        results, errors = optimizer.run(dirs)
+        files, before, after = optimizer.totals()
+    for path, error in errors:
+        print(f"✗ {path}: {error}", file=sys.stderr)
+    saved = sum(b - a for _, b, a in results)
+    print(f"处理 {len(results)} 个文件，本次节省 {saved / 1024:.1f} KB，失败 {len(errors)} ({time.time() - start:.1f}s)")
+    if before:
+        print(f"累计 {files} 个文件：{before / 1024:.1f} KB -> {after / 1024:.1f} KB ({1 - after / before:.1%})")
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+缩略图生成
+SVG / PNG logo 按多个尺寸栅格化到同目录的 thumbs/，进程池并行；
+按源文件内容哈希缓存，内容没变的 logo 直接跳过，输出一律原子写
+"""
+
+import hashlib
+import io
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from PIL import Image
+
+from storage import atomic_write, connect
+
+try:
+    import cairosvg
+except ImportError:  # 可选依赖，没有就退回 rsvg-convert
+    cairosvg = None
+
+HERE = Path(__file__).resolve().parent
+LOGOS_DIR = HERE.parent / "logos"
+CACHE_DB = LOGOS_DIR / ".thumb_cache.db"
+
+# 第一个尺寸写在 thumbs/<名字>.png（和现有缩略图一致），其余写在 thumbs/<尺寸>/<名字>.png
+SIZES = (200, 64)
+SOURCES = (".svg", ".png")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS thumbs (
+    source  TEXT PRIMARY KEY,
+    size    INTEGER NOT NULL,
+    mtime   REAL NOT NULL,
+    sha256  TEXT NOT NULL,
+    sizes   TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+
+def svg_backend():
+    if cairosvg is not None:
+        return "cairosvg"
+    if shutil.which("rsvg-convert"):
+        return "rsvg-convert"
+    return None
+
+
+def thumb_path(source, size, sizes=SIZES):
+    source = Path(source)
+    thumbs = source.parent / "thumbs"
+    if size != sizes[0]:
+        thumbs = thumbs / str(size)
+    return thumbs / f"{source.stem}.png"
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _rasterize_svg(path, size):
+    """按宽度栅格化，结果再等比缩进方框"""
+    if cairosvg is not None:
+        data = cairosvg.svg2png(url=str(path), output_width=size)
+    else:
+        data = subprocess.run(["rsvg-convert", "-w", str(size), str(path)],
+                              check=True, capture_output=True).stdout
+    return Image.open(io.BytesIO(data))
+
+
+def _square(img, size):
+    """等比缩放并居中放到 size x size 的透明画布上"""
+    img = img.convert("RGBA")
+    img.thumbnail((size, size), Image.LANCZOS)
+    canvas = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    canvas.paste(img, ((size - img.width) // 2, (size - img.height) // 2), img)
+    return canvas
+
+
+def render(source, sizes=SIZES):
+    """子进程里跑：生成一个源文件的全部尺寸，返回 (source, 错误信息或 None)"""
+    try:
+        source = Path(source)
+        base = Image.open(source) if source.suffix.lower() == ".png" else None
+        for size in sizes:
+            img = base if base is not None else _rasterize_svg(source, size)
+            buf = io.BytesIO()
+            _square(img, size).save(buf, format="PNG", optimize=True)
+            atomic_write(thumb_path(source, size, sizes), buf.getvalue())
+        return str(source), None
+    except Exception as e:
+        return str(source), f"{type(e).__name__}: {e}"
+
+
+class Thumbnailer:
+    """增量缩略图生成器"""
+
+    def __init__(self, cache_db=CACHE_DB, sizes=SIZES, workers=None):
+        self.sizes = tuple(sizes)
+        self.workers = workers or os.cpu_count()
+        self.conn = connect(cache_db)
+        self.conn.executescript(SCHEMA)
+        self.backend = svg_backend()
+
+    def _outputs_exist(self, source):
+        return all(thumb_path(source, s, self.sizes).exists() for s in self.sizes)
+
+    def plan(self, directories):
+        """找出需要重新生成的源文件，返回 ([(source, stat, sha)], 跳过数)
+
+        大小和修改时间都没变的不读内容；变了再算哈希，哈希相同也跳过。
+        """
+        cached = {r["source"]: r for r in self.conn.execute("SELECT * FROM thumbs")}
+        sizes_key = ",".join(map(str, self.sizes))
+        todo, skipped = [], 0
+        for directory in directories:
+            for entry in os.scandir(directory):
+                if not entry.is_file() or not entry.name.lower().endswith(SOURCES):
+                    continue
+                if entry.name.lower().endswith(".svg") and self.backend is None:
+                    continue
+                st = entry.stat()
+                row = cached.get(entry.path)
+                fresh = row is not None and row["sizes"] == sizes_key and self._outputs_exist(entry.path)
+                if fresh and row["size"] == st.st_size and row["mtime"] == st.st_mtime:
+                    skipped += 1
+                    continue
+                sha = file_hash(entry.path)
+                if fresh and row["sha256"] == sha:
+                    self._remember(entry.path, st, sha)
+                    skipped += 1
+                    continue
+                todo.append((entry.path, st, sha))
+        return todo, skipped
+
+    def _remember(self, source, st, sha):
+        self.conn.execute("INSERT OR REPLACE INTO thumbs VALUES (?, ?, ?, ?, ?, ?)",
+                          (source, st.st_size, st.st_mtime, sha, ",".join(map(str, self.sizes)), time.time()))
+
+    def run(self, directories):
+        """生成缩略图，返回 (生成数, 跳过数, [(源文件, 错误)])"""
+        done, errors = 0, []
+        # 缓存记录整批一个事务提交
+        with self.conn:
+            self.conn.execute("BEGIN")
+            todo, skipped = self.plan(directories)
+            info = {source: (st, sha) for source, st, sha in todo}
+            if todo:
+                with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                    futures = [pool.submit(render, source, self.sizes) for source, _, _ in todo]
+                    for future in as_completed(futures):
+                        source, error = future.result()
+                        if error:
+                            errors.append((source, error))
+                            continue
+                        self._remember(source, *info[source])
+                        done += 1
+        return done, skipped, errors
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def logo_dirs(root=LOGOS_DIR):
+    """logos/by_country/* 和 logos/by_letter/* 下的各个 logo 目录"""
+    return sorted(p for group in ("by_country", "by_letter") if (root / group).is_dir()
+                  for p in (root / group).iterdir() if p.is_dir())
+
+
+if __name__ == "__main__":
+    # python thumbnailer.py [目录 ...]；默认处理 logos/ 下所有分类目录
+    dirs = [Path(a) for a in sys.argv[1:]] or logo_dirs()
+    start = time.time()
+    with Thumbnailer() as thumbnailer:
+        if thumbnailer.backend is None:
+            print("⚠️ 未安装 cairosvg 或 rsvg-convert，只处理 PNG", file=sys.stderr)
+        done, skipped, errors = thumbnailer.run(dirs)
+    for source, error in errors:
+        print(f"✗ {source}: {error}", file=sys.stderr)
+    print(f"生成 {done}，跳过 {skipped}，失败 {len(errors)} ({time.time() - start:.1f}s)")
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Logo 内容校验
+下载时边收边检查：Content-Type、文件头魔数、SVG 根元素（增量 XML 解析）、PNG 尺寸，
+全部通过才把临时文件改名成正式文件，404 HTML 页面不会再落盘
+"""
+
+import os
+import re
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from storage import file_mode
+
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+SVG_NS = "{http://www.w3.org/2000/svg}"
+
+MAX_BYTES = {"svg": 2 * 1024 * 1024, "png": 5 * 1024 * 1024}
+MIN_BYTES = 32  # 最小的合法 SVG 也有这么长，更短的只会是空响应
+MAX_PNG_SIDE = 4096
+MIN_PNG_SIDE = 16
+
+# 各类型可接受的 Content-Type；raw.githubusercontent.com 对 svg 返回 text/plain
+CONTENT_TYPES = {
+    "svg": {"image/svg+xml", "text/xml", "application/xml", "text/plain", "application/octet-stream"},
+    "png": {"image/png", "application/octet-stream"},
+}
+
+
+class InvalidContent(ValueError):
+    """内容不是合法的 logo"""
+
+
+def check_content_type(content_type, kind=None):
+    """Content-Type 明显不对（比如 text/html）直接拒绝，不用再读响应体"""
+    mime = (content_type or "").split(";")[0].strip().lower()
+    if not mime:
+        return
+    kinds = [kind] if kind else list(CONTENT_TYPES)
+    if not any(mime in CONTENT_TYPES[k] for k in kinds):
+        raise InvalidContent(f"Content-Type 不对: {mime}")
+
+
+def svg_size(attrib):
+    """根元素的宽高：优先 width/height（只认纯数字或 px），否则取 viewBox；拿不到返回 None"""
+    try:
+        w, h = (float(attrib[k].removesuffix("px")) for k in ("width", "height"))
+        return round(w), round(h)
+    except (KeyError, ValueError):
+        pass
+    parts = re.split(r"[\s,]+", attrib.get("viewBox", "").strip())
+    if len(parts) == 4:
+        try:
+            return round(float(parts[2])), round(float(parts[3]))
+        except ValueError:
+            pass
+    return None
+
+
+class StreamValidator:
+    """增量校验器：feed() 喂数据块，close() 返回识别出的类型（"svg" / "png"）
+
+    一旦能判定不合法就立即抛 InvalidContent，调用方可以马上断开连接。
+    """
+
+    def __init__(self, kind=None, max_bytes=None):
+        self.expect = kind
+        self.kind = None
+        self.size = 0
+        self.max_bytes = max_bytes
+        self._head = b""
+        self._parser = None
+        self._root_seen = False
+        self.dimensions = None
+
+    def feed(self, chunk):
+        if not chunk:
+            return
+        self.size += len(chunk)
+        limit = self.max_bytes or MAX_BYTES.get(self.kind or self.expect, max(MAX_BYTES.values()))
+        if self.size > limit:
+            raise InvalidContent(f"文件过大: 超过 {limit} 字节")
+
+        if self.kind is None:
+            self._head += chunk
+            # 头部还不够判断（只有空白，或者可能是 PNG 魔数的前几个字节）就先攒着
+            if not self._head.lstrip(b"\xef\xbb\xbf \t\r\n") or \
+                    (len(self._head) < len(PNG_MAGIC) and PNG_MAGIC.startswith(self._head)):
+                return
+            self._sniff()
+            chunk, self._head = self._head, b""
+
+        if self.kind == "svg":
+            self._feed_svg(chunk)
+        elif self.kind == "png" and self.dimensions is None:
+            # 只攒到 IHDR 为止，之后的数据块不再留在内存里
+            self._head += chunk
+            self._check_ihdr()
+
+    def _sniff(self):
+        head = self._head
+        if head.startswith(PNG_MAGIC):
+            kind = "png"
+        elif head.lstrip(b"\xef\xbb\xbf \t\r\n").startswith(b"<"):
+            kind = "svg"
+        else:
+            raise InvalidContent("无法识别的文件头")
+        if self.expect and kind != self.expect:
+            raise InvalidContent(f"期望 {self.expect}，实际是 {kind}")
+        self.kind = kind
+        if kind == "svg":
+            self._parser = ET.XMLPullParser(events=("start",))
+
+    def _feed_svg(self, chunk):
+        try:
+            self._parser.feed(chunk)
+            for _, elem in self._parser.read_events():
+                if not self._root_seen:
+                    # 第一个元素就是根：404 页面这里会是 html
+                    if elem.tag not in ("svg", SVG_NS + "svg"):
+                        raise InvalidContent(f"根元素不是 svg: {elem.tag}")
+                    self._root_seen = True
+                    self.dimensions = svg_size(elem.attrib)
+        except ET.ParseError as e:
+            raise InvalidContent(f"XML 解析失败: {e}") from None
+
+    def _check_ihdr(self):
+        # 魔数(8) + 长度(4) + "IHDR"(4) + 宽(4) + 高(4)
+        if self.dimensions is not None or len(self._head) < 24:
+            return
+        if self._head[12:16] != b"IHDR":
+            raise InvalidContent("PNG 缺少 IHDR")
+        width = int.from_bytes(self._head[16:20], "big")
+        height = int.from_bytes(self._head[20:24], "big")
+        if not (MIN_PNG_SIDE <= width <= MAX_PNG_SIDE and MIN_PNG_SIDE <= height <= MAX_PNG_SIDE):
+            raise InvalidContent(f"PNG 尺寸不合适: {width}x{height}")
+        self.dimensions = (width, height)
+        self._head = b""
+
+    def close(self):
+        if self.kind is None:
+            raise InvalidContent("内容为空或太短")
+        if self.size < MIN_BYTES:
+            raise InvalidContent(f"文件太小: {self.size} 字节")
+        if self.kind == "svg":
+            try:
+                self._parser.close()
+            except ET.ParseError as e:
+                raise InvalidContent(f"XML 不完整: {e}") from None
+            if not self._root_seen:
+                raise InvalidContent("没有 svg 根元素")
+        elif self.dimensions is None:
+            raise InvalidContent("PNG 被截断")
+        return self.kind
+
+
+def save_response(response, path, kind=None, chunk_size=16384):
+    """边下载边校验，写同目录临时文件，通过后原子改名到 path；返回识别出的类型
+
+    校验失败删除临时文件并抛 InvalidContent，path 不会被创建或覆盖。
+    """
+    validator = StreamValidator(kind)
+    try:
+        check_content_type(response.headers.get("Content-Type"), kind)
+        length = response.headers.get("Content-Length")
+        if length and length.isdigit() and int(length) > MAX_BYTES.get(kind, max(MAX_BYTES.values())):
+            raise InvalidContent(f"文件过大: {length} 字节")
+    except InvalidContent:
+        response.close()
+        raise
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in response.iter_content(chunk_size):
+                validator.feed(chunk)
+                f.write(chunk)
+            found = validator.close()
+            f.flush()
+            os.fchmod(f.fileno(), file_mode(path))  # mkstemp 是 0600，改成和普通新文件一样
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        response.close()
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return found
+
+
+def validate_file(path, kind=None):
+    """校验已落盘的文件，返回类型；不合法抛 InvalidContent"""
+    validator = StreamValidator(kind)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            validator.feed(chunk)
+    return validator.close()
+
+
+if __name__ == "__main__":
+    # 扫描目录，列出不合法的 logo 文件
+    bad = 0
+    for root in sys.argv[1:] or ["logo"]:
+        for p in sorted(Path(root).rglob("*")):
+            if p.suffix.lower() not in (".svg", ".png"):
+                continue
+            try:
+                validate_file(p, p.suffix.lower()[1:])
+            except InvalidContent as e:
+                bad += 1
+                print(f"{p}: {e}")
+    print(f"不合法: {bad}")
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+持久化工作队列
+每个公司一行：状态、尝试次数、下次重试时间、租约。多个下载进程可以同时领活，
+进程挂掉后租约过期，任务自动回到队列，重启后从断点继续
+"""
+
+import os
+import socket
+import time
+
+from storage import connect
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_items (
+    company       TEXT PRIMARY KEY,
+    position      INTEGER NOT NULL,       -- 入队顺序
+    priority      REAL NOT NULL DEFAULT 0,  -- 调度器算的期望收益，大的先领
+    status        TEXT NOT NULL,          -- pending / leased / done / dead
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    next_retry_at REAL NOT NULL DEFAULT 0,
+    lease_owner   TEXT,
+    lease_expires REAL,
+    last_error    TEXT,
+    updated_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS work_items_ready ON work_items (status, next_retry_at, position);
+"""
+PRIORITY_INDEX = "CREATE INDEX IF NOT EXISTS work_items_priority ON work_items (status, priority DESC, position)"
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """基于 SQLite 的租约队列
+
+    claim() 在 BEGIN IMMEDIATE 事务里挑任务并写租约，多进程不会领到同一个公司。
+    """
+
+    def __init__(self, path, lease_seconds=120, max_attempts=5, retry_base=60.0, worker_id=None):
+        self.conn = connect(path)
+        self.conn.executescript(SCHEMA)
+        # 旧库没有 priority 列，补上后按入队顺序（优先级都是 0）领取，和以前一样
+        if "priority" not in {r["name"] for r in self.conn.execute("PRAGMA table_info(work_items)")}:
+            self.conn.execute("ALTER TABLE work_items ADD COLUMN priority REAL NOT NULL DEFAULT 0")
+        self.conn.execute(PRIORITY_INDEX)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.worker_id = worker_id or default_worker_id()
+
+    def enqueue(self, companies, done=()):
+        """批量入队，已存在的不动；done 里的直接记为完成"""
+        now = time.time()
+        done = set(done)
+        start = self.conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM work_items").fetchone()[0]
+        rows = [(c, start + i, "done" if c in done else "pending", now) for i, c in enumerate(companies)]
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO work_items (company, position, status, updated_at) VALUES (?, ?, ?, ?)",
+                rows)
+
+    def claim(self, limit=1):
+        """领取最多 limit 个可做的任务：到期的 pending，或租约已过期的 leased；优先级高的先领"""
+        now = time.time()
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            rows = self.conn.execute(
+                """SELECT company FROM work_items
+                   WHERE (status = 'pending' AND next_retry_at <= ?)
+                      OR (status = 'leased' AND lease_expires < ?)
+                   ORDER BY priority DESC, next_retry_at, position LIMIT ?""",
+                (now, now, limit)).fetchall()
+            companies = [r["company"] for r in rows]
+            self.conn.executemany(
+                """UPDATE work_items SET status = 'leased', attempts = attempts + 1,
+                          lease_owner = ?, lease_expires = ?, updated_at = ?
+                   WHERE company = ?""",
+                [(self.worker_id, now + self.lease_seconds, now, c) for c in companies])
+        return companies
+
+    def pending(self):
+        """还没做完的任务 [(公司, 已尝试次数)]"""
+        return [(r["company"], r["attempts"]) for r in self.conn.execute(
+            "SELECT company, attempts FROM work_items WHERE status IN ('pending', 'leased') ORDER BY position")]
+
+    def remaining(self, before=None):
+        """还没做完、且在 before（时间戳）之前能领到的任务数；before 为 None 不限"""
+        before = float("inf") if before is None else before
+        return self.conn.execute(
+            """SELECT COUNT(*) FROM work_items
+               WHERE status = 'leased' OR (status = 'pending' AND next_retry_at < ?)""", (before,)).fetchone()[0]
+
+    def set_priorities(self, priorities):
+        """批量写优先级：priorities 是 {公司: 优先级}，一个事务"""
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.executemany("UPDATE work_items SET priority = ? WHERE company = ?",
+                                  [(p, c) for c, p in priorities.items()])
+
+    def renew(self, company):
+        """长任务续租"""
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "UPDATE work_items SET lease_expires = ? WHERE company = ? AND lease_owner = ? AND status = 'leased'",
+                (now + self.lease_seconds, company, self.worker_id))
+
+    def complete(self, company):
+        with self.conn:
+            self.conn.execute(
+                """UPDATE work_items SET status = 'done', lease_owner = NULL, lease_expires = NULL,
+                          last_error = NULL, updated_at = ?
+                   WHERE company = ? AND lease_owner = ?""",
+                (time.time(), company, self.worker_id))
+
+    def fail(self, company, error, retry_in=None):
+        """失败回队：默认按尝试次数指数退避，超过 max_attempts 记为 dead"""
+        now = time.time()
+        row = self.conn.execute("SELECT attempts FROM work_items WHERE company = ?", (company,)).fetchone()
+        attempts = row["attempts"] if row else 1
+        if attempts >= self.max_attempts:
+            status, next_retry = "dead", now
+        else:
+            status = "pending"
+            delay = retry_in if retry_in is not None else self.retry_base * 2 ** (attempts - 1)
+            next_retry = now + delay
+        with self.conn:
+            self.conn.execute(
+                """UPDATE work_items SET status = ?, next_retry_at = ?, lease_owner = NULL,
+                          lease_expires = NULL, last_error = ?, updated_at = ?
+                   WHERE company = ? AND lease_owner = ?""",
+                (status, next_retry, str(error)[:500], now, company, self.worker_id))
+
+    def next_ready_at(self):
+        """最早一个可领任务的时间；队列里没有未完成任务时返回 None"""
+        row = self.conn.execute(
+            """SELECT MIN(CASE WHEN status = 'pending' THEN next_retry_at ELSE lease_expires END)
+               FROM work_items WHERE status IN ('pending', 'leased')""").fetchone()
+        return row[0]
+
+    def stats(self):
+        return {r["status"]: r["n"] for r in
+                self.conn.execute("SELECT status, COUNT(*) AS n FROM work_items GROUP BY status")}
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,42 +1,49 @@
 #!/usr/bin/env python3
 """
 YOLO Logo Downloader
-持续运行4小时，尽可能多地下载logo
+在时间预算内（默认4小时）按期望收益调度，尽可能多地下载logo
 """
 
 import os
 import time
-import json
-import requests
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from company_store import COMPANY_DB, STATUS_PENDING, CompanyStore
+from icon_index import default_index
+from etag_cache import EtagCache
+from logo_fetcher import LogoFetcher
+from metrics import Metrics
+from negative_cache import NegativeCache
+from report_sink import ReportSink
+from scheduler import Scheduler, company_values
+from sources import SourceOrchestrator, SourceStats
+from state_store import DownloadState
+from work_queue import WorkQueue
+
 # 配置
 LOGO_DIR = Path("logo")
 RECORD_FILE = LOGO_DIR / "logo_records.md"
-STATE_FILE = LOGO_DIR / "download_state.json"
-DURATION_HOURS = 4
+STATE_FILE = LOGO_DIR / "download_state.json"  # 旧格式快照，仅在退出时导出
+STATE_DB = LOGO_DIR / "download_state.db"
+STATUS_FILE = LOGO_DIR / "status.json"  # 运行指标，每隔几秒原子重写；python metrics.py 查看
+# 设了端口就在 127.0.0.1 上提供 /metrics（Prometheus 文本）和 /status（JSON）
+METRICS_PORT = os.environ.get("LOGO_METRICS_PORT")
+DURATION_HOURS = float(os.environ.get("LOGO_HOURS", "4"))
+# 同时处理的公司数；变体探测另有并发，per-host 上限见 LogoFetcher
+WORKERS = int(os.environ.get("LOGO_WORKERS", "8"))
+# 工作队列租约：进程挂掉后这么久任务回到队列，可被其他进程领走
+LEASE_SECONDS = 120
+# 各源都没有的公司隔一天再试；网络错误按队列的指数退避重试
+NOT_FOUND_RETRY = 24 * 3600
 START_TIME = datetime.now()
 END_TIME = START_TIME + timedelta(hours=DURATION_HOURS)
 
 # 确保目录存在
 LOGO_DIR.mkdir(exist_ok=True)
 
-# 数据源列表 - 按优先级排序
-SOURCES = [
-    {
-        "name": "simple-icons",
-        "type": "github",
-        "url": "https://api.github.com/repos/simple-icons/simple-icons/contents/icons",
-        "enabled": True
-    },
-    {
-        "name": "worldvectorlogo-search",
-        "type": "search",
-        "base_url": "https://worldvectorlogo.com/search/",
-        "enabled": False  # 需要特殊处理
-    }
-]
+# 数据源插件、URL 模板和按历史学到的优先级见 sources.py
 
 # 知名公司列表（作为备选）
 COMPANY_LIST = [
@@ -71,150 +78,190 @@ COMPANY_LIST = [
 ]
 
 
-def log(message):
-    """记录日志"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_msg = f"[{timestamp}] {message}"
-    print(log_msg)
-    with open(LOGO_DIR / "download.log", "a", encoding="utf-8") as f:
-        f.write(log_msg + "\n")
+def open_report():
+    """日志和记录表都经缓冲写入，按间隔或退出时落盘；用完要 close()"""
+    return ReportSink(LOGO_DIR / "download.log", RECORD_FILE)
 
 
-def load_state():
-    """加载下载状态"""
-    if STATE_FILE.exists():
-        with open(STATE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {"downloaded": [], "failed": [], "last_company_index": 0}
+def log(report, message):
+    """记录日志"""
+    report.log(message)
 
 
-def save_state(state):
-    """保存下载状态"""
-    with open(STATE_FILE, "w", encoding="utf-8") as f:
-        json.dump(state, f, indent=2)
+def open_state():
+    """打开下载状态库；首次运行会导入旧的 download_state.json"""
+    return DownloadState(STATE_DB, legacy_json=STATE_FILE)
 
 
-def init_markdown():
+def init_markdown(report):
     """初始化 markdown 记录文件"""
-    if not RECORD_FILE.exists():
-        with open(RECORD_FILE, "w", encoding="utf-8") as f:
-            f.write("# Logo 下载记录\n\n")
-            f.write(f"开始时间: {START_TIME.strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"计划结束: {END_TIME.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write("| 序号 | 公司名 | 文件名 | 来源 | 下载时间 | 状态 |\n")
-            f.write("|------|--------|--------|------|----------|------|\n")
+    report.init_records(
+        "# Logo 下载记录\n\n"
+        f"开始时间: {START_TIME.strftime('%Y-%m-%d %H:%M:%S')}\n"
+        f"计划结束: {END_TIME.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+        "| 序号 | 公司名 | 文件名 | 来源 | 下载时间 | 状态 |\n"
+        "|------|--------|--------|------|----------|------|\n"
+    )
 
 
-def update_markdown(index, company, filename, source, status):
+def update_markdown(report, index, company, filename, source, status):
     """更新 markdown 记录"""
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    with open(RECORD_FILE, "a", encoding="utf-8") as f:
-        f.write(f"| {index} | {company} | {filename} | {source} | {timestamp} | {status} |\n")
+    report.record(index, company, filename, source, status)
 
 
-def download_from_simple_icons(company, state):
-    """从 simple-icons 下载单个 logo"""
-    try:
-        # 转换公司名格式
-        icon_name = company.lower().replace(" ", "").replace("-", "").replace("&", "and")
-        
-        # 尝试直接下载
-        url = f"https://raw.githubusercontent.com/simple-icons/simple-icons/develop/icons/{icon_name}.svg"
-        response = requests.get(url, timeout=10)
-        
-        if response.status_code == 200:
-            filename = f"{company}.svg"
-            filepath = LOGO_DIR / filename
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(response.text)
-            return True, filename
-        
-        # 尝试其他常见变体
-        variants = [
-            company.lower().replace(" ", "").replace("&", "and"),
-            company.lower().replace(" ", "-").replace("&", "and"),
-            company.lower().replace("-", "").replace("&", "and"),
-        ]
-        
-        for variant in variants:
-            if variant == icon_name:
-                continue
-            url = f"https://raw.githubusercontent.com/simple-icons/simple-icons/develop/icons/{variant}.svg"
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                filename = f"{company}.svg"
-                filepath = LOGO_DIR / filename
-                with open(filepath, "w", encoding="utf-8") as f:
-                    f.write(response.text)
-                return True, filename
-        
-        return False, None
-    except Exception as e:
-        log(f"下载 {company} 失败: {e}")
-        return False, None
-
-
-def download_all_logos():
+def download_logo(company, orchestrator):
+    """按各源学到的优先级对冲抓取单个 logo，返回 (是否成功, 文件名, 来源)
+
+    各源都没有返回 (False, None, None)；全是网络错误直接抛出，由队列安排重试。
+    """
+    source, filename = orchestrator.fetch(company, LOGO_DIR)
+    return source is not None, filename, source
+
+
+def load_candidates():
+    """{公司: 价值}：重点名单，加上公司库（有的话）里还没拿到 logo 的公司"""
+    if not COMPANY_DB.exists():
+        return company_values(COMPANY_LIST)
+    with CompanyStore() as store:
+        return company_values(COMPANY_LIST, store, status=STATUS_PENDING)
+
+
+def download_all_logos(report):
     """主下载循环"""
-    state = load_state()
-    init_markdown()
+    state = open_state()
+    try:
+        init_markdown(report)
     
-    log(f"=== YOLO Logo Downloader 启动 ===")
-    log(f"开始时间: {START_TIME.strftime('%Y-%m-%d %H:%M:%S')}")
-    log(f"计划结束: {END_TIME.strftime('%Y-%m-%d %H:%M:%S')}")
-    log(f"目标: 下载尽可能多的 logo\n")
+        log(report, f"=== YOLO Logo Downloader 启动 ===")
+        log(report, f"开始时间: {START_TIME.strftime('%Y-%m-%d %H:%M:%S')}")
+        log(report, f"计划结束: {END_TIME.strftime('%Y-%m-%d %H:%M:%S')}")
+        log(report, f"目标: 下载尽可能多的 logo\n")
+        # 先在主线程建好索引，下载线程直接共用
+        log(report, f"simple-icons 本地索引: {len(default_index().slugs)} 个图标")
     
-    index = len(state["downloaded"]) + 1
-    start_idx = state.get("last_company_index", 0)
+        index = len(state.downloaded) + 1
     
-    for i, company in enumerate(COMPANY_LIST[start_idx:], start=start_idx):
-        # 检查是否超时
-        now = datetime.now()
-        if now >= END_TIME:
-            log(f"\n=== 时间到！已达到4小时限制 ===")
-            log(f"结束时间: {now.strftime('%Y-%m-%d %H:%M:%S')}")
-            break
-        
-        # 已下载则跳过
-        if company in state["downloaded"]:
-            continue
-        
-        # 更新进度
-        remaining = END_TIME - now
-        log(f"[{i+1}/{len(COMPANY_LIST)}] 下载 {company}... (剩余时间: {remaining})")
-        
-        # 下载
-        success, filename = download_from_simple_icons(company, state)
-        
-        if success:
-            state["downloaded"].append(company)
-            update_markdown(index, company, filename, "simple-icons", "✅ 成功")
-            log(f"  ✓ 成功: {filename}")
-            index += 1
-        else:
-            state["failed"].append(company)
-            update_markdown(index, company, "-", "simple-icons", "❌ 失败")
-            log(f"  ✗ 失败")
-        
-        state["last_company_index"] = i + 1
-        save_state(state)
-        
-        # 短暂延迟避免请求过快
-        time.sleep(0.5)
+        # 公司按调度器算的优先级从持久化队列领取，最多 WORKERS*2 个在途；结果在主线程里统一记账。
+        # 多个进程可以共用同一个库并行下载，中断后重启从队列里剩下的继续
+        pending = {}
+        timed_out = False
+        last_renew = time.monotonic()
+        candidates = load_candidates()
     
-    # 总结
-    log(f"\n=== 下载完成 ===")
-    log(f"成功: {len(state['downloaded'])}")
-    log(f"失败: {len(state['failed'])}")
-    log(f"记录文件: {RECORD_FILE}")
+        with Metrics(STATUS_FILE, deadline=END_TIME.timestamp()) as metrics, \
+                WorkQueue(STATE_DB, lease_seconds=LEASE_SECONDS) as queue, \
+                LogoFetcher(max_workers=WORKERS * 4) as fetcher, \
+                SourceStats(STATE_DB) as source_stats, \
+                NegativeCache(STATE_DB) as negative, \
+                EtagCache(STATE_DB) as etags, \
+                SourceOrchestrator(fetcher, source_stats, workers=WORKERS * 4,
+                                   negative=negative, etags=etags, metrics=metrics) as orchestrator, \
+                Scheduler(queue, source_stats, budget=(END_TIME - START_TIME).total_seconds(),
+                          sources=orchestrator.sources, negative=negative, path=STATE_DB) as scheduler, \
+                ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="company") as pool:
+            queue.enqueue(candidates, done=state.downloaded)
+            scheduler.prioritize(candidates)
+            log(report, f"待做 {len(queue.pending())} 家，按期望收益排序（预计耗时中位数 {scheduler.typical_cost:.1f}s）")
+            metrics.set("logo_queue_remaining", queue.remaining(before=scheduler.deadline))
+            if METRICS_PORT:
+                log(report, f"运行指标: http://127.0.0.1:{metrics.serve(int(METRICS_PORT))}/metrics")
+            log(report, f"状态文件: {STATUS_FILE}")
+            # 检查点：下载状态、各源统计、未命中缓存、日志都落盘，再记一笔本轮进度
+            flushables = (state, source_stats, negative, report)
+            stop_reason = "drained"
+            while True:
+                # 到点（或剩下的时间不够做完一家）就不再领新活，在途的做完再退出
+                now = datetime.now()
+                if not timed_out and scheduler.remaining() <= scheduler.typical_cost:
+                    log(report, f"\n=== 时间到！已达到{DURATION_HOURS}小时限制，等在途的 {len(pending)} 家做完 ===")
+                    log(report, f"结束时间: {now.strftime('%Y-%m-%d %H:%M:%S')}")
+                    timed_out = True
+                    stop_reason = "deadline"
+            
+                if not timed_out and len(pending) < WORKERS * 2:
+                    for company in scheduler.claim(WORKERS * 2 - len(pending)):
+                        log(report, f"下载 {company}... (剩余时间: {END_TIME - now})")
+                        metrics.company_started()
+                        pending[pool.submit(download_logo, company, orchestrator)] = company
+            
+                if not pending:
+                    if timed_out:
+                        break
+                    # 没有可领的任务：要么全做完了，要么都在等重试/别的进程的租约
+                    ready = queue.next_ready_at()
+                    if ready is None or ready - time.time() > scheduler.remaining():
+                        break
+                    time.sleep(max(0.1, min(ready - time.time(), scheduler.remaining())))
+                    continue
+            
+                done, _ = wait(pending, timeout=LEASE_SECONDS / 3, return_when=FIRST_COMPLETED)
+                for future in done:
+                    company = pending.pop(future)
+                    try:
+                        success, filename, source = future.result()
+                    except Exception as e:
+                        log(report, f"下载 {company} 失败: {e}")
+                        queue.fail(company, e)
+                        scheduler.record(False)
+                        metrics.company_finished(False, type(e).__name__)
+                        continue
+                
+                    scheduler.record(success)
+                    metrics.company_finished(success, None if success else "not_found")
+                    if success:
+                        queue.complete(company)
+                        state.mark_downloaded(company, filename)
+                        update_markdown(report, index, company, filename, source, "✅ 成功")
+                        log(report, f"  ✓ 成功: {filename}")
+                        index += 1
+                    else:
+                        queue.fail(company, "not found", retry_in=NOT_FOUND_RETRY)
+                        state.mark_failed(company)
+                        update_markdown(report, index, company, "-", "-", "❌ 失败")
+                        log(report, f"  ✗ 失败: {company}")
+                
+                    state.maybe_flush()
+                if done:
+                    metrics.set("logo_queue_remaining", queue.remaining(before=scheduler.deadline))
+            
+                # 还在跑的任务续租，免得被别的进程当成死任务领走
+                if time.monotonic() - last_renew >= LEASE_SECONDS / 3:
+                    for company in pending.values():
+                        queue.renew(company)
+                    last_renew = time.monotonic()
+                scheduler.tick(*flushables)
 
+            scheduler.stop(stop_reason, *flushables)
+            per_hour = scheduler.per_hour()
+            history = scheduler.history(limit=3)
+            stats = queue.stats()
+            sources_summary = source_stats.summary()
+            negative_skipped, negative_size = negative.skipped, negative.stats()
+    
+        # 总结
+        log(report, f"\n=== 下载完成 ===")
+        log(report, f"成功: {len(state.downloaded)}")
+        log(report, f"失败: {len(state.failed)}")
+        log(report, f"队列: {stats}")
+        log(report, f"产出: {per_hour:.1f} 个/小时（之前几次: "
+            f"{', '.join(f'{rate:.1f}' for *_, rate, _ in history) or '无'}）")
+        log(report, f"数据源: {sources_summary}")
+        log(report, f"未命中缓存: 跳过 {negative_skipped} 次请求，现有 {negative_size}")
+        log(report, f"记录文件: {RECORD_FILE}")
+        log(report, f"生成汇报: python report_sink.py")
+        log(report, f"检查更新: python etag_cache.py refresh | github")
+
+    finally:
+        # 中断或出错也会把未提交的批次写进库，并导出一份旧格式快照
+        state.export_json(STATE_FILE)
+        state.close()
+        report.flush()
 
 if __name__ == "__main__":
-    try:
-        download_all_logos()
-    except KeyboardInterrupt:
-        log("\n用户中断")
-        save_state(load_state())
-    except Exception as e:
-        log(f"\n发生错误: {e}")
-        save_state(load_state())
+    with open_report() as report:
+        try:
+            download_all_logos(report)
+        except KeyboardInterrupt:
+            log(report, "\n用户中断")
+        except Exception as e:
+            log(report, f"\n发生错误: {e}")
@@ -6,6 +6,8 @@
 from PIL import Image, ImageDraw, ImageFont
 import os
 
+from layout import editor_layout, solve
+
 # 暗黑金配色方案
 COLORS = {
     'bg_primary': '#0F172A',      # 深空黑
@@ -30,6 +32,8 @@ class DarkGoldEditor:
     def __init__(self, width=1400, height=900):
         self.width = width
         self.height = height
+        # 面板矩形统一从布局求解（本版状态栏 24px，行号区 50px）
+        self.layout = solve(editor_layout(gutter=50, status=24), width, height)
         self.img = Image.new('RGB', (width, height), hex_to_rgb(COLORS['bg_primary']))
         self.draw = ImageDraw.Draw(self.img)
         
@@ -59,7 +63,7 @@ class DarkGoldEditor:
     
     def draw_title_bar(self):
         """绘制标题栏（含红绿灯按钮）"""
-        title_height = 38
+        title_height = self.layout['title_bar'].h
         
         # 标题栏背景
         self.draw.rectangle(
@@ -106,10 +110,7 @@ class DarkGoldEditor:
     
     def draw_left_panel(self):
         """绘制左侧空间导航面板"""
-        panel_width = 220
-        panel_x = 0
-        panel_y = 38
-        panel_h = self.height - 38 - 24  # 减去标题栏和状态栏
+        panel_x, panel_y, panel_width, panel_h = self.layout['left_panel']
         
         # 面板背景
         self.draw.rectangle(
@@ -165,8 +166,7 @@ class DarkGoldEditor:
     
     def draw_tab_bar(self, left_w):
         """绘制标签栏"""
-        tab_y = 38
-        tab_h = 36
+        tab_y, tab_h = self.layout['tab_bar'].y, self.layout['tab_bar'].h
         
         # 标签栏背景
         self.draw.rectangle(
@@ -214,8 +214,9 @@ class DarkGoldEditor:
     
     def draw_editor_area(self, left_w):
         """绘制代码编辑区"""
-        editor_y = 74  # 38 + 36
-        editor_h = self.height - editor_y - 70  # 减去命令栏和状态栏
+        editor = self.layout['editor']
+        editor_y, editor_h = editor.y, editor.h
+        right_x = self.layout['right_panel'].x
         
         # 编辑区背景
         self.draw.rectangle(
@@ -224,7 +225,7 @@ class DarkGoldEditor:
         )
         
         # 行号区
-        line_num_w = 50
+        line_num_w = self.layout['gutter'].w
         self.draw.rectangle(
             [(left_w, editor_y), (left_w + line_num_w, editor_y + editor_h)],
             fill=hex_to_rgb(COLORS['bg_primary'])
@@ -256,7 +257,7 @@ class DarkGoldEditor:
             # 当前行金边高亮
             if is_current:
                 self.draw.rectangle(
-                    [(left_w, y - 2), (self.width - 280, y + 20)],
+                    [(left_w, y - 2), (right_x, y + 20)],
                     fill=hex_to_rgb('#1E293B')
                 )
                 # 左金边
@@ -266,7 +267,7 @@ class DarkGoldEditor:
                     width=3
                 )
                 # 水流光带效果
-                for i in range(0, self.width - 280 - left_w - 100, 200):
+                for i in range(0, right_x - left_w - 100, 200):
                     self.draw.line(
                         [(left_w + i, y + 9), (left_w + i + 50, y + 9)],
                         fill=hex_to_rgb(COLORS['accent_primary']),
@@ -298,10 +299,7 @@ class DarkGoldEditor:
     
     def draw_right_panel(self):
         """绘制右侧面板"""
-        panel_w = 280
-        panel_x = self.width - panel_w
-        panel_y = 74
-        panel_h = self.height - panel_y - 70
+        panel_x, panel_y, panel_w, panel_h = self.layout['right_panel']
         
         # 面板背景
         self.draw.rectangle(
@@ -351,25 +349,25 @@ class DarkGoldEditor:
     
     def draw_command_bar(self, left_w):
         """绘制底部命令栏（含水流特效）"""
-        bar_y = self.height - 70
-        bar_h = 46
+        bar = self.layout['command_bar']
+        bar_y, bar_h, bar_right = bar.y, bar.h, bar.right
         
         # 命令栏背景
         self.draw.rectangle(
-            [(left_w, bar_y), (self.width - 280, bar_y + bar_h)],
+            [(left_w, bar_y), (bar_right, bar_y + bar_h)],
             fill=hex_to_rgb(COLORS['bg_secondary'])
         )
         
         # 顶部边框
         self.draw.line(
-            [(left_w, bar_y), (self.width - 280, bar_y)],
+            [(left_w, bar_y), (bar_right, bar_y)],
             fill=hex_to_rgb(COLORS['bg_tertiary']),
             width=1
         )
         
         # 水流光带效果
         stream_y = bar_y + 1
-        for i in range(0, self.width - 280 - left_w, 300):
+        for i in range(0, bar_right - left_w, 300):
             # 光带
             gradient_w = 100
             for j in range(gradient_w):
@@ -403,8 +401,7 @@ class DarkGoldEditor:
     
     def draw_status_bar(self):
         """绘制状态栏"""
-        bar_y = self.height - 24
-        bar_h = 24
+        bar_y, bar_h = self.layout['status_bar'].y, self.layout['status_bar'].h
         
         # 状态栏背景
         self.draw.rectangle(
@@ -7,6 +7,12 @@
 from PIL import Image, ImageDraw, ImageFont
 import math
 import random
+import sys
+
+from geometry import prepare_polyline, sample_curve
+from image_output import default_writer, writer_from_args
+from layout import editor_layout, solve
+from vector_export import VectorRecorder
 
 def hex_to_rgb(hex_color):
     hex_color = hex_color.lstrip('#')
@@ -26,23 +32,14 @@ class ExtendedStyles:
     def __init__(self, width=1400, height=900):
         self.width = width
         self.height = height
-        # 文字区域定义 (x, y, w, h) - 这些区域纹理要稀疏
-        self.text_zones = [
-            (0, 0, 220, 900),      # 左侧 Explorer
-            (220, 38, 900, 36),    # 标签栏
-            (220, 74, 60, 760),    # 行号区
-            (280, 74, 840, 760),   # 代码编辑区
-            (1120, 74, 280, 760),  # 右侧 Context
-            (220, 834, 900, 46),   # 命令栏
-            (0, 880, 1400, 20),    # 状态栏
-        ]
+        # 文字区域 - 这些区域纹理要稀疏，矩形直接取自编辑器布局
+        layout = solve(editor_layout(), width, height)
+        self.text_zones = [layout[name] for name in
+                           ('left_panel', 'tab_bar', 'gutter', 'code', 'right_panel', 'command_bar', 'status_bar')]
     
     def is_in_text_zone(self, x, y):
         """检查点是否在文字区域内"""
-        for zx, zy, zw, zh in self.text_zones:
-            if zx <= x <= zx + zw and zy <= y <= zy + zh:
-                return True
-        return False
+        return any(zone.contains(x, y) for zone in self.text_zones)
     
     def create_base(self):
         img = Image.new('RGB', (self.width, self.height), hex_to_rgb(COLORS['bg_primary']))
@@ -119,8 +116,8 @@ class ExtendedStyles:
                 if len(points) > 1:
                     brightness = random.uniform(0.3, 0.6)
                     color = tuple(int(c * brightness) for c in hex_to_rgb(COLORS['accent_primary']))
-                    for j in range(len(points) - 1):
-                        draw.line([points[j], points[j+1]], fill=color, width=1)
+                    for run in prepare_polyline(points, self.width, self.height):
+                        draw.line(run, fill=color, width=1)
     
     # ===== 风格13: 水波纹/涟漪 =====
     def draw_ripple(self, draw):
@@ -129,25 +126,21 @@ class ExtendedStyles:
         
         for cx, cy in centers:
             for radius in range(30, 300, 25):
-                points = []
-                for angle in [i * 0.1 for i in range(63)]:
-                    x = cx + int(radius * math.cos(angle))
-                    y = cy + int(radius * math.sin(angle))
-                    
-                    # 波纹变形
-                    x += int(10 * math.sin(angle * 5))
-                    y += int(10 * math.cos(angle * 5))
-                    
-                    if not self.is_in_text_zone(x, y):
-                        points.append((x, y))
+                # 波纹变形，按曲率自适应采样
+                def ripple(angle, cx=cx, cy=cy, radius=radius):
+                    return (cx + radius * math.cos(angle) + 10 * math.sin(angle * 5),
+                            cy + radius * math.sin(angle) + 10 * math.cos(angle * 5))
+                
+                points = [(x, y) for x, y in sample_curve(ripple, 0, 6.2)
+                          if not self.is_in_text_zone(x, y)]
                 
                 if len(points) > 5:
                     alpha = max(0.2, 1 - radius / 300)
                     brightness = 0.5 * alpha
                     color = tuple(int(c * brightness) for c in hex_to_rgb(COLORS['accent_highlight']))
                     
-                    for j in range(len(points) - 1):
-                        draw.line([points[j], points[j+1]], fill=color, width=1)
+                    for run in prepare_polyline(points, self.width, self.height):
+                        draw.line(run, fill=color, width=1)
     
     # ===== 风格14: 羽毛/毛发 =====
     def draw_feather(self, draw):
@@ -214,26 +207,24 @@ class ExtendedStyles:
                 if len(points) > 1:
                     brightness = random.uniform(0.3, 0.6)
                     color = tuple(int(c * brightness) for c in hex_to_rgb(COLORS['accent_primary']))
-                    draw.line(points, fill=color, width=1)
+                    for run in prepare_polyline(points, self.width, self.height):
+                        draw.line(run, fill=color, width=1)
             
             # 同心圆（变形）
             for radius in range(40, 220, 40):
-                points = []
-                for angle in [i * 0.05 for i in range(126)]:
-                    x = cx + int(radius * math.cos(angle))
-                    y = cy + int(radius * math.sin(angle))
-                    
-                    # 蛛网下垂变形
-                    y += int(20 * math.sin(angle * 3))
-                    
-                    if not self.is_in_text_zone(x, y):
-                        points.append((x, y))
+                # 蛛网下垂变形，按曲率自适应采样
+                def web(angle, cx=cx, cy=cy, radius=radius):
+                    return (cx + radius * math.cos(angle),
+                            cy + radius * math.sin(angle) + 20 * math.sin(angle * 3))
+                
+                points = [(x, y) for x, y in sample_curve(web, 0, 6.25)
+                          if not self.is_in_text_zone(x, y)]
                 
                 if len(points) > 5:
                     brightness = random.uniform(0.25, 0.5)
                     color = tuple(int(c * brightness) for c in hex_to_rgb(COLORS['accent_highlight']))
-                    for j in range(len(points) - 1):
-                        draw.line([points[j], points[j+1]], fill=color, width=1)
+                    for run in prepare_polyline(points, self.width, self.height):
+                        draw.line(run, fill=color, width=1)
     
     # ===== 风格16: 电路板 =====
     def draw_circuit(self, draw):
@@ -400,7 +391,8 @@ class ExtendedStyles:
                     color = tuple(int(c * brightness) for c in hex_to_rgb(COLORS['accent_secondary']))
                     draw.line([(x, y), (ex, ey)], fill=color, width=1)
     
-    def generate_all(self):
+    def generate_all(self, writer=None, vector_formats=()):
+        """生成所有风格；vector_formats 如 ('svg', 'pdf') 时同时导出矢量稿"""
         styles = [
             ("extended1_explosion", self.draw_explosion),
             ("extended2_galaxy", self.draw_galaxy),
@@ -414,15 +406,24 @@ class ExtendedStyles:
             ("extended10_dandelion", self.draw_dandelion),
         ]
         
-        for name, draw_fn in styles:
-            img, draw = self.create_base()
-            draw_fn(draw)
-            
-            filename = f"macos_editor_{name}.png"
-            img.save(filename)
-            print(f"✅ 已生成: {filename}")
+        # 没传 writer（旧的 generate_all() 调用）就用默认的 PNG 输出，写完再返回
+        with default_writer(writer) as writer:
+            for name, draw_fn in styles:
+                img, draw = self.create_base()
+                if vector_formats:
+                    draw = VectorRecorder(draw, (self.width, self.height), COLORS['bg_primary'])
+                draw_fn(draw)
+                
+                # 交给后台写盘，马上开始渲染下一张
+                writer.save(img, f"macos_editor_{name}.png")
+                
+                for fmt in vector_formats:
+                    draw.save(f"macos_editor_{name}.{fmt}")
 
 if __name__ == "__main__":
     from PIL import Image, ImageDraw
     styles = ExtendedStyles()
-    styles.generate_all()
+    # 用法: python draw_editor_extended_styles.py [svg] [pdf] [--fast|--small|--webp|--qoi] [--sync]
+    writer, vector_formats = writer_from_args(sys.argv[1:])
+    with writer:
+        styles.generate_all(writer, vector_formats=tuple(vector_formats))
@@ -6,6 +6,9 @@
 from PIL import Image, ImageDraw, ImageFont
 import math
 import random
+import sys
+
+from image_output import default_writer, writer_from_args
 
 def hex_to_rgb(hex_color):
     hex_color = hex_color.lstrip('#')
@@ -229,7 +232,7 @@ class HybridStyles:
             color = tuple(int(c * brightness) for c in hex_to_rgb(COLORS['accent_highlight']))
             draw.line([(x, y), (end_x, end_y)], fill=color, width=1)
     
-    def generate_all(self):
+    def generate_all(self, writer=None):
         styles = [
             ("hybrid1_crack_organic", self.draw_crack_organic),
             ("hybrid2_geyao_vine", self.draw_geyao_vine),
@@ -238,15 +241,19 @@ class HybridStyles:
             ("hybrid5_crack_geyao", self.draw_crack_geyao),
         ]
         
-        for name, draw_fn in styles:
-            img, draw = self.create_base()
-            draw_fn(draw)
-            
-            filename = f"macos_editor_{name}.png"
-            img.save(filename)
-            print(f"✅ 已生成: {filename}")
+        # 没传 writer（旧的 generate_all() 调用）就用默认的 PNG 输出，写完再返回
+        with default_writer(writer) as writer:
+            for name, draw_fn in styles:
+                img, draw = self.create_base()
+                draw_fn(draw)
+                
+                # 交给后台写盘，马上开始渲染下一张
+                writer.save(img, f"macos_editor_{name}.png")
 
 if __name__ == "__main__":
     from PIL import Image, ImageDraw, ImageFont
     hybrid = HybridStyles()
-    hybrid.generate_all()
+    # 用法: python draw_editor_hybrid.py [--fast|--small|--webp|--qoi] [--sync]
+    writer, _ = writer_from_args(sys.argv[1:])
+    with writer:
+        hybrid.generate_all(writer)
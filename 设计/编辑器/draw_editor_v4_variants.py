@@ -7,6 +7,10 @@
 from PIL import Image, ImageDraw, ImageFont
 import math
 import random
+import sys
+
+from geometry import prepare_polyline
+from image_output import default_writer, writer_from_args
 
 # 暗黑金配色
 COLORS = {
@@ -172,7 +176,9 @@ class EditorVariant:
                     hex_to_rgb(COLORS['accent_highlight']),
                     intensity * random.uniform(0.5, 1.0)
                 )
-                draw.line(points, fill=color, width=width)
+                # 随机游走里的近重复点先合并掉
+                for run in prepare_polyline(points, self.width, self.height):
+                    draw.line(run, fill=color, width=width)
     
     # ========== 变体 4: 有机流动细线 ==========
     def draw_organic_flow(self, draw, intensity=0.07):
@@ -419,7 +425,7 @@ class EditorVariant:
             x += (bbox[2] - bbox[0]) + 25
     
     # ========== 生成各版本 ==========
-    def generate_all(self):
+    def generate_all(self, writer=None):
         """生成所有变体"""
         variants = [
             ("variant1_snake", self.draw_snake_lines, 0.08),
@@ -429,23 +435,26 @@ class EditorVariant:
             ("variant5_mixed", self.draw_mixed_style, None),
         ]
         
-        for name, draw_fn, intensity in variants:
-            img, draw = self.create_base()
-            
-            # 绘制背景线条
-            if intensity:
-                draw_fn(draw, intensity)
-            else:
-                draw_fn(draw)
-            
-            # 绘制UI
-            self.draw_ui(draw)
-            
-            # 保存
-            filename = f"macos_editor_{name}.png"
-            img.save(filename)
-            print(f"✅ 已生成: {filename}")
+        # 没传 writer（旧的 generate_all() 调用）就用默认的 PNG 输出，写完再返回
+        with default_writer(writer) as writer:
+            for name, draw_fn, intensity in variants:
+                img, draw = self.create_base()
+                
+                # 绘制背景线条
+                if intensity:
+                    draw_fn(draw, intensity)
+                else:
+                    draw_fn(draw)
+                
+                # 绘制UI
+                self.draw_ui(draw)
+                
+                # 保存（后台写盘，马上开始渲染下一张）
+                writer.save(img, f"macos_editor_{name}.png")
 
 if __name__ == "__main__":
     editor = EditorVariant(seed=42)
-    editor.generate_all()
+    # 用法: python draw_editor_v4_variants.py [--fast|--small|--webp|--qoi] [--sync]
+    writer, _ = writer_from_args(sys.argv[1:])
+    with writer:
+        editor.generate_all(writer)
@@ -7,6 +7,13 @@
 from PIL import Image, ImageDraw, ImageFont
 import math
 import random
+import sys
+
+from geometry import segment_visible
+from image_output import writer_from_args
+from incremental import DirtyTracker
+from layout import editor_layout, solve
+from vector_export import VectorRecorder
 
 random.seed(2024)
 
@@ -34,6 +41,8 @@ class ElegantEditor:
     def __init__(self, width=1400, height=900):
         self.width = width
         self.height = height
+        # 面板矩形统一从布局求解
+        self.layout = solve(editor_layout(), width, height)
         self.img = Image.new('RGB', (width, height), hex_to_rgb(COLORS['bg_primary']))
         self.draw = ImageDraw.Draw(self.img)
         
@@ -47,6 +56,47 @@ class ElegantEditor:
             self.font_medium = ImageFont.load_default()
             self.font_small = ImageFont.load_default()
             self.font_code = ImageFont.load_default()
+        
+        # 组件状态
+        self.title = "Golden Editor"
+        self.files = [("  main.js", True), ("  utils.js", False), ("  config.js", False)]
+        self.active_tab = "main.js"
+        self.lines = [
+            ("1", "import { useState } from 'react';", '#F59E0B'),
+            ("2", "", COLORS['text_secondary']),
+            ("3", "function App() {", '#F59E0B'),
+            ("4", "  const [count, setCount] = useState(0);", COLORS['text_primary'], True),
+            ("5", "", COLORS['text_secondary']),
+            ("6", "  return (", COLORS['text_secondary']),
+            ("7", "    <div className='app'>", COLORS['text_secondary']),
+        ]
+        self.context_title = "AI Assistant"
+        self.command = 'git commit -m "feat: add counter"'
+        self.status_items = ["Ln 4, Col 15", "UTF-8", "JavaScript", "🌙 暗黑", "⎋ LEAP"]
+        
+        # 绘制顺序即叠放顺序
+        self.tracker = DirtyTracker([
+            ('title_bar', self.draw_title_bar),
+            ('left_panel', self.draw_left_panel),
+            ('tab_bar', self.draw_tab_bar),
+            ('editor', self.draw_editor_lines),
+            ('right_panel', self.draw_right_panel),
+            ('command_bar', self.draw_command_bar),
+            ('status_bar', self.draw_status_bar),
+        ], (width, height), regions=self._regions())
+    
+    def _regions(self):
+        """组件名 -> 布局矩形，脏区域至少覆盖整个面板"""
+        names = ['title_bar', 'left_panel', 'tab_bar', 'editor', 'right_panel', 'command_bar', 'status_bar']
+        return {name: self.layout[name].box for name in names}
+    
+    def resize(self, width, height):
+        """改尺寸：重新求解一次布局，然后整图重画"""
+        self.width, self.height = width, height
+        self.layout = solve(editor_layout(), width, height)
+        self.img = Image.new('RGB', (width, height), hex_to_rgb(COLORS['bg_primary']))
+        self.draw = ImageDraw.Draw(self.img)
+        self.tracker.resize((width, height), self._regions())
     
     def draw_elegant_texture(self):
         """优雅的纹理 - 密度适中，分布均匀"""
@@ -80,7 +130,9 @@ class ElegantEditor:
                 
                 for j in range(len(points) - 1):
                     w = width if random.random() < 0.7 else width + 1
-                    self.draw.line([points[j], points[j+1]], fill=color, width=w)
+                    # 坐标允许越界 150px，画布外的线段直接跳过（随机数照常消耗，画面不变）
+                    if segment_visible(points[j], points[j+1], self.width, self.height, margin=w):
+                        self.draw.line([points[j], points[j+1]], fill=color, width=w)
                 
                 # 少量膨胀节点
                 for j in range(3, len(points) - 3, random.randint(4, 7)):
@@ -144,87 +196,88 @@ class ElegantEditor:
                 color = tuple(int(c * brightness) for c in hex_to_rgb(COLORS['accent_highlight']))
                 self.draw.line(points, fill=color, width=1)
     
-    def draw_ui(self):
-        """UI - 融合边界，只用单一边线"""
-        
+    # ===== UI 组件：每个组件只读自己的状态，用传入的 draw 按绝对坐标绘制 =====
+    
+    def draw_title_bar(self, draw):
+        title = self.layout['title_bar']
         # 标题栏 - 只用底线
-        self.draw.line([(0, 38), (self.width, 38)], fill=hex_to_rgb('#1E293B'), width=38)
+        draw.line([(0, title.bottom), (self.width, title.bottom)], fill=hex_to_rgb('#1E293B'), width=title.h)
         
         # 红绿灯按钮
         for x, c in [(20, COLORS['traffic_red']), (40, COLORS['traffic_yellow']), (60, COLORS['traffic_green'])]:
-            self.draw.ellipse([(x-6, 13), (x+6, 25)], fill=hex_to_rgb(c))
-        
-        self.draw.text((650, 10), "Golden Editor", font=self.font_medium, fill=hex_to_rgb(COLORS['text_secondary']))
+            draw.ellipse([(x-6, 13), (x+6, 25)], fill=hex_to_rgb(c))
         
+        draw.text((650, 10), self.title, font=self.font_medium, fill=hex_to_rgb(COLORS['text_secondary']))
+    
+    def draw_left_panel(self, draw):
+        panel = self.layout['left_panel']
         # 左侧面板 - 只用右边线（金线）
-        left_w = 220
-        self.draw.line([(left_w, 38), (left_w, self.height-20)], fill=hex_to_rgb(COLORS['accent_primary']), width=1)
+        left_w = panel.right
+        draw.line([(left_w, panel.y), (left_w, panel.bottom)], fill=hex_to_rgb(COLORS['accent_primary']), width=1)
         
         # Explorer 标签
-        self.draw.text((15, 53), "EXPLORER", font=self.font_small, fill=hex_to_rgb(COLORS['text_muted']))
+        draw.text((15, panel.y+15), "EXPLORER", font=self.font_small, fill=hex_to_rgb(COLORS['text_muted']))
         
         # 文件项
-        files = [("  main.js", True), ("  utils.js", False), ("  config.js", False)]
-        y = 83
-        for name, active in files:
+        y = panel.y + 45
+        for name, active in self.files:
             if active:
                 # 只用底线和左边线
-                self.draw.line([(0, y+22), (left_w, y+22)], fill=hex_to_rgb(COLORS['accent_primary']), width=2)
-                self.draw.line([(0, y-3), (0, y+22)], fill=hex_to_rgb(COLORS['accent_primary']), width=3)
+                draw.line([(0, y+22), (left_w, y+22)], fill=hex_to_rgb(COLORS['accent_primary']), width=2)
+                draw.line([(0, y-3), (0, y+22)], fill=hex_to_rgb(COLORS['accent_primary']), width=3)
                 color = COLORS['text_primary']
             else:
                 color = COLORS['text_secondary']
             
-            self.draw.text((15, y), name, font=self.font_medium, fill=hex_to_rgb(color))
+            draw.text((15, y), name, font=self.font_medium, fill=hex_to_rgb(color))
             y += 28
-        
+    
+    def draw_tab_bar(self, draw):
+        bar = self.layout['tab_bar']
+        left_w = bar.x
         # 标签栏 - 只用底线
-        self.draw.line([(left_w, 74), (self.width-280, 74)], fill=hex_to_rgb('#334155'), width=1)
+        draw.line([(left_w, bar.bottom), (bar.right, bar.bottom)], fill=hex_to_rgb('#334155'), width=1)
         
         # 当前标签 - 顶线金边
-        self.draw.line([(left_w+10, 43), (left_w+130, 43)], fill=hex_to_rgb(COLORS['accent_primary']), width=3)
-        self.draw.rectangle([(left_w+10, 43), (left_w+130, 74)], fill=hex_to_rgb(COLORS['bg_secondary']))
-        self.draw.text((left_w+22, 52), "main.js", font=self.font_medium, fill=hex_to_rgb(COLORS['text_primary']))
-        
+        draw.line([(left_w+10, bar.y+5), (left_w+130, bar.y+5)], fill=hex_to_rgb(COLORS['accent_primary']), width=3)
+        draw.rectangle([(left_w+10, bar.y+5), (left_w+130, bar.bottom)], fill=hex_to_rgb(COLORS['bg_secondary']))
+        draw.text((left_w+22, bar.y+14), self.active_tab, font=self.font_medium, fill=hex_to_rgb(COLORS['text_primary']))
+    
+    def draw_editor_lines(self, draw):
+        gutter, code_area = self.layout['gutter'], self.layout['code']
+        left_w = gutter.x
         # 编辑区 - 当前行金边
-        editor_h = self.height - 140
-        
-        lines = [
-            ("1", "import { useState } from 'react';", '#F59E0B'),
-            ("2", "", COLORS['text_secondary']),
-            ("3", "function App() {", '#F59E0B'),
-            ("4", "  const [count, setCount] = useState(0);", COLORS['text_primary'], True),
-            ("5", "", COLORS['text_secondary']),
-            ("6", "  return (", COLORS['text_secondary']),
-            ("7", "    <div className='app'>", COLORS['text_secondary']),
-        ]
-        
-        y = 94
-        for num, code, color, *rest in lines:
+        y = code_area.y + 20
+        for num, code, color, *rest in self.lines:
             is_current = rest[0] if rest else False
             if is_current:
                 # 左金边 + 底线
-                self.draw.line([(left_w, y-3), (left_w, y+24)], fill=hex_to_rgb(COLORS['accent_primary']), width=4)
-                self.draw.line([(left_w, y+24), (self.width-280, y+24)], fill=hex_to_rgb(COLORS['accent_primary']), width=1)
+                draw.line([(left_w, y-3), (left_w, y+24)], fill=hex_to_rgb(COLORS['accent_primary']), width=4)
+                draw.line([(left_w, y+24), (code_area.right, y+24)], fill=hex_to_rgb(COLORS['accent_primary']), width=1)
             
-            self.draw.text((left_w+45, y), num, font=self.font_small,
-                          fill=hex_to_rgb(COLORS['accent_primary'] if is_current else COLORS['text_muted']))
-            self.draw.text((left_w+75, y), code, font=self.font_code, fill=hex_to_rgb(color))
+            draw.text((gutter.x+45, y), num, font=self.font_small,
+                      fill=hex_to_rgb(COLORS['accent_primary'] if is_current else COLORS['text_muted']))
+            draw.text((code_area.x+15, y), code, font=self.font_code, fill=hex_to_rgb(color))
             y += 26
-        
+    
+    def draw_right_panel(self, draw):
+        panel = self.layout['right_panel']
         # 右侧面板 - 只用左边线
-        right_x = self.width - 280
-        self.draw.line([(right_x, 74), (right_x, 74+editor_h)], fill=hex_to_rgb(COLORS['accent_primary']), width=1)
-        self.draw.text((right_x+15, 89), "CONTEXT", font=self.font_small, fill=hex_to_rgb(COLORS['text_muted']))
+        right_x = panel.x
+        draw.line([(right_x, panel.y), (right_x, panel.bottom)], fill=hex_to_rgb(COLORS['accent_primary']), width=1)
+        draw.text((right_x+15, panel.y+15), "CONTEXT", font=self.font_small, fill=hex_to_rgb(COLORS['text_muted']))
         
         # AI卡片 - 只用底线
-        self.draw.line([(right_x+10, 194), (self.width-10, 194)], fill=hex_to_rgb(COLORS['accent_primary']), width=1)
-        self.draw.rectangle([(right_x+10, 119), (self.width-10, 194)], fill=hex_to_rgb(COLORS['bg_tertiary']))
-        self.draw.text((right_x+20, 148), "AI Assistant", font=self.font_medium, fill=hex_to_rgb(COLORS['accent_primary']))
-        
+        card_y = panel.y + 45
+        draw.line([(right_x+10, card_y+75), (panel.right-10, card_y+75)], fill=hex_to_rgb(COLORS['accent_primary']), width=1)
+        draw.rectangle([(right_x+10, card_y), (panel.right-10, card_y+75)], fill=hex_to_rgb(COLORS['bg_tertiary']))
+        draw.text((right_x+20, card_y+29), self.context_title, font=self.font_medium, fill=hex_to_rgb(COLORS['accent_primary']))
+    
+    def draw_command_bar(self, draw):
+        bar = self.layout['command_bar']
+        left_w, bar_y = bar.x, bar.y
         # 命令栏 - 只用顶线
-        bar_y = self.height - 66
-        self.draw.line([(left_w, bar_y), (self.width-280, bar_y)], fill=hex_to_rgb('#334155'), width=1)
+        draw.line([(left_w, bar_y), (bar.right, bar_y)], fill=hex_to_rgb('#334155'), width=1)
         
         # 水流特效（适度）
         for i in range(15):
@@ -235,33 +288,66 @@ class ElegantEditor:
                 base_rgb = hex_to_rgb(COLORS['accent_highlight'])
                 color = tuple(int(c * alpha + hex_to_rgb('#1E293B')[i] * (1-alpha))
                              for i, c in enumerate(base_rgb))
-                self.draw.ellipse([(x-r, y-r), (x+3+r, y+r)], fill=color)
-        
-        self.draw.text((left_w+15, bar_y+12), ">", font=self.font_large, fill=hex_to_rgb(COLORS['accent_primary']))
-        self.draw.text((left_w+35, bar_y+14), 'git commit -m "feat: add counter"', 
-                      font=self.font_medium, fill=hex_to_rgb(COLORS['text_primary']))
+                draw.ellipse([(x-r, y-r), (x+3+r, y+r)], fill=color)
         
+        draw.text((left_w+15, bar_y+12), ">", font=self.font_large, fill=hex_to_rgb(COLORS['accent_primary']))
+        draw.text((left_w+35, bar_y+14), self.command,
+                  font=self.font_medium, fill=hex_to_rgb(COLORS['text_primary']))
+    
+    def draw_status_bar(self, draw):
+        bar = self.layout['status_bar']
         # 状态栏 - 只用顶线
-        self.draw.line([(0, self.height-20), (self.width, self.height-20)], fill=hex_to_rgb(COLORS['accent_primary']), width=2)
-        self.draw.rectangle([(0, self.height-20), (self.width, self.height)], fill=hex_to_rgb(COLORS['accent_primary']))
+        draw.line([(0, bar.y), (bar.right, bar.y)], fill=hex_to_rgb(COLORS['accent_primary']), width=2)
+        draw.rectangle([(0, bar.y), (bar.right, bar.bottom)], fill=hex_to_rgb(COLORS['accent_primary']))
         
-        items = ["Ln 4, Col 15", "UTF-8", "JavaScript", "🌙 暗黑", "⎋ LEAP"]
         x = 15
-        for item in items:
-            self.draw.text((x, self.height-16), item, font=self.font_small, fill=hex_to_rgb('#0F172A'))
-            bbox = self.draw.textbbox((0, 0), item, font=self.font_small)
+        for item in self.status_items:
+            draw.text((x, bar.y+4), item, font=self.font_small, fill=hex_to_rgb('#0F172A'))
+            bbox = draw.textbbox((0, 0), item, font=self.font_small)
             x += (bbox[2]-bbox[0]) + 25
     
-    def render(self):
+    def draw_ui(self):
+        """UI - 融合边界，只用单一边线"""
+        self.tracker.render_full(self.img, self.draw)
+    
+    def update(self, component, **state):
+        """修改组件状态并标脏，例如 update('status_bar', status_items=[...])"""
+        for key, value in state.items():
+            setattr(self, key, value)
+        self.tracker.mark(component)
+    
+    def render_dirty(self):
+        """只重绘变化的组件所在区域，返回重绘的矩形"""
+        return self.tracker.recomposite(self.img)
+    
+    def render(self, record=False):
+        """record 为真时同时记录笔画供 save_vector 导出；只要 PNG 就不付记录的开销"""
+        if record:
+            # 矢量导出和 PNG 共用同一份绘制
+            self.draw = VectorRecorder(ImageDraw.Draw(self.img), (self.width, self.height), COLORS['bg_primary'])
         self.draw_elegant_texture()
         self.draw_ui()
         return self.img
     
-    def save(self, filename="macos_editor_v9_elegant.png"):
-        self.img.save(filename)
-        print(f"✅ 已保存: {filename}")
+    def save(self, filename="macos_editor_v9_elegant.png", writer=None):
+        if writer is None:
+            self.img.save(filename)
+            print(f"✅ 已保存: {filename}")
+            return filename
+        return writer.save(self.img, filename)
+    
+    def save_vector(self, filename="macos_editor_v9_elegant.svg"):
+        """导出 SVG / PDF（按扩展名）；需要先 render(record=True)，update 过的组件按当前状态导出"""
+        if not isinstance(self.draw, VectorRecorder):
+            raise RuntimeError("没有记录笔画，先调用 render(record=True)")
+        return self.tracker.vector().save(filename)
 
 if __name__ == "__main__":
+    # 用法: python draw_editor_v9_elegant.py [svg] [pdf] [--fast|--small|--webp|--qoi]
+    writer, vector_formats = writer_from_args(sys.argv[1:])
     editor = ElegantEditor()
-    editor.render()
-    editor.save()
+    editor.render(record=bool(vector_formats))
+    with writer:
+        editor.save(writer=writer)
+    for fmt in vector_formats:
+        editor.save_vector(f"macos_editor_v9_elegant.{fmt}")
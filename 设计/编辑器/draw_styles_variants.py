@@ -6,6 +6,9 @@
 from PIL import Image, ImageDraw, ImageFont
 import math
 import random
+import sys
+
+from image_output import default_writer, writer_from_args
 
 def hex_to_rgb(hex_color):
     hex_color = hex_color.lstrip('#')
@@ -277,7 +280,7 @@ class StyleVariants:
         img = Image.new('RGB', (self.width, self.height), hex_to_rgb(COLORS['bg_primary']))
         return img, ImageDraw.Draw(img)
     
-    def generate_all(self):
+    def generate_all(self, writer=None):
         """生成所有风格"""
         styles = [
             ("style1_crack", self.draw_crack_style),
@@ -287,14 +290,18 @@ class StyleVariants:
             ("style5_lightning", self.draw_lightning_style),
         ]
         
-        for name, draw_fn in styles:
-            img, draw = self.create_base_image()
-            draw_fn(draw)
-            
-            filename = f"macos_editor_{name}.png"
-            img.save(filename)
-            print(f"✅ 已生成: {filename}")
+        # 没传 writer（旧的 generate_all() 调用）就用默认的 PNG 输出，写完再返回
+        with default_writer(writer) as writer:
+            for name, draw_fn in styles:
+                img, draw = self.create_base_image()
+                draw_fn(draw)
+                
+                # 交给后台写盘，马上开始渲染下一张
+                writer.save(img, f"macos_editor_{name}.png")
 
 if __name__ == "__main__":
     variants = StyleVariants()
-    variants.generate_all()
+    # 用法: python draw_styles_variants.py [--fast|--small|--webp|--qoi] [--sync]
+    writer, _ = writer_from_args(sys.argv[1:])
+    with writer:
+        variants.generate_all(writer)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+折线几何工具
+Douglas–Peucker 简化、画布外裁剪、自适应采样，供矢量导出和光栅绘制共用
+"""
+
+
+def _point_line_distance(p, a, b):
+    """点 p 到线段 ab 的距离"""
+    ax, ay = a
+    bx, by = b
+    px, py = p
+    dx, dy = bx - ax, by - ay
+    if dx == 0 and dy == 0:
+        return ((px - ax) ** 2 + (py - ay) ** 2) ** 0.5
+    t = ((px - ax) * dx + (py - ay) * dy) / (dx * dx + dy * dy)
+    t = max(0.0, min(1.0, t))
+    cx, cy = ax + t * dx, ay + t * dy
+    return ((px - cx) ** 2 + (py - cy) ** 2) ** 0.5
+
+
+def simplify_polyline(points, tolerance=0.5):
+    """Douglas–Peucker 简化：去掉偏离不超过 tolerance 像素的近共线点
+
+    用显式栈代替递归，十万级点的纹理也不会爆栈。首尾点始终保留。
+    """
+    n = len(points)
+    if n < 3 or tolerance <= 0:
+        return list(points)
+
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = points[start], points[end]
+        max_dist, index = -1.0, start
+        for i in range(start + 1, end):
+            d = _point_line_distance(points[i], a, b)
+            if d > max_dist:
+                max_dist, index = d, i
+        if max_dist > tolerance:
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+
+    return [p for p, k in zip(points, keep) if k]
+
+
+# ===== 光栅化前的裁剪与采样 =====
+
+def segment_visible(a, b, width, height, margin=0):
+    """线段包围盒是否与画布相交（保守判断，只会多画不会漏画）"""
+    (ax, ay), (bx, by) = a, b
+    return not (max(ax, bx) < -margin or min(ax, bx) > width + margin or
+                max(ay, by) < -margin or min(ay, by) > height + margin)
+
+
+def cull_polyline(points, width, height, margin=0):
+    """去掉完全落在画布外的线段，返回若干段连续可见折线"""
+    runs, run = [], []
+    for a, b in zip(points, points[1:]):
+        if segment_visible(a, b, width, height, margin):
+            if not run:
+                run.append(a)
+            run.append(b)
+        elif run:
+            runs.append(run)
+            run = []
+    if run:
+        runs.append(run)
+    return runs
+
+
+def merge_close_points(points, min_step=1.0):
+    """合并亚像素步长：与上一个保留点距离不足 min_step 的点丢掉，终点保留"""
+    if len(points) < 3:
+        return list(points)
+    merged = [points[0]]
+    limit = min_step * min_step
+    for p in points[1:-1]:
+        lx, ly = merged[-1]
+        if (p[0] - lx) ** 2 + (p[1] - ly) ** 2 >= limit:
+            merged.append(p)
+    merged.append(points[-1])
+    return merged
+
+
+def sample_curve(fn, t0, t1, tolerance=0.5, segments=16, max_depth=8):
+    """按曲率自适应采样参数曲线 fn(t) -> (x, y)
+
+    先均匀切 segments 段（防止漏掉小波纹），再对中点偏离弦超过 tolerance 的段二分，
+    平直处点少、弯曲处点多，而不是不论半径都按固定角度步长采样。
+    """
+    ts = [t0 + (t1 - t0) * i / segments for i in range(segments + 1)]
+    points = [fn(t0)]
+    for ta, tb in zip(ts, ts[1:]):
+        stack = [(ta, tb, fn(ta), fn(tb), 0)]
+        # 深度优先、先左后右，保证输出顺序
+        while stack:
+            a, b, pa, pb, depth = stack.pop()
+            mid = (a + b) / 2
+            pm = fn(mid)
+            if depth < max_depth and _point_line_distance(pm, pa, pb) > tolerance:
+                stack.append((mid, b, pm, pb, depth + 1))
+                stack.append((a, mid, pa, pm, depth + 1))
+            else:
+                points.append(pb)
+    return points
+
+
+def prepare_polyline(points, width, height, tolerance=0.5, min_step=1.0, margin=2):
+    """绘制前的统一处理：裁掉画布外线段 → 合并亚像素步长 → Douglas–Peucker"""
+    return [simplify_polyline(merge_close_points(run, min_step), tolerance)
+            for run in cull_polyline(points, width, height, margin)]
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+图片输出阶段 - 可选编码格式/压缩参数，后台线程写盘
+渲染下一张的同时压缩上一张，generate_all 不再卡在每次 img.save 上
+"""
+
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+from PIL import Image
+
+# 预设：fast 用于迭代预览，small 用于最终出图
+PRESETS = {
+    'fast': {'format': 'png', 'compress_level': 1, 'optimize': False},
+    'default': {'format': 'png', 'compress_level': 6, 'optimize': False},
+    'small': {'format': 'png', 'compress_level': 9, 'optimize': True},
+    'webp': {'format': 'webp', 'quality': 80, 'method': 0},
+    'qoi': {'format': 'qoi'},
+}
+
+EXTENSIONS = {'png': '.png', 'webp': '.webp', 'qoi': '.qoi'}
+
+
+class ImageWriter:
+    """编码 + 写盘；background=True 时交给后台线程，save() 立即返回
+
+    传进来的 img 之后不能再修改（各 generate_all 每轮都会新建画布，满足这一点）。
+    """
+
+    def __init__(self, format='png', compress_level=6, optimize=False, quality=80, method=0,
+                 background=True, max_pending=4):
+        self.format = format.lower()
+        if self.format not in EXTENSIONS:
+            raise ValueError(f"不支持的输出格式: {format}")
+        Image.init()
+        if self.format.upper() not in Image.SAVE:
+            raise ValueError(f"当前 Pillow 不支持写 {self.format}，请升级 Pillow")
+
+        if self.format == 'png':
+            self.params = {'compress_level': compress_level, 'optimize': optimize}
+        elif self.format == 'webp':
+            self.params = {'quality': quality, 'method': method}
+        else:
+            self.params = {}
+
+        self.errors = []
+        self._queue = None
+        if background:
+            # 队列有上限，渲染远快于编码时不会把所有画布都堆在内存里
+            self._queue = queue.Queue(maxsize=max_pending)
+            self._thread = threading.Thread(target=self._worker, daemon=True)
+            self._thread.start()
+
+    @classmethod
+    def preset(cls, name, **kwargs):
+        options = dict(PRESETS[name])
+        options.update(kwargs)
+        return cls(**options)
+
+    def filename_for(self, filename):
+        """按输出格式替换扩展名"""
+        return os.path.splitext(filename)[0] + EXTENSIONS[self.format]
+
+    def save(self, img, filename):
+        filename = self.filename_for(filename)
+        if self._queue is None:
+            self._encode(img, filename)
+        else:
+            self._queue.put((img, filename))
+        return filename
+
+    def _encode(self, img, filename):
+        # 先写临时文件再改名，中途退出不会留下半张图
+        tmp = filename + '.tmp'
+        img.save(tmp, format=self.format.upper(), **self.params)
+        os.replace(tmp, filename)
+        print(f"✅ 已保存: {filename}")
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                try:
+                    self._encode(*item)
+                except Exception as e:
+                    self.errors.append((item[1], e))
+                    print(f"❌ 保存失败: {item[1]} ({e})")
+            finally:
+                self._queue.task_done()
+
+    def close(self):
+        """等待后台写完；有图没写成功就抛 RuntimeError，脚本以非零状态退出"""
+        if self._queue is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._queue = None
+        if self.errors:
+            failed = ', '.join(filename for filename, _ in self.errors)
+            raise RuntimeError(f"{len(self.errors)} 张图保存失败: {failed}") from self.errors[0][1]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@contextmanager
+def default_writer(writer=None):
+    """generate_all(writer=None) 用：没传 writer 就建一个默认的，用完关掉；传了的由调用方负责关"""
+    if writer is not None:
+        yield writer
+        return
+    with ImageWriter() as writer:
+        yield writer
+
+
+def writer_from_args(args):
+    """从命令行参数里取出 --fast / --small / --webp / --qoi / --sync，返回 (writer, 剩余参数)"""
+    preset, background, rest = 'default', True, []
+    for arg in args:
+        if arg.startswith('--') and arg[2:] in PRESETS:
+            preset = arg[2:]
+        elif arg == '--sync':
+            background = False
+        else:
+            rest.append(arg)
+    return ImageWriter.preset(preset, background=background), rest
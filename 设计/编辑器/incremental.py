@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+增量重绘 - 按 UI 组件跟踪脏区域
+整图渲染时记下每个组件实际画到的范围；之后某个组件变化，只把它新旧范围内的
+纹理层缓存贴回去，再把与该区域相交的组件按原顺序重画一遍；
+整图渲染时记录了矢量笔画的，局部重绘后导出前按当前状态重新记录组件部分
+"""
+
+from PIL import Image, ImageDraw
+
+from vector_export import VectorRecorder
+
+
+def union(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+def intersects(a, b):
+    return a is not None and b is not None and \
+        a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def clamp(box, width, height):
+    x0, y0, x1, y1 = box
+    return max(0, x0), max(0, y0), min(width, x1), min(height, y1)
+
+
+def _points(xy):
+    xy = list(xy)
+    if xy and not isinstance(xy[0], (tuple, list)):
+        return [(xy[i], xy[i + 1]) for i in range(0, len(xy) - 1, 2)]
+    return [tuple(p) for p in xy]
+
+
+def _copy_ops(ops):
+    return [(op[0], list(op[1])) + op[2:] if op[0] == 'line' else op for op in ops]
+
+
+class RegionDraw:
+    """ImageDraw 代理：绝对坐标平移到局部画布 origin，同时累计绘制范围 bounds
+
+    draw 为 None 时只量范围不画（用于组件变化后预估新范围）。
+    """
+
+    _scratch = None
+
+    def __init__(self, draw, origin=(0, 0)):
+        if draw is None and RegionDraw._scratch is None:
+            RegionDraw._scratch = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+        self._draw = draw
+        self._measure = draw or RegionDraw._scratch
+        self.ox, self.oy = origin
+        self.bounds = None
+
+    def _grow(self, box, pad=0):
+        x0, y0, x1, y1 = box
+        # 外扩 1px 吸收抗锯齿和取整误差
+        self.bounds = union(self.bounds, (int(x0 - pad) - 1, int(y0 - pad) - 1,
+                                          int(x1 + pad) + 2, int(y1 + pad) + 2))
+
+    def _shift(self, points):
+        return [(x - self.ox, y - self.oy) for x, y in points]
+
+    def line(self, xy, fill=None, width=1, **kwargs):
+        points = _points(xy)
+        xs, ys = [p[0] for p in points], [p[1] for p in points]
+        self._grow((min(xs), min(ys), max(xs), max(ys)), pad=width / 2 + 1)
+        if self._draw:
+            self._draw.line(self._shift(points), fill=fill, width=width, **kwargs)
+
+    def _box(self, method, xy, **kwargs):
+        (x0, y0), (x1, y1) = _points(xy)[0], _points(xy)[-1]
+        self._grow((min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)))
+        if self._draw:
+            getattr(self._draw, method)(self._shift([(x0, y0), (x1, y1)]), **kwargs)
+
+    def ellipse(self, xy, **kwargs):
+        self._box('ellipse', xy, **kwargs)
+
+    def rectangle(self, xy, **kwargs):
+        self._box('rectangle', xy, **kwargs)
+
+    def point(self, xy, fill=None, **kwargs):
+        points = _points(xy)
+        for p in points:
+            self._grow((p[0], p[1], p[0], p[1]))
+        if self._draw:
+            self._draw.point(self._shift(points), fill=fill, **kwargs)
+
+    def text(self, xy, text, fill=None, font=None, **kwargs):
+        x, y = xy
+        self._grow(self._measure.textbbox((x, y), text, font=font))
+        if self._draw:
+            self._draw.text((x - self.ox, y - self.oy), text, fill=fill, font=font, **kwargs)
+
+    def textbbox(self, xy, text, font=None, **kwargs):
+        return self._measure.textbbox(xy, text, font=font, **kwargs)
+
+
+class DirtyTracker:
+    """组件脏区域跟踪
+
+    components 是按绘制顺序排列的 [(name, fn)]，fn(draw) 用绝对坐标画该组件。
+    regions 是布局求解出的 {name: (x0, y0, x1, y1)}，组件变脏时至少重绘整个面板。
+    render_full 传入的是 VectorRecorder 时，vector() 返回和当前画面一致的矢量笔画。
+    """
+
+    def __init__(self, components, size, regions=None):
+        self.components = list(components)
+        self.width, self.height = size
+        self.regions = regions or {}
+        self.bounds = {}
+        self.dirty = set()
+        self.base_layer = None
+        self.recorder = None
+        self._texture_ops = None
+        self._vector_stale = False
+
+    def resize(self, size, regions=None):
+        """布局重新求解后调用；缓存作废，需要重新 render_full"""
+        self.width, self.height = size
+        self.regions = regions or {}
+        self.bounds = {}
+        self.dirty.clear()
+        self.base_layer = None
+        self.recorder = None
+        self._texture_ops = None
+        self._vector_stale = False
+
+    def render_full(self, img, draw):
+        """整图画全部组件并记录各自范围；调用前 img 上应只有纹理层"""
+        self.base_layer = img.copy()
+        self.recorder = draw if isinstance(draw, VectorRecorder) else None
+        if self.recorder is not None:
+            # 纹理层的笔画留一份（折线会被后续同色相接的 line 原地延长，要复制），重新记录时从这里接着画
+            self._texture_ops = _copy_ops(draw.ops)
+            self._vector_stale = False
+        for name, fn in self.components:
+            region = RegionDraw(draw)
+            fn(region)
+            self.bounds[name] = union(region.bounds, self.regions.get(name))
+        self.dirty.clear()
+
+    def mark(self, name):
+        if name not in self.bounds:
+            raise KeyError(f"未知组件: {name}")
+        self.dirty.add(name)
+
+    def _merge(self, boxes):
+        """相交的脏矩形合并，避免同一块区域重画两次"""
+        merged = []
+        for box in boxes:
+            while True:
+                hit = next((m for m in merged if intersects(m, box)), None)
+                if hit is None:
+                    break
+                merged.remove(hit)
+                box = union(hit, box)
+            merged.append(box)
+        return merged
+
+    def recomposite(self, img):
+        """只重绘脏区域，返回实际重绘的矩形列表"""
+        if self.base_layer is None:
+            raise RuntimeError("先调用 render_full")
+
+        boxes = []
+        for name, fn in self.components:
+            if name not in self.dirty:
+                continue
+            probe = RegionDraw(None)
+            fn(probe)
+            bounds = union(probe.bounds, self.regions.get(name))
+            boxes.append(union(self.bounds[name], bounds))
+            self.bounds[name] = bounds
+        boxes = [clamp(b, self.width, self.height) for b in boxes if b is not None]
+        boxes = [b for b in self._merge(boxes) if b[0] < b[2] and b[1] < b[3]]
+
+        for box in boxes:
+            tile = self.base_layer.crop(box)
+            region = RegionDraw(ImageDraw.Draw(tile), origin=box[:2])
+            for name, fn in self.components:
+                if intersects(self.bounds[name], box):
+                    fn(region)
+            img.paste(tile, box[:2])
+
+        if boxes and self.recorder is not None:
+            self._vector_stale = True
+        self.dirty.clear()
+        return boxes
+
+    def vector(self):
+        """和当前画面一致的 VectorRecorder；局部重绘过就在纹理笔画之后按当前状态重新记录全部组件
+
+        重新记录只量不画，不会动光栅图。
+        """
+        if self.recorder is None:
+            raise RuntimeError("render_full 时没有记录矢量笔画")
+        if self._vector_stale:
+            recorder = VectorRecorder(RegionDraw(None), (self.width, self.height), self.recorder.background)
+            recorder.ops = _copy_ops(self._texture_ops)
+            for name, fn in self.components:
+                fn(recorder)
+            self.recorder = recorder
+            self._vector_stale = False
+        return self.recorder
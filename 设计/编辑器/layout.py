@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+声明式布局 - 分栏树（固定尺寸 + 弹性尺寸），一次求解得到各面板矩形
+界面绘制、纹理避让区、脏区域跟踪都从这里取坐标，改尺寸只需重新 solve
+"""
+
+from collections import namedtuple
+
+
+class Rect(namedtuple('Rect', 'x y w h')):
+    @property
+    def right(self):
+        return self.x + self.w
+
+    @property
+    def bottom(self):
+        return self.y + self.h
+
+    @property
+    def box(self):
+        """(x0, y0, x1, y1)，给 PIL / DirtyTracker 用"""
+        return self.x, self.y, self.right, self.bottom
+
+    def contains(self, x, y):
+        return self.x <= x <= self.right and self.y <= y <= self.bottom
+
+
+class Pane:
+    """叶子面板；size 为 None 时按 flex 比例分剩余空间"""
+
+    def __init__(self, name=None, size=None, flex=1):
+        self.name = name
+        self.size = size
+        self.flex = flex
+
+    def solve(self, rect, out):
+        if self.name:
+            out[self.name] = rect
+        return out
+
+
+class Split(Pane):
+    """分栏容器：direction 为 'row'（左右排）或 'column'（上下排）"""
+
+    def __init__(self, direction, *children, name=None, size=None, flex=1):
+        super().__init__(name, size, flex)
+        self.direction = direction
+        self.children = children
+
+    def solve(self, rect, out):
+        super().solve(rect, out)
+        total = rect.w if self.direction == 'row' else rect.h
+        fixed = sum(c.size for c in self.children if c.size is not None)
+        flex = sum(c.flex for c in self.children if c.size is None)
+        free = max(0, total - fixed)
+
+        pos, used_flex = 0, 0
+        for child in self.children:
+            if child.size is not None:
+                length = child.size
+            else:
+                # 按累计比例取整，弹性面板加起来正好填满剩余空间
+                length = free * (used_flex + child.flex) // flex - free * used_flex // flex
+                used_flex += child.flex
+            if self.direction == 'row':
+                child_rect = Rect(rect.x + pos, rect.y, length, rect.h)
+            else:
+                child_rect = Rect(rect.x, rect.y + pos, rect.w, length)
+            child.solve(child_rect, out)
+            pos += length
+        return out
+
+
+def Row(*children, **kwargs):
+    return Split('row', *children, **kwargs)
+
+
+def Column(*children, **kwargs):
+    return Split('column', *children, **kwargs)
+
+
+def editor_layout(title=38, left=220, right=280, tabs=36, gutter=60, command=46, status=20):
+    """macOS 编辑器的标准分栏
+
+    标题栏 / [资源管理器 | 标签栏+编辑区(行号|代码)+命令栏 | 右侧上下文] / 状态栏
+    """
+    return Column(
+        Pane('title_bar', size=title),
+        Row(
+            Pane('left_panel', size=left),
+            Column(
+                Pane('tab_bar', size=tabs),
+                Row(Pane('gutter', size=gutter), Pane('code'), name='editor'),
+                Pane('command_bar', size=command),
+                name='center',
+            ),
+            Column(Pane(size=tabs), Pane('right_panel'), Pane(size=command), size=right),
+            name='body',
+        ),
+        Pane('status_bar', size=status),
+    )
+
+
+def solve(root, width, height):
+    """求解布局，返回 {面板名: Rect}"""
+    return root.solve(Rect(0, 0, width, height), {})
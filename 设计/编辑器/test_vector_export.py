@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""vector_export 的回归测试：按 PIL 的常见调用方式画，再导出 SVG / PDF"""
+
+import zlib
+
+import pytest
+from PIL import Image, ImageDraw
+
+from vector_export import VectorRecorder
+
+
+def _recorder(size=(40, 30), background=(10, 20, 30)):
+    img = Image.new('RGB', size, background)
+    return img, VectorRecorder(ImageDraw.Draw(img), size, background)
+
+
+def _pdf_stream(path):
+    data = path.read_bytes()
+    start = data.index(b'stream\n') + len(b'stream\n')
+    end = data.index(b'\nendstream')
+    return zlib.decompress(data[start:end]).decode('latin-1')
+
+
+def test_default_fill_uses_pil_ink(tmp_path):
+    img, draw = _recorder()
+    draw.line([0, 0, 10, 10])
+    draw.text((5, 5), 'hi')
+    assert img.getpixel((3, 3)) == (255, 255, 255)
+
+    svg = draw.save(str(tmp_path / 'out.svg'))
+    content = open(svg, encoding='utf-8').read()
+    assert 'stroke="#ffffff"' in content
+    assert '>hi</text>' in content and 'fill="#ffffff"' in content
+
+    draw.save(str(tmp_path / 'out.pdf'))
+    stream = _pdf_stream(tmp_path / 'out.pdf')
+    assert '1 1 1 RG' in stream and '(hi) Tj' in stream
+
+
+def test_flat_point_list(tmp_path):
+    _, draw = _recorder()
+    draw.point([1, 2, 3, 4], fill='red')
+    draw.point((7, 8), fill='blue')
+    rects = [op[1] for op in draw.ops if op[0] == 'rect']
+    assert rects == [(1, 2, 2, 3), (3, 4, 4, 5), (7, 8, 8, 9)]
+
+    content = open(draw.save(str(tmp_path / 'out.svg')), encoding='utf-8').read()
+    assert content.count('fill="#ff0000"') == 2
+
+
+def test_shape_without_paint_gets_default_outline(tmp_path):
+    img, draw = _recorder()
+    draw.rectangle([12, 12, 18, 18])
+    assert img.getpixel((12, 15)) == (255, 255, 255)
+
+    content = open(draw.save(str(tmp_path / 'out.svg')), encoding='utf-8').read()
+    assert 'fill="none" stroke="#ffffff"' in content
+
+
+def test_connected_lines_merge():
+    _, draw = _recorder()
+    draw.line([(0, 0), (5, 5)], fill='red', width=2)
+    draw.line([(5, 5), (9, 1)], fill='red', width=2)
+    draw.line([(9, 1), (9, 9)], fill='blue', width=2)
+    assert [op[1] for op in draw.ops] == [[(0, 0), (5, 5), (9, 1)], [(9, 1), (9, 9)]]
+
+
+def test_unknown_format(tmp_path):
+    _, draw = _recorder()
+    with pytest.raises(ValueError):
+        draw.save(str(tmp_path / 'out.eps'))
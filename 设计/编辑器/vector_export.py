@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+矢量导出 - 把渲染器的笔画缓冲输出为 SVG / PDF
+VectorRecorder 包在 ImageDraw 外面，光栅照常绘制，同时记下每次 line/ellipse/rectangle/text 调用；
+导出时逐个元素流式写文件，折线先做 Douglas–Peucker 简化
+"""
+
+import zlib
+
+from PIL import ImageColor
+
+from geometry import simplify_polyline
+
+DEFAULT_INK = (255, 255, 255)  # 不传 fill 时 PIL 在 RGB 图上用的默认墨色
+
+
+def _color(fill):
+    """统一颜色为 (r, g, b)"""
+    if fill is None:
+        return None
+    if isinstance(fill, str):
+        fill = ImageColor.getrgb(fill)
+    return tuple(fill[:3])
+
+
+def _outline(fill, outline):
+    """fill 和 outline 都不传时 PIL 用默认墨色描边"""
+    if fill is None and outline is None:
+        return DEFAULT_INK
+    return _color(outline)
+
+
+def _flat_points(xy):
+    """[(x, y), ...] 或 [x0, y0, x1, y1, ...] 统一成点列表"""
+    xy = list(xy)
+    if xy and not isinstance(xy[0], (tuple, list)):
+        return [(xy[i], xy[i + 1]) for i in range(0, len(xy) - 1, 2)]
+    return [tuple(p) for p in xy]
+
+
+def _bbox(xy):
+    points = _flat_points(xy)
+    (x0, y0), (x1, y1) = points[0], points[-1]
+    return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+
+
+def _num(v):
+    """数字格式化：整数不带小数点，小数保留两位"""
+    if float(v).is_integer():
+        return str(int(v))
+    return f"{v:.2f}".rstrip('0').rstrip('.')
+
+
+class VectorRecorder:
+    """记录绘制调用的 ImageDraw 代理
+
+    首尾相接、同色同宽的 line 调用会合并成一条折线，
+    这样逐段 draw.line([p[j], p[j+1]]) 的纹理导出时也只是一条 path。
+    """
+
+    def __init__(self, draw, size, background):
+        self._draw = draw
+        self.size = size
+        self.background = _color(background)
+        self.ops = []
+
+    def __getattr__(self, name):
+        # textbbox 等只读方法直接转发
+        return getattr(self._draw, name)
+
+    def line(self, xy, fill=None, width=1, **kwargs):
+        self._draw.line(xy, fill=fill, width=width, **kwargs)
+        points = _flat_points(xy)
+        if len(points) < 2:
+            return
+        color, w = _color(fill), max(1, width)
+        if self.ops:
+            last = self.ops[-1]
+            if last[0] == 'line' and last[2] == color and last[3] == w and last[1][-1] == points[0]:
+                last[1].extend(points[1:])
+                return
+        self.ops.append(('line', points, color, w))
+
+    def ellipse(self, xy, fill=None, outline=None, width=1, **kwargs):
+        self._draw.ellipse(xy, fill=fill, outline=outline, width=width, **kwargs)
+        self.ops.append(('ellipse', _bbox(xy), _color(fill), _outline(fill, outline), width))
+
+    def rectangle(self, xy, fill=None, outline=None, width=1, **kwargs):
+        self._draw.rectangle(xy, fill=fill, outline=outline, width=width, **kwargs)
+        self.ops.append(('rect', _bbox(xy), _color(fill), _outline(fill, outline), width))
+
+    def point(self, xy, fill=None, **kwargs):
+        self._draw.point(xy, fill=fill, **kwargs)
+        for x, y in _flat_points(xy):
+            self.ops.append(('rect', (x, y, x + 1, y + 1), _color(fill), None, 0))
+
+    def text(self, xy, text, fill=None, font=None, **kwargs):
+        self._draw.text(xy, text, fill=fill, font=font, **kwargs)
+        size = getattr(font, 'size', 11)
+        self.ops.append(('text', tuple(xy), text, size, _color(fill)))
+
+    def save(self, filename, tolerance=0.5):
+        """按扩展名导出 .svg / .pdf"""
+        if filename.endswith('.svg'):
+            writer = SvgWriter
+        elif filename.endswith('.pdf'):
+            writer = PdfWriter
+        else:
+            raise ValueError(f"不支持的矢量格式: {filename}")
+        with writer(filename, self.size, self.background) as out:
+            for op in self.ops:
+                if op[0] == 'line':
+                    _, points, color, w = op
+                    out.polyline(simplify_polyline(points, tolerance), color, w)
+                elif op[0] == 'ellipse':
+                    out.ellipse(*op[1:])
+                elif op[0] == 'rect':
+                    out.rect(*op[1:])
+                else:
+                    out.text(*op[1:])
+        print(f"✅ 已导出: {filename}")
+        return filename
+
+
+class SvgWriter:
+    """逐元素写出 SVG，不在内存里拼整份文档"""
+
+    def __init__(self, filename, size, background):
+        self.f = open(filename, 'w', encoding='utf-8')
+        w, h = size
+        self.f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{w}" height="{h}" viewBox="0 0 {w} {h}">\n')
+        if background:
+            self.f.write(f'<rect width="{w}" height="{h}" fill="{self._hex(background)}"/>\n')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.f.write('</svg>\n')
+        self.f.close()
+
+    @staticmethod
+    def _hex(color):
+        # line / point / text 不传 fill 时记下的是 None，按 PIL 的默认墨色画
+        return '#%02x%02x%02x' % (color or DEFAULT_INK)
+
+    def _paint(self, fill, outline, width):
+        attrs = f'fill="{self._hex(fill)}"' if fill else 'fill="none"'
+        if outline:
+            attrs += f' stroke="{self._hex(outline)}" stroke-width="{width}"'
+        return attrs
+
+    def polyline(self, points, color, width):
+        d = 'M' + 'L'.join(f'{_num(x)} {_num(y)}' for x, y in points)
+        self.f.write(f'<path d="{d}" fill="none" stroke="{self._hex(color)}" '
+                     f'stroke-width="{width}" stroke-linejoin="round"/>\n')
+
+    def ellipse(self, bbox, fill, outline, width):
+        x0, y0, x1, y1 = bbox
+        self.f.write(f'<ellipse cx="{_num((x0 + x1) / 2)}" cy="{_num((y0 + y1) / 2)}" '
+                     f'rx="{_num((x1 - x0) / 2)}" ry="{_num((y1 - y0) / 2)}" '
+                     f'{self._paint(fill, outline, width)}/>\n')
+
+    def rect(self, bbox, fill, outline, width):
+        x0, y0, x1, y1 = bbox
+        self.f.write(f'<rect x="{_num(x0)}" y="{_num(y0)}" width="{_num(x1 - x0)}" height="{_num(y1 - y0)}" '
+                     f'{self._paint(fill, outline, width)}/>\n')
+
+    def text(self, xy, text, size, fill):
+        x, y = xy
+        text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+        for i, line in enumerate(text.split('\n')):
+            # PIL 的 xy 是左上角，SVG 的 y 是基线
+            baseline = y + size * (0.8 + 1.2 * i)
+            self.f.write(f'<text x="{_num(x)}" y="{_num(baseline)}" font-size="{size}" '
+                         f'font-family="SF Pro Text, Menlo, sans-serif" fill="{self._hex(fill)}">{line}</text>\n')
+
+
+class PdfWriter:
+    """单页 PDF，内容流用 zlib 边写边压缩"""
+
+    KAPPA = 0.5523  # 贝塞尔近似圆的控制点系数
+
+    def __init__(self, filename, size, background):
+        self.f = open(filename, 'wb')
+        self.width, self.height = size
+        self.offsets = {}
+        self.f.write(b'%PDF-1.4\n')
+        self._object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+        self._object(2, b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>')
+        self._object(3, (f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.width} {self.height}] '
+                         f'/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>').encode())
+        self._object(4, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+
+        self.offsets[5] = self.f.tell()
+        self.f.write(b'5 0 obj\n<< /Length 6 0 R /Filter /FlateDecode >>\nstream\n')
+        self.stream_start = self.f.tell()
+        self.zip = zlib.compressobj()
+        self.buf = []
+        if background:
+            self._emit(f'{self._rgb(background)} rg 0 0 {self.width} {self.height} re f')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._flush()
+        self.f.write(self.zip.flush())
+        length = self.f.tell() - self.stream_start
+        self.f.write(b'\nendstream\nendobj\n')
+        self._object(6, str(length).encode())
+
+        xref = self.f.tell()
+        self.f.write(f'xref\n0 7\n0000000000 65535 f \n'.encode())
+        for num in range(1, 7):
+            self.f.write(f'{self.offsets[num]:010d} 00000 n \n'.encode())
+        self.f.write(f'trailer\n<< /Size 7 /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode())
+        self.f.close()
+
+    def _object(self, num, body):
+        self.offsets[num] = self.f.tell()
+        self.f.write(f'{num} 0 obj\n'.encode() + body + b'\nendobj\n')
+
+    def _emit(self, op):
+        self.buf.append(op)
+        if len(self.buf) >= 512:
+            self._flush()
+
+    def _flush(self):
+        if self.buf:
+            self.f.write(self.zip.compress(('\n'.join(self.buf) + '\n').encode('latin-1')))
+            self.buf = []
+
+    @staticmethod
+    def _rgb(color):
+        return ' '.join(_num(round(c / 255, 3)) for c in color or DEFAULT_INK)
+
+    def _y(self, y):
+        # PDF 原点在左下角
+        return self.height - y
+
+    def polyline(self, points, color, width):
+        path = [f'{_num(points[0][0])} {_num(self._y(points[0][1]))} m']
+        path += [f'{_num(x)} {_num(self._y(y))} l' for x, y in points[1:]]
+        self._emit(f'{self._rgb(color)} RG {width} w 1 j ' + ' '.join(path) + ' S')
+
+    def _paint(self, path, fill, outline, width):
+        if fill and outline:
+            self._emit(f'{self._rgb(fill)} rg {self._rgb(outline)} RG {width} w {path} B')
+        elif fill:
+            self._emit(f'{self._rgb(fill)} rg {path} f')
+        elif outline:
+            self._emit(f'{self._rgb(outline)} RG {width} w {path} S')
+
+    def ellipse(self, bbox, fill, outline, width):
+        x0, y0, x1, y1 = bbox
+        cx, cy = (x0 + x1) / 2, self._y((y0 + y1) / 2)
+        rx, ry = (x1 - x0) / 2, (y1 - y0) / 2
+        kx, ky = rx * self.KAPPA, ry * self.KAPPA
+        n = _num
+        path = (f'{n(cx + rx)} {n(cy)} m '
+                f'{n(cx + rx)} {n(cy + ky)} {n(cx + kx)} {n(cy + ry)} {n(cx)} {n(cy + ry)} c '
+                f'{n(cx - kx)} {n(cy + ry)} {n(cx - rx)} {n(cy + ky)} {n(cx - rx)} {n(cy)} c '
+                f'{n(cx - rx)} {n(cy - ky)} {n(cx - kx)} {n(cy - ry)} {n(cx)} {n(cy - ry)} c '
+                f'{n(cx + kx)} {n(cy - ry)} {n(cx + rx)} {n(cy - ky)} {n(cx + rx)} {n(cy)} c h')
+        self._paint(path, fill, outline, width)
+
+    def rect(self, bbox, fill, outline, width):
+        x0, y0, x1, y1 = bbox
+        path = f'{_num(x0)} {_num(self._y(y1))} {_num(x1 - x0)} {_num(y1 - y0)} re'
+        self._paint(path, fill, outline, width)
+
+    def text(self, xy, text, size, fill):
+        x, y = xy
+        for i, line in enumerate(text.split('\n')):
+            # Helvetica 只有 WinAnsi 字符，中文和 emoji 丢掉
+            line = line.encode('cp1252', 'ignore').decode('latin-1')
+            line = line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+            baseline = self._y(y + size * (0.8 + 1.2 * i))
+            self._emit(f'BT /F1 {size} Tf {self._rgb(fill)} rg {_num(x)} {_num(baseline)} Td ({line}) Tj ET')